@@ -0,0 +1,90 @@
+# FICHIER: analyzer-engine/benchmarks/bench_ann_recall.py
+"""
+Compromis rappel / latence de l'index ANN de `chunks.embedding`.
+
+Un échantillon de requêtes (embeddings de chunks existants, légèrement bruités)
+est d'abord résolu en recherche exacte (parcours séquentiel, index désactivé),
+puis via `vector_search` pour chaque valeur de `ef_search` (HNSW) ou `probes`
+(IVFFlat). Le rappel@k est la part des k voisins exacts retrouvés.
+
+Le cache de résultats est désactivé pour que chaque requête atteigne Postgres.
+
+Usage:
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_ann_recall [--queries 100] [--k 10]
+        [--knob ef_search --values 10 20 40 80 160]
+        [--create-index hnsw|ivfflat]
+"""
+import argparse
+import asyncio
+
+import numpy as np
+
+from ingestion.metrics import LatencyRecorder
+from ingestion.storage.repositories.postgres_repository import PostgresRepository
+
+
+async def _sample_queries(repo: PostgresRepository, n_queries: int, noise: float) -> np.ndarray:
+    async with repo._get_connection() as conn:
+        rows = await conn.fetch(
+            "SELECT embedding FROM chunks WHERE embedding IS NOT NULL ORDER BY random() LIMIT $1", n_queries
+        )
+    rng = np.random.default_rng(0)
+    queries = np.stack([row["embedding"] for row in rows])
+    return (queries + rng.normal(0, noise, queries.shape)).astype(np.float32)
+
+
+async def _exact_neighbours(repo: PostgresRepository, query: np.ndarray, k: int) -> set:
+    async with repo._get_connection() as conn:
+        async with conn.transaction():
+            # Sans parcours d'index, le tri sur la distance est exact.
+            await conn.execute("SELECT set_config('enable_indexscan', 'off', true)")
+            rows = await conn.fetch(
+                "SELECT id FROM chunks WHERE embedding IS NOT NULL ORDER BY embedding <=> $1 LIMIT $2", query, k
+            )
+    return {str(row["id"]) for row in rows}
+
+
+async def run(n_queries: int, k: int, knob: str, values, create_index: str, noise: float) -> None:
+    repo = PostgresRepository(use_search_cache=False)
+    await repo.initialize()
+    try:
+        if create_index:
+            await repo.create_vector_index(method=create_index)
+        print(f"Index: {await repo.vector_index_info()}")
+
+        queries = await _sample_queries(repo, n_queries, noise)
+        exact_latency = LatencyRecorder()
+        truth = []
+        for query in queries:
+            with exact_latency.time():
+                truth.append(await _exact_neighbours(repo, query, k))
+        exact = exact_latency.snapshot()
+        print(f"{len(queries)} requêtes, k={k}")
+        print(f"  {'exact':<16} rappel 1.000  p50 {exact['p50_ms']:8.2f} ms  p99 {exact['p99_ms']:8.2f} ms")
+
+        for value in values:
+            latency = LatencyRecorder()
+            recalls = []
+            for query, expected in zip(queries, truth):
+                with latency.time():
+                    results = await repo.vector_search(query, k, **{knob: value})
+                recalls.append(len({r.chunk_id for r in results} & expected) / max(1, len(expected)))
+            snapshot = latency.snapshot()
+            print(
+                f"  {knob}={value:<6} rappel {np.mean(recalls):.3f}  "
+                f"p50 {snapshot['p50_ms']:8.2f} ms  p99 {snapshot['p99_ms']:8.2f} ms"
+            )
+    finally:
+        await repo.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--knob", choices=("ef_search", "probes"), default="ef_search")
+    parser.add_argument("--values", type=int, nargs="+", default=[10, 20, 40, 80, 160])
+    parser.add_argument("--create-index", choices=("hnsw", "ivfflat"), default=None)
+    parser.add_argument("--noise", type=float, default=0.01, help="Écart-type du bruit ajouté aux requêtes.")
+    args = parser.parse_args()
+    asyncio.run(run(args.queries, args.k, args.knob, args.values, args.create_index, args.noise))
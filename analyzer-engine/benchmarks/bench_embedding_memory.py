@@ -0,0 +1,63 @@
+# FICHIER: analyzer-engine/benchmarks/bench_embedding_memory.py
+"""
+Mesure l'empreinte mémoire des embeddings à chaque étape du pipeline :
+List[float] + dataclasses.asdict + str(list) (ancien chemin) contre
+float32 contigu + to_dict + littéral float32 (nouveau chemin).
+
+Usage: python -m benchmarks.bench_embedding_memory [--chunks 1000] [--dimension 768]
+"""
+import argparse
+import tracemalloc
+from dataclasses import asdict
+
+import numpy as np
+
+from ingestion.chunker import DocumentChunk
+from ingestion.storage.repositories.postgres_repository import _to_vector_literal
+
+
+def _measure(build):
+    """Retourne le résultat de `build()` et les octets qu'il retient encore en mémoire."""
+    tracemalloc.start()
+    result = build()
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, held
+
+
+def run(n_chunks: int, dimension: int) -> None:
+    rng = np.random.default_rng(0)
+    matrix = rng.standard_normal((n_chunks, dimension)).astype(np.float32)
+
+    def make_chunks(as_list: bool):
+        return [
+            DocumentChunk(content="x", index=i, start_char=0, end_char=1, metadata={},
+                          embedding=row.tolist() if as_list else row)
+            for i, row in enumerate(matrix.copy())
+        ]
+
+    legacy_chunks, legacy_held = _measure(lambda: make_chunks(as_list=True))
+    compact_chunks, compact_held = _measure(lambda: make_chunks(as_list=False))
+
+    _, legacy_copy = _measure(lambda: [asdict(c) for c in legacy_chunks])
+    _, compact_copy = _measure(lambda: [c.to_dict() for c in compact_chunks])
+
+    legacy_text = sum(len(str(c.embedding)) for c in legacy_chunks)
+    compact_text = sum(len(_to_vector_literal(c.embedding)) for c in compact_chunks)
+    binary = sum(c.embedding.nbytes for c in compact_chunks)
+
+    values = n_chunks * dimension
+    print(f"{n_chunks} chunks x {dimension} dimensions ({values:,} valeurs)")
+    print(f"{'étape':<34}{'List[float]':>16}{'float32':>16}")
+    print(f"{'chunks en mémoire (octets/dim)':<34}{legacy_held / values:>16.1f}{compact_held / values:>16.1f}")
+    print(f"{'copie vers le contexte (octets/dim)':<34}{legacy_copy / values:>16.1f}{compact_copy / values:>16.1f}")
+    print(f"{'paramètre Postgres texte (oct/dim)':<34}{legacy_text / values:>16.1f}{compact_text / values:>16.1f}")
+    print(f"{'paramètre Postgres binaire (oct/dim)':<34}{'-':>16}{binary / values:>16.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, default=1000)
+    parser.add_argument("--dimension", type=int, default=768)
+    args = parser.parse_args()
+    run(args.chunks, args.dimension)
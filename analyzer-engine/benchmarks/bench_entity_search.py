@@ -0,0 +1,73 @@
+# FICHIER: analyzer-engine/benchmarks/bench_entity_search.py
+"""
+Latence de `find_entity_relationships` sur un graphe synthétique, comparée à
+l'ancienne requête (deux `LIKE '%x%'` en UNION, parcours complet de `entities`).
+
+Usage:
+    python -m benchmarks.bench_entity_search [--entities 500000] [--queries 50] [--db-dir /tmp]
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+
+from ingestion.metrics import LatencyRecorder
+from ingestion.storage.repositories.sqlite_graph_repository import SQLiteGraphRepository
+
+_WORDS = ["get", "set", "user", "account", "load", "parse", "config", "render", "http", "cache", "token", "session"]
+
+_LEGACY_QUERY = """
+    SELECT s.name, s.type, r.type, t.name, t.type
+    FROM relationships r JOIN entities s ON r.source_id = s.id JOIN entities t ON r.target_id = t.id
+    WHERE s.name LIKE ?
+    UNION
+    SELECT s.name, s.type, r.type, t.name, t.type
+    FROM relationships r JOIN entities s ON r.source_id = s.id JOIN entities t ON r.target_id = t.id
+    WHERE t.name LIKE ?
+"""
+
+
+async def _populate(repo: SQLiteGraphRepository, n_entities: int, per_file: int = 100) -> None:
+    rng = random.Random(0)
+    for start in range(0, n_entities, per_file * 50):
+        files = []
+        for f in range(start, min(start + per_file * 50, n_entities), per_file):
+            names = [f"{rng.choice(_WORDS)}_{rng.choice(_WORDS)}_{f + i}" for i in range(per_file)]
+            files.append({
+                "file_path": f"src/module_{f}.py",
+                "entities": [{"name": n, "type": "FUNCTION"} for n in names],
+                "relationships": [{"source": names[i], "target": names[i - 1], "type": "CALLS"} for i in range(1, per_file)],
+            })
+        await repo.add_code_structures(files)
+
+
+async def run(n_entities: int, n_queries: int, db_dir: str) -> None:
+    rng = random.Random(1)
+    queries = [f"{rng.choice(_WORDS)}_{rng.choice(_WORDS)}_{rng.randrange(n_entities)}" for _ in range(n_queries)]
+    with tempfile.TemporaryDirectory(dir=db_dir) as tmp:
+        repo = SQLiteGraphRepository(db_path=os.path.join(tmp, "graph.sqlite"))
+        await repo.initialize()
+        await _populate(repo, n_entities)
+        print(f"{n_entities} entités, {n_queries} requêtes")
+
+        legacy, indexed = LatencyRecorder(), LatencyRecorder()
+        for query in queries:
+            with legacy.time():
+                async with repo.conn.execute(_LEGACY_QUERY, (f"%{query}%", f"%{query}%")) as cursor:
+                    await cursor.fetchall()
+            with indexed.time():
+                await repo.find_entity_relationships(query, limit=100)
+        for name, recorder in (("LIKE + UNION (ancien)", legacy), ("trigramme FTS5", indexed)):
+            snapshot = recorder.snapshot()
+            print(f"  {name:<24} p50 {snapshot['p50_ms']:9.2f} ms  p99 {snapshot['p99_ms']:9.2f} ms")
+        await repo.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entities", type=int, default=500_000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--db-dir", default=None)
+    args = parser.parse_args()
+    asyncio.run(run(args.entities, args.queries, args.db_dir))
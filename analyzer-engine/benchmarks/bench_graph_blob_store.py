@@ -0,0 +1,84 @@
+# FICHIER: analyzer-engine/benchmarks/bench_graph_blob_store.py
+"""
+Taille de la base du graphe selon le stockage du texte source : `--files` fichiers synthétiques
+de `--entities-per-file` fonctions sont ingérés, puis réingérés `--revisions` fois avec une
+ligne modifiée par fichier.
+
+Deux configurations sont comparées, chacune sur une base neuve :
+- texte en ligne : le lot ne transmet pas le texte du fichier, chaque entité copie le sien ;
+- blobs : le texte du fichier est stocké une fois, compressé ; les entités en référencent un extrait.
+
+Puis la lecture du code d'une entité (`get_entity_source`) est chronométrée.
+
+Usage:
+    python -m benchmarks.bench_graph_blob_store [--files 200] [--entities-per-file 50]
+        [--revisions 3] [--queries 2000] [--db-dir /tmp]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+
+from ingestion.metrics import LatencyRecorder
+from ingestion.storage.repositories.sqlite_graph_repository import SQLiteGraphRepository
+
+
+def _make_file(f: int, entities_per_file: int, revision: int, with_blob: bool):
+    functions = [
+        (f"module_{f}_function_{i}", f"def module_{f}_function_{i}(items):\n"
+                                     f"    total = 0\n    for item in items:\n        total += item * {i}\n    return total\n")
+        for i in range(entities_per_file)
+    ]
+    source = f"# revision {revision}\nimport os\n\n\n" + "\n\n".join(code for _, code in functions)
+    file_path = f"src/module_{f}.py"
+    file_data = {
+        "file_path": file_path,
+        "entities": [{"name": file_path, "type": "FILE", "source_code": source}]
+                    + [{"name": name, "type": "FUNCTION", "source_code": code.rstrip()} for name, code in functions],
+        "relationships": [],
+    }
+    if with_blob:
+        file_data["source_code"] = source
+    return file_data
+
+
+async def _run(db_path: str, with_blob: bool, n_files: int, entities_per_file: int, revisions: int, n_queries: int):
+    repo = SQLiteGraphRepository(db_path=db_path, read_pool_size=0)
+    await repo.initialize()
+    try:
+        for revision in range(revisions + 1):
+            await repo.add_code_structures([_make_file(f, entities_per_file, revision, with_blob) for f in range(n_files)])
+        await repo.conn.execute("VACUUM")
+
+        latency = LatencyRecorder()
+        for q in range(n_queries):
+            f = q % n_files
+            with latency.time():
+                await repo.get_entity_source(f"module_{f}_function_{q % entities_per_file}", f"src/module_{f}.py")
+        return os.path.getsize(db_path), latency.snapshot(), repo.stats()["blob_cache"]
+    finally:
+        await repo.close()
+
+
+async def run(n_files: int, entities_per_file: int, revisions: int, n_queries: int, db_dir: str) -> None:
+    print(f"{n_files} fichiers, {n_files * entities_per_file} fonctions, {revisions} révisions")
+    with tempfile.TemporaryDirectory(dir=db_dir) as tmp:
+        for name, with_blob in (("texte en ligne", False), ("blobs", True)):
+            size, stats, cache = await _run(
+                os.path.join(tmp, f"{name}.sqlite"), with_blob, n_files, entities_per_file, revisions, n_queries
+            )
+            print(
+                f"  {name:<16} base {size / 1024 / 1024:8.2f} Mo  lecture p50 {stats['p50_ms']:6.3f} ms  "
+                f"p99 {stats['p99_ms']:6.3f} ms  cache {cache['hits']}/{cache['hits'] + cache['misses']}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--entities-per-file", type=int, default=50)
+    parser.add_argument("--revisions", type=int, default=3, help="Réingestions avec une ligne modifiée par fichier.")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--db-dir", default=None, help="Répertoire des bases temporaires.")
+    args = parser.parse_args()
+    asyncio.run(run(args.files, args.entities_per_file, args.revisions, args.queries, args.db_dir))
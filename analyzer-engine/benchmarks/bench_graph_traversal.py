@@ -0,0 +1,59 @@
+# FICHIER: analyzer-engine/benchmarks/bench_graph_traversal.py
+"""
+Voisinage à k sauts : CTE récursive SQLite (`get_neighborhood`) contre parcours
+vectorisé sur le snapshot CSR (`GraphSnapshot.neighborhood`), sur un graphe
+d'appels synthétique (chaque fonction appelle `--calls` fonctions au hasard).
+
+Usage:
+    python -m benchmarks.bench_graph_traversal [--entities 200000] [--calls 3] [--depth 3] [--queries 50]
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from ingestion.metrics import LatencyRecorder
+from ingestion.storage.graph_snapshot import GraphSnapshot
+from ingestion.storage.repositories.sqlite_graph_repository import SQLiteGraphRepository
+
+
+async def run(n_entities: int, n_calls: int, depth: int, n_queries: int, per_file: int = 1000) -> None:
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = SQLiteGraphRepository(db_path=os.path.join(tmp, "graph.sqlite"))
+        await repo.initialize()
+        for start in range(0, n_entities, per_file):
+            names = [f"f{i}" for i in range(start, min(start + per_file, n_entities))]
+            await repo.add_code_structure({
+                "file_path": f"m{start}.py",
+                "entities": [{"name": n, "type": "FUNCTION"} for n in names],
+                "relationships": [{"source": n, "target": rng.choice(names), "type": "CALLS"} for n in names for _ in range(n_calls)],
+            })
+
+        started_at = time.perf_counter()
+        snapshot = await GraphSnapshot.load(repo)
+        print(f"{snapshot.num_nodes} nœuds, {snapshot.num_edges} relations ; snapshot chargé en {time.perf_counter() - started_at:.2f} s")
+
+        queries = [f"f{rng.randrange(n_entities)}" for _ in range(n_queries)]
+        sql, memory = LatencyRecorder(), LatencyRecorder()
+        for name in queries:
+            with sql.time():
+                await repo.get_neighborhood(name, max_depth=depth, max_nodes=100_000, max_fan_out=100_000)
+            with memory.time():
+                snapshot.neighborhood(name, max_depth=depth)
+        for label, recorder in (("CTE récursive SQLite", sql), ("snapshot CSR", memory)):
+            snapshot_stats = recorder.snapshot()
+            print(f"  {label:<22} p50 {snapshot_stats['p50_ms']:8.2f} ms  p99 {snapshot_stats['p99_ms']:8.2f} ms")
+        await repo.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entities", type=int, default=200_000)
+    parser.add_argument("--calls", type=int, default=3)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(run(args.entities, args.calls, args.depth, args.queries))
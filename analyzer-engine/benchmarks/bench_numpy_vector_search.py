@@ -0,0 +1,76 @@
+# FICHIER: analyzer-engine/benchmarks/bench_numpy_vector_search.py
+"""
+Latence et rappel de la recherche du store embarqué (NumpyVectorRepository) :
+recherche exacte (produit matriciel + argpartition), puis index IVF pour
+plusieurs valeurs de `probes`.
+
+Les vecteurs, groupés autour de `--clusters` centres comme des embeddings réels,
+sont écrits directement dans la matrice (sans passer par SQLite) pour mesurer
+uniquement le calcul du top-k.
+
+Usage:
+    python -m benchmarks.bench_numpy_vector_search [--vectors 1000000] [--dimension 768]
+        [--queries 100] [--k 10] [--probes 1 4 8 16 32] [--clusters 1000]
+"""
+import argparse
+import asyncio
+
+import numpy as np
+
+from ingestion.metrics import LatencyRecorder
+from ingestion.storage.repositories.numpy_vector_repository import NumpyVectorRepository, _normalize
+
+
+def _report(name: str, latency: LatencyRecorder, recall: float) -> None:
+    snapshot = latency.snapshot()
+    print(f"  {name:<12} rappel {recall:.3f}  p50 {snapshot['p50_ms']:8.3f} ms  p99 {snapshot['p99_ms']:8.3f} ms")
+
+
+async def run(n_vectors: int, dimension: int, n_queries: int, k: int, probes_values, n_clusters: int) -> None:
+    rng = np.random.default_rng(0)
+    repo = NumpyVectorRepository(path=None, dimension=dimension)
+    await repo.initialize()
+    try:
+        repo._n_rows = n_vectors
+        repo._ensure_capacity(n_vectors)
+        centers = rng.standard_normal((n_clusters, dimension)).astype(np.float32)
+        for start in range(0, n_vectors, 100_000):
+            stop = min(start + 100_000, n_vectors)
+            noise = 0.5 * rng.standard_normal((stop - start, dimension)).astype(np.float32)
+            repo._matrix[start:stop] = _normalize(centers[rng.integers(n_clusters, size=stop - start)] + noise)
+        repo._valid[:n_vectors] = True
+
+        queries = repo._matrix[rng.choice(n_vectors, n_queries, replace=False)] + 0.05 * rng.standard_normal((n_queries, dimension)).astype(np.float32)
+        print(f"{n_vectors} vecteurs, dimension {dimension}, {n_queries} requêtes, k={k}")
+
+        latency = LatencyRecorder()
+        truth = []
+        for query in queries:
+            with latency.time():
+                rows, _ = repo._nearest_rows(query, k, None)
+            truth.append(set(rows.tolist()))
+        _report("exact", latency, 1.0)
+
+        print(f"  index: {repo.build_index()}")
+        for probes in probes_values:
+            latency = LatencyRecorder()
+            recalls = []
+            for query, expected in zip(queries, truth):
+                with latency.time():
+                    rows, _ = repo._nearest_rows(query, k, probes)
+                recalls.append(len(set(rows.tolist()) & expected) / k)
+            _report(f"probes={probes}", latency, float(np.mean(recalls)))
+    finally:
+        await repo.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=1_000_000)
+    parser.add_argument("--dimension", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--probes", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--clusters", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(run(args.vectors, args.dimension, args.queries, args.k, args.probes, args.clusters))
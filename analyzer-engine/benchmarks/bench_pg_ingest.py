@@ -0,0 +1,112 @@
+# FICHIER: analyzer-engine/benchmarks/bench_pg_ingest.py
+"""
+Mesure le débit d'insertion des chunks dans PostgreSQL selon trois stratégies :
+executemany + littéral texte `$n::vector` (ancien chemin), INSERT multi-lignes
+avec vecteurs binaires (repli) et COPY binaire (nouveau chemin).
+
+Les insertions visent une table temporaire calquée sur `chunks` : aucune
+donnée n'est laissée dans la base.
+
+Usage:
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_pg_ingest [--chunks 5000] [--dimension 768]
+    python -m benchmarks.bench_pg_ingest --container   # démarre un conteneur pgvector via testcontainers
+"""
+import argparse
+import asyncio
+import os
+import time
+import uuid
+
+import asyncpg
+import numpy as np
+
+from ingestion.storage.repositories.postgres_repository import (
+    CHUNK_COLUMNS, PostgresRepository, _init_connection, _to_vector_literal
+)
+
+TABLE = "bench_chunks"
+
+
+async def _reset_table(conn: asyncpg.Connection, dimension: int) -> None:
+    await conn.execute(f"DROP TABLE IF EXISTS {TABLE}")
+    await conn.execute(f"""
+        CREATE TEMP TABLE {TABLE} (
+            id UUID PRIMARY KEY, document_id UUID NOT NULL, content TEXT NOT NULL,
+            embedding vector({dimension}), chunk_index INTEGER NOT NULL,
+            metadata JSONB DEFAULT '{{}}', token_count INTEGER
+        )
+    """)
+
+
+async def _legacy_executemany(conn: asyncpg.Connection, records) -> None:
+    await conn.executemany(
+        f"INSERT INTO {TABLE} ({', '.join(CHUNK_COLUMNS)}) VALUES ($1, $2, $3, $4::text::vector, $5, $6, $7)",
+        [(r[0], r[1], r[2], _to_vector_literal(r[3]), *r[4:]) for r in records]
+    )
+
+
+async def _multirow_insert(conn: asyncpg.Connection, records) -> None:
+    # Même code que le repli du repository, dirigé vers la table de mesure.
+    await PostgresRepository()._insert_chunks_multirow(conn, records, table=TABLE)
+
+
+async def _binary_copy(conn: asyncpg.Connection, records) -> None:
+    await conn.copy_records_to_table(TABLE, records=records, columns=CHUNK_COLUMNS)
+
+
+async def run(database_url: str, n_chunks: int, dimension: int) -> None:
+    rng = np.random.default_rng(0)
+    document_id = uuid.uuid4()
+    metadata = {"file_path": "bench.py", "entity_type": "function"}
+    records = [
+        (uuid.uuid4(), document_id, f"def function_{i}(): return {i}\n" * 8,
+         rng.standard_normal(dimension).astype(np.float32), i, metadata, 64)
+        for i in range(n_chunks)
+    ]
+
+    conn = await asyncpg.connect(database_url)
+    try:
+        await _init_connection(conn)
+        print(f"{n_chunks} chunks, dimension {dimension}")
+        for name, insert in (
+            ("executemany + littéral texte", _legacy_executemany),
+            ("INSERT multi-lignes binaire", _multirow_insert),
+            ("COPY binaire", _binary_copy),
+        ):
+            await _reset_table(conn, dimension)
+            started_at = time.perf_counter()
+            async with conn.transaction():
+                await insert(conn, records)
+            elapsed = time.perf_counter() - started_at
+            print(f"  {name:<30} {elapsed:8.3f} s  {n_chunks / elapsed:10.0f} chunks/s")
+    finally:
+        await conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--dimension", type=int, default=768)
+    parser.add_argument("--container", action="store_true", help="Démarrer un conteneur pgvector/pgvector:pg16.")
+    args = parser.parse_args()
+
+    if args.container:
+        from testcontainers.postgres import PostgresContainer
+        with PostgresContainer("pgvector/pgvector:pg16", driver=None) as postgres:
+            url = postgres.get_connection_url()
+            os.environ["DATABASE_URL"] = url
+            asyncio.run(_with_extension(url, args.chunks, args.dimension))
+    else:
+        url = os.environ["DATABASE_URL"]
+        asyncio.run(run(url, args.chunks, args.dimension))
+
+
+async def _with_extension(url: str, n_chunks: int, dimension: int) -> None:
+    conn = await asyncpg.connect(url)
+    await conn.execute("CREATE EXTENSION IF NOT EXISTS vector")
+    await conn.close()
+    await run(url, n_chunks, dimension)
+
+
+if __name__ == "__main__":
+    main()
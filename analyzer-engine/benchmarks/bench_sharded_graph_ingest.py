@@ -0,0 +1,88 @@
+# FICHIER: analyzer-engine/benchmarks/bench_sharded_graph_ingest.py
+"""
+Ingestion concurrente de plusieurs dépôts dans le graphe de code : `--repos` tâches écrivent
+chacune `--files` fichiers synthétiques (lots de `--batch-files` fichiers).
+
+Deux configurations sont comparées, chacune sur des bases neuves :
+- une seule base (SQLiteGraphRepository) : toutes les tâches partagent son unique écrivain ;
+- une base par dépôt (ShardedGraphRepository) : les lots de dépôts différents s'écrivent en parallèle.
+
+Puis une recherche fédérée (`find_entity_relationships`, ATTACH des shards) est chronométrée.
+
+Usage:
+    python -m benchmarks.bench_sharded_graph_ingest [--repos 4] [--files 250]
+        [--entities-per-file 100] [--batch-files 50] [--queries 200] [--db-dir /tmp]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from ingestion.metrics import LatencyRecorder
+from ingestion.storage.repositories.sharded_graph_repository import ShardedGraphRepository
+from ingestion.storage.repositories.sqlite_graph_repository import SQLiteGraphRepository
+
+
+def _make_files(repo: int, n_files: int, entities_per_file: int):
+    files = []
+    for f in range(n_files):
+        names = [f"repo_{repo}_module_{f}_function_{i}" for i in range(entities_per_file)]
+        files.append({
+            "file_path": f"repo_{repo}/src/module_{f}.py",
+            "entities": [{"name": name, "type": "FUNCTION", "source_code": f"def {name}(): pass"} for name in names],
+            "relationships": [
+                {"source": names[i], "target": names[(i + 1) % entities_per_file], "type": "CALLS"}
+                for i in range(entities_per_file)
+            ],
+        })
+    return files
+
+
+async def _ingest(repo, repos_files, batch_files: int) -> float:
+    async def ingest_repo(files):
+        for i in range(0, len(files), batch_files):
+            await repo.add_code_structures(files[i:i + batch_files])
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(ingest_repo(files) for files in repos_files))
+    return time.perf_counter() - started_at
+
+
+async def run(n_repos: int, n_files: int, entities_per_file: int, batch_files: int, n_queries: int, db_dir: str) -> None:
+    repos_files = [_make_files(r, n_files, entities_per_file) for r in range(n_repos)]
+    n_entities = n_repos * n_files * entities_per_file
+    print(f"{n_repos} dépôts, {n_repos * n_files} fichiers, {n_entities} entités")
+
+    with tempfile.TemporaryDirectory(dir=db_dir) as tmp:
+        single = SQLiteGraphRepository(db_path=os.path.join(tmp, "single.sqlite"))
+        await single.initialize()
+        sharded = ShardedGraphRepository(shards_dir=os.path.join(tmp, "shards"), shard_key=lambda path: path.split("/")[0])
+        await sharded.initialize()
+        try:
+            for name, repo in (("une base", single), ("une base par dépôt", sharded)):
+                elapsed = await _ingest(repo, repos_files, batch_files)
+                print(f"  {name:<20} {elapsed:8.2f} s  {n_entities / elapsed:10.0f} entités/s")
+
+            for name, repo in (("une base", single), ("requête fédérée", sharded)):
+                recorder = LatencyRecorder()
+                for q in range(n_queries):
+                    with recorder.time():
+                        await repo.find_entity_relationships(f"module_{q % n_files}_function_{q % entities_per_file}")
+                stats = recorder.snapshot()
+                print(f"  recherche, {name:<20} p50 {stats['p50_ms']:8.2f} ms  p99 {stats['p99_ms']:8.2f} ms")
+        finally:
+            await single.close()
+            await sharded.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repos", type=int, default=4)
+    parser.add_argument("--files", type=int, default=250, help="Fichiers par dépôt.")
+    parser.add_argument("--entities-per-file", type=int, default=100)
+    parser.add_argument("--batch-files", type=int, default=50, help="Fichiers par transaction.")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--db-dir", default=None, help="Répertoire des bases temporaires.")
+    args = parser.parse_args()
+    asyncio.run(run(args.repos, args.files, args.entities_per_file, args.batch_files, args.queries, args.db_dir))
@@ -0,0 +1,111 @@
+# FICHIER: analyzer-engine/benchmarks/bench_sqlite_graph_ingest.py
+"""
+Débit d'écriture du graphe de code (SQLiteGraphRepository) sur un dépôt synthétique :
+`--files` fichiers de `--entities-per-file` entités, chaque entité appelant les
+`--edges-per-entity` suivantes du même fichier.
+
+Deux configurations sont comparées, chacune sur une base neuve :
+- ancien chemin : un `execute` par entité et par relation, pragmas par défaut
+  (journal DELETE, synchronous=FULL), un commit par fichier ;
+- nouveau chemin : `add_code_structures` (executemany, pragmas réglés), un commit par lot.
+
+Usage:
+    python -m benchmarks.bench_sqlite_graph_ingest [--files 1000] [--entities-per-file 100]
+        [--edges-per-entity 2] [--batch-files 50] [--db-dir /tmp]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from ingestion.storage.repositories.sqlite_graph_repository import SQLiteGraphRepository
+
+
+def _make_files(n_files: int, entities_per_file: int, edges_per_entity: int):
+    files = []
+    for f in range(n_files):
+        names = [f"module_{f}_function_{i}" for i in range(entities_per_file)]
+        files.append({
+            "file_path": f"src/module_{f}.py",
+            "entities": [{"name": name, "type": "FUNCTION", "source_code": f"def {name}(): pass"} for name in names],
+            "relationships": [
+                {"source": names[i], "target": names[(i + j) % entities_per_file], "type": "CALLS"}
+                for i in range(entities_per_file) for j in range(1, edges_per_entity + 1)
+            ],
+        })
+    return files
+
+
+async def _legacy_write(repo: SQLiteGraphRepository, file_data) -> None:
+    """Réplique du chemin précédent : un aller-retour par ligne, un commit par fichier."""
+    async with repo.conn.cursor() as cursor:
+        for entity in file_data["entities"]:
+            await cursor.execute(
+                "INSERT OR IGNORE INTO entities (name, type, file_path, source_code) VALUES (?, ?, ?, ?)",
+                (entity["name"], entity["type"], file_data["file_path"], entity.get("source_code", ""))
+            )
+        await cursor.execute("SELECT id, name FROM entities WHERE file_path = ?", (file_data["file_path"],))
+        ids = {row["name"]: row["id"] for row in await cursor.fetchall()}
+        for rel in file_data["relationships"]:
+            await cursor.execute(
+                "INSERT OR IGNORE INTO relationships (source_id, target_id, type) VALUES (?, ?, ?)",
+                (ids[rel["source"]], ids[rel["target"]], rel["type"])
+            )
+    await repo.conn.commit()
+
+
+async def _run_legacy(db_path: str, files) -> float:
+    repo = SQLiteGraphRepository(db_path=db_path)
+    await repo.initialize()
+    await repo.conn.execute("PRAGMA journal_mode = DELETE;")
+    await repo.conn.execute("PRAGMA synchronous = FULL;")
+    await repo.conn.execute("PRAGMA cache_size = -2000;")
+    await repo.conn.execute("PRAGMA mmap_size = 0;")
+    started_at = time.perf_counter()
+    for file_data in files:
+        await _legacy_write(repo, file_data)
+    elapsed = time.perf_counter() - started_at
+    await repo.close()
+    return elapsed
+
+
+async def _run_bulk(db_path: str, files, batch_files: int) -> float:
+    repo = SQLiteGraphRepository(db_path=db_path)
+    await repo.initialize()
+    started_at = time.perf_counter()
+    for i in range(0, len(files), batch_files):
+        await repo.add_code_structures(files[i:i + batch_files])
+    elapsed = time.perf_counter() - started_at
+    await repo.close()
+    return elapsed
+
+
+async def run(n_files: int, entities_per_file: int, edges_per_entity: int, batch_files: int, db_dir: str) -> None:
+    files = _make_files(n_files, entities_per_file, edges_per_entity)
+    n_entities = n_files * entities_per_file
+    n_edges = n_entities * edges_per_entity
+    print(f"{n_files} fichiers, {n_entities} entités, {n_edges} relations")
+
+    with tempfile.TemporaryDirectory(dir=db_dir) as tmp:
+        for name, runner in (
+            ("execute par ligne, pragmas par défaut", lambda path: _run_legacy(path, files)),
+            ("executemany + WAL/NORMAL/cache/mmap", lambda path: _run_bulk(path, files, batch_files)),
+        ):
+            path = os.path.join(tmp, f"{len(name)}.sqlite")
+            elapsed = await runner(path)
+            print(
+                f"  {name:<40} {elapsed:8.2f} s  "
+                f"{n_entities / elapsed:10.0f} entités/s  {n_edges / elapsed:10.0f} relations/s"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=1000)
+    parser.add_argument("--entities-per-file", type=int, default=100)
+    parser.add_argument("--edges-per-entity", type=int, default=2)
+    parser.add_argument("--batch-files", type=int, default=50, help="Fichiers par transaction (nouveau chemin).")
+    parser.add_argument("--db-dir", default=None, help="Répertoire des bases temporaires.")
+    args = parser.parse_args()
+    asyncio.run(run(args.files, args.entities_per_file, args.edges_per_entity, args.batch_files, args.db_dir))
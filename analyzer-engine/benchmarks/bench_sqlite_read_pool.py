@@ -0,0 +1,96 @@
+# FICHIER: analyzer-engine/benchmarks/bench_sqlite_read_pool.py
+"""
+Latence des requêtes du graphe pendant une ingestion : une tâche écrit des lots de
+`--batch-files` fichiers en continu, pendant que `--readers` tâches enchaînent des
+`find_entity_relationships` et `get_neighborhood` sur une base préremplie de `--files` fichiers.
+
+Deux configurations sont comparées, chacune sur une base neuve :
+- sans pool (`read_pool_size=0`) : les requêtes attendent derrière les transactions d'écriture,
+  dans la file de l'unique thread aiosqlite ;
+- avec pool (`--pool-size` connexions en lecture seule, WAL) : elles s'exécutent en parallèle.
+
+Usage:
+    python -m benchmarks.bench_sqlite_read_pool [--files 1000] [--entities-per-file 100]
+        [--batch-files 50] [--readers 8] [--duration 5] [--pool-size 4] [--db-dir /tmp]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from ingestion.metrics import LatencyRecorder
+from ingestion.storage.repositories.sqlite_graph_repository import SQLiteGraphRepository
+
+
+def _make_file(f: int, entities_per_file: int, prefix: str = "module"):
+    names = [f"{prefix}_{f}_function_{i}" for i in range(entities_per_file)]
+    return {
+        "file_path": f"src/{prefix}_{f}.py",
+        "entities": [{"name": name, "type": "FUNCTION", "source_code": f"def {name}(): pass"} for name in names],
+        "relationships": [
+            {"source": names[i], "target": names[(i + 1) % entities_per_file], "type": "CALLS"}
+            for i in range(entities_per_file)
+        ],
+    }
+
+
+async def _run(db_path: str, pool_size: int, n_files: int, entities_per_file: int, batch_files: int, n_readers: int, duration: float):
+    repo = SQLiteGraphRepository(db_path=db_path, read_pool_size=pool_size)
+    await repo.initialize()
+    files = [_make_file(f, entities_per_file) for f in range(n_files)]
+    for i in range(0, n_files, batch_files):
+        await repo.add_code_structures(files[i:i + batch_files])
+
+    latency = LatencyRecorder()
+    written = 0
+    deadline = time.perf_counter() + duration
+
+    async def ingest():
+        nonlocal written
+        f = 0
+        while time.perf_counter() < deadline:
+            await repo.add_code_structures([_make_file(f + i, entities_per_file, "new") for i in range(batch_files)])
+            f += batch_files
+            written += batch_files * entities_per_file
+
+    async def query(worker: int):
+        q = worker
+        while time.perf_counter() < deadline:
+            name = f"module_{q % n_files}_function_{q % entities_per_file}"
+            with latency.time():
+                await repo.find_entity_relationships(name)
+                await repo.get_neighborhood(name, max_depth=2)
+            q += n_readers
+
+    try:
+        await asyncio.gather(ingest(), *(query(w) for w in range(n_readers)))
+        return latency.snapshot(), written / duration, repo.stats()
+    finally:
+        await repo.close()
+
+
+async def run(n_files: int, entities_per_file: int, batch_files: int, n_readers: int, duration: float, pool_size: int, db_dir: str) -> None:
+    print(f"{n_files * entities_per_file} entités préremplies, {n_readers} lecteurs, {duration:.0f} s par configuration")
+    with tempfile.TemporaryDirectory(dir=db_dir) as tmp:
+        for name, size in (("sans pool", 0), (f"pool de {pool_size} lecteurs", pool_size)):
+            stats, throughput, repo_stats = await _run(
+                os.path.join(tmp, f"{size}.sqlite"), size, n_files, entities_per_file, batch_files, n_readers, duration
+            )
+            print(
+                f"  {name:<20} requêtes {stats['count']:6d}  p50 {stats['p50_ms']:8.2f} ms  p99 {stats['p99_ms']:8.2f} ms  "
+                f"ingestion {throughput:8.0f} entités/s  attente lecteur p99 {repo_stats['read_wait']['p99_ms']:.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=1000)
+    parser.add_argument("--entities-per-file", type=int, default=100)
+    parser.add_argument("--batch-files", type=int, default=50, help="Fichiers par transaction d'ingestion.")
+    parser.add_argument("--readers", type=int, default=8, help="Tâches de requêtes concurrentes.")
+    parser.add_argument("--duration", type=float, default=5.0, help="Durée de chaque configuration (s).")
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--db-dir", default=None, help="Répertoire des bases temporaires.")
+    args = parser.parse_args()
+    asyncio.run(run(args.files, args.entities_per_file, args.batch_files, args.readers, args.duration, args.pool_size, args.db_dir))
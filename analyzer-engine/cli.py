@@ -3,21 +3,33 @@ import asyncio
 import logging
 import argparse
 import os
+from typing import List
 
 # NOUVEAUX IMPORTS STRATÉGIQUES
 from plugins.loader import load_plugins
 from ingestion.orchestration.pipeline_director import PipelineDirector
+from ingestion.embedder import create_embedder
+from ingestion.reembed import ReembeddingWorker
+from ingestion.storage.repositories import create_vector_repository
 
 # Configuration du logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
-async def run_ingestion(file_path: str):
+async def run_ingestion(file_paths: List[str]):
     """
-    Fonction principale pour lancer le pipeline d'ingestion sur un fichier spécifique.
+    Fonction principale pour lancer le pipeline d'ingestion sur un ou plusieurs fichiers.
+    Les écritures sont regroupées par le StorageStage et vidées à la fermeture du pipeline.
     """
     director = PipelineDirector()
-    
+    try:
+        for file_path in file_paths:
+            await _ingest_file(director, file_path)
+    finally:
+        await director.close()
+
+
+async def _ingest_file(director: PipelineDirector, file_path: str):
     if not os.path.exists(file_path):
         logger.error(f"Fichier cible introuvable : {file_path}")
         return
@@ -41,6 +53,23 @@ async def run_ingestion(file_path: str):
     logger.info(f"Ingestion terminée pour le fichier {file_path}.")
 
 
+async def run_reembed(batch_size: int, max_attempts: int, watch: bool, interval: float):
+    """
+    Ré-génère les embeddings des chunks dont l'ingestion a échoué (file des échecs),
+    et met à jour leurs vecteurs en place.
+    """
+    repository = create_vector_repository()
+    await repository.initialize()
+    embedder = create_embedder()
+    try:
+        worker = ReembeddingWorker(repository, embedder, batch_size=batch_size, max_attempts=max_attempts)
+        report = await worker.run(watch=watch, interval=interval)
+        logger.info(f"Ré-embedding terminé : {report.as_dict()}")
+    finally:
+        embedder.close()
+        await repository.close()
+
+
 async def main():
     """Point d'entrée principal du CLI."""
     
@@ -58,13 +87,22 @@ async def main():
     subparsers = parser.add_subparsers(dest="command", required=True)
 
     # Création de la sous-commande 'ingest'
-    ingest_parser = subparsers.add_parser("ingest", help="Lancer le pipeline d'ingestion sur un fichier.")
-    ingest_parser.add_argument("file", type=str, help="Le chemin vers le fichier à analyser.")
+    ingest_parser = subparsers.add_parser("ingest", help="Lancer le pipeline d'ingestion sur un ou plusieurs fichiers.")
+    ingest_parser.add_argument("files", type=str, nargs="+", help="Les chemins des fichiers à analyser.")
+
+    # Création de la sous-commande 'reembed'
+    reembed_parser = subparsers.add_parser("reembed", help="Ré-générer les embeddings des chunks en échec.")
+    reembed_parser.add_argument("--batch-size", type=int, default=100, help="Nombre de chunks traités par passe.")
+    reembed_parser.add_argument("--max-attempts", type=int, default=5, help="Nombre maximal de tentatives par chunk.")
+    reembed_parser.add_argument("--watch", action="store_true", help="Continuer à surveiller la file une fois vidée.")
+    reembed_parser.add_argument("--interval", type=float, default=30.0, help="Intervalle de surveillance en secondes (--watch).")
 
     args = parser.parse_args()
 
     if args.command == "ingest":
-        await run_ingestion(args.file)
+        await run_ingestion(args.files)
+    elif args.command == "reembed":
+        await run_reembed(args.batch_size, args.max_attempts, args.watch, args.interval)
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -1,6 +1,6 @@
 # FICHIER: analyzer-engine/core/contracts/repository_contract.py
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 class ICodeRepository(ABC):
     """
@@ -19,14 +19,84 @@ class ICodeRepository(ABC):
         pass
 
     @abstractmethod
-    async def add_code_structure(self, file_data: Dict[str, Any]) -> Dict[str, int]:
-        """Ajoute les entités (nœuds) et relations (arêtes) d'un fichier au graphe."""
+    async def add_code_structure(self, file_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Ajoute les entités (nœuds) et relations (arêtes) d'un fichier au graphe. Réingérer un fichier
+        remplace son graphe : ce qui n'y figure plus est supprimé. Retourne les compteurs
+        `entities_added`, `entities_updated`, `entities_removed`, `relations_added` et `relations_removed`,
+        plus `blob_hash` si le texte du fichier (`source_code`) est conservé dans le store de blobs.
+        """
+        pass
+
+    @abstractmethod
+    async def add_code_structures(self, files_data: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Ajoute les structures de plusieurs fichiers en une seule transaction, avec isolation
+        des erreurs par fichier. Retourne le résultat par `file_path` ('error' si le fichier a échoué).
+        """
         pass
 
     @abstractmethod
-    async def find_entity_relationships(self, entity_name: str) -> List[Dict[str, Any]]:
+    async def find_entity_relationships(self, entity_name: str, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
         """
-        Recherche une entité par son nom et retourne toutes ses relations directes.
+        Recherche les entités dont le nom contient `entity_name` et retourne leurs relations
+        directes, sans doublon, les correspondances exactes puis les préfixes en premier.
+        Les résultats sont paginés par `limit` / `offset`.
         C'est le remplaçant direct de la fonction `search_code_graph`.
         """
-        pass
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    async def get_neighborhood(
+        self,
+        entity_name: str,
+        max_depth: int = 2,
+        direction: str = "both",
+        relationship_types: Optional[List[str]] = None,
+        max_fan_out: int = 200,
+        max_nodes: int = 500,
+        file_path: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Retourne les entités atteignables en au plus `max_depth` relations, avec leur distance
+        (`depth`). Lève EntityNotFoundError si l'entité de départ n'existe pas.
+        """
+        pass
+
+    @abstractmethod
+    async def find_shortest_path(
+        self,
+        source_name: str,
+        target_name: str,
+        max_depth: int = 6,
+        relationship_types: Optional[List[str]] = None,
+        directed: bool = True,
+        max_fan_out: int = 200,
+        max_visited: int = 100_000
+    ) -> List[Dict[str, str]]:
+        """
+        Retourne les relations du plus court chemin entre deux entités, ou [] s'il n'y en a pas.
+        Lève TraversalLimitError si le parcours atteint `max_visited` sans trouver de chemin.
+        """
+        pass
+
+    @abstractmethod
+    async def get_call_tree(
+        self,
+        entity_name: str,
+        direction: str = "callees",
+        max_depth: int = 3,
+        max_fan_out: int = 200,
+        max_nodes: int = 500,
+        file_path: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Retourne l'arbre des appelés ("callees") ou des appelants ("callers") d'une entité."""
+        pass
+
+    @abstractmethod
+    async def get_entity_source(self, entity_name: str, file_path: str) -> Optional[str]:
+        """
+        Retourne le code source d'une entité (EntityNotFoundError si le fichier n'en contient pas,
+        None si aucun graphe n'est stocké pour ce fichier dans un store partitionné).
+        """
+        pass
@@ -1,7 +1,7 @@
 # FICHIER: analyzer-engine/core/contracts/vector_repository_contract.py
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
-from ..models.db import ChunkResult, DocumentMetadata
+from typing import List, Dict, Any, Optional, Sequence
+from ..models.db import ChunkResult, DocumentMetadata, DocumentPage
 
 class IVectorRepository(ABC):
     """
@@ -20,12 +20,16 @@ class IVectorRepository(ABC):
         pass
 
     @abstractmethod
-    async def vector_search(self, embedding: List[float], limit: int) -> List[ChunkResult]:
-        """Effectue une recherche par similarité vectorielle."""
+    async def vector_search(self, embedding: Sequence[float], limit: int, ef_search: Optional[int] = None, probes: Optional[int] = None) -> List[ChunkResult]:
+        """
+        Effectue une recherche par similarité vectorielle.
+        `ef_search` / `probes` règlent, pour cette requête, le compromis rappel/latence de
+        l'index approximatif (HNSW / IVF) ; ignorés par les implémentations sans tel index.
+        """
         pass
 
     @abstractmethod
-    async def hybrid_search(self, embedding: List[float], query_text: str, limit: int, text_weight: float) -> List[ChunkResult]:
+    async def hybrid_search(self, embedding: Sequence[float], query_text: str, limit: int, text_weight: float, ef_search: Optional[int] = None, probes: Optional[int] = None) -> List[ChunkResult]:
         """Effectue une recherche hybride (vecteur + texte)."""
         pass
     
@@ -39,12 +43,59 @@ class IVectorRepository(ABC):
         """Liste les documents disponibles avec leurs métadonnées."""
         pass
     
+    @abstractmethod
+    async def list_documents_page(self, limit: int, cursor: Optional[str] = None) -> DocumentPage:
+        """
+        Liste les documents du plus récent au plus ancien, par pagination sur curseur.
+        Passer le `next_cursor` de la page précédente pour obtenir la suivante.
+        """
+        pass
+
     @abstractmethod
     async def get_document_chunks(self, document_id: str) -> List[Dict[str, Any]]:
         """Récupère tous les chunks pour un document donné."""
         pass
 
     @abstractmethod
-    async def save_document_with_chunks(self, file_path: str, document_content: str, chunks: List[Dict[str, Any]], document_metadata: Dict[str, Any]) -> int:
-        """Sauvegarde un document et tous ses chunks de manière atomique."""
-        pass
\ No newline at end of file
+    async def get_chunks(self, chunk_ids: List[str]) -> List[ChunkResult]:
+        """
+        Récupère des chunks par leurs IDs (score à 0), dans l'ordre demandé ; les IDs inconnus
+        sont ignorés. Sert à compléter les résultats d'un index externe (ex: index lexical).
+        """
+        pass
+
+    @abstractmethod
+    async def save_document_with_chunks(self, file_path: str, document_content: str, chunks: List[Dict[str, Any]], document_metadata: Dict[str, Any], content_hash: Optional[str] = None) -> int:
+        """
+        Sauvegarde un document et tous ses chunks de manière atomique, de façon idempotente.
+        Le document est identifié par sa source (`file_path`) : si `content_hash` est inchangé,
+        l'appel est sans effet et retourne 0 ; sinon ses chunks sont remplacés.
+        """
+        pass
+
+    @abstractmethod
+    async def save_documents_with_chunks(self, documents: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Sauvegarde plusieurs documents (mêmes clés que les arguments de `save_document_with_chunks`)
+        en une seule transaction, avec isolation des erreurs par document.
+        Retourne le résultat par `file_path` ('chunks_saved', et 'error' si le document a échoué).
+        """
+        pass
+
+    @abstractmethod
+    async def get_pending_reembeds(self, limit: int, max_attempts: int) -> List[Dict[str, Any]]:
+        """
+        Liste les chunks en attente de ré-embedding (file des échecs), les moins tentés d'abord.
+        Chaque entrée contient au moins 'chunk_id', 'content', 'token_count' et 'attempts'.
+        """
+        pass
+
+    @abstractmethod
+    async def update_chunk_embeddings(self, embeddings: Dict[str, Sequence[float]]) -> int:
+        """Met à jour en place les vecteurs des chunks donnés (id -> vecteur) et les retire de la file."""
+        pass
+
+    @abstractmethod
+    async def record_reembed_failures(self, chunk_ids: List[str], error: str) -> None:
+        """Enregistre une nouvelle tentative de ré-embedding échouée pour les chunks donnés."""
+        pass
@@ -7,4 +7,18 @@ class EntityNotFoundError(RepositoryError):
     """Levée lorsqu'une entité n'est pas trouvée dans le repository."""
     def __init__(self, entity_name: str):
         super().__init__(f"Entity '{entity_name}' not found.")
-        self.entity_name = entity_name
\ No newline at end of file
+        self.entity_name = entity_name
+
+class EmbeddingProviderError(Exception):
+    """Exception de base pour les erreurs remontées par un fournisseur d'embeddings."""
+    pass
+
+class RateLimitExceededError(EmbeddingProviderError):
+    """Levée lorsque le fournisseur refuse une requête pour dépassement de quota (HTTP 429)."""
+    def __init__(self, message: str = "Rate limit exceeded", retry_after: float | None = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class TraversalLimitError(RepositoryError):
+    """Levée lorsqu'un parcours du graphe atteint sa borne d'exploration sans résultat concluant."""
+    pass
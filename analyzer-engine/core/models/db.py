@@ -12,6 +12,11 @@ class DocumentMetadata(BaseModel):
     updated_at: datetime
     chunk_count: Optional[int] = None
 
+class DocumentPage(BaseModel):
+    """Une page de documents ; `next_cursor` (opaque) est None sur la dernière page."""
+    documents: List[DocumentMetadata]
+    next_cursor: Optional[str] = None
+
 class ChunkResult(BaseModel):
     chunk_id: str
     document_id: str
@@ -0,0 +1,100 @@
+"""
+Token-budget-aware packing of embedding requests.
+
+Batches are filled by estimated token count rather than by a fixed number of
+texts, so that one batch never exceeds the provider's per-request limits and
+small chunks are grouped into few round-trips.
+"""
+
+from dataclasses import dataclass
+from typing import List, Sequence
+
+# Same heuristic as DocumentChunk.token_count (~4 characters per token).
+CHARS_PER_TOKEN = 4
+
+
+@dataclass(frozen=True)
+class BatchLimits:
+    """Per-request limits of an embedding provider."""
+    max_batch_size: int
+    max_tokens_per_request: int
+    max_tokens_per_input: int
+
+
+# Used for providers that do not declare a `batch_limits` attribute.
+DEFAULT_BATCH_LIMITS = BatchLimits(max_batch_size=100, max_tokens_per_request=100_000, max_tokens_per_input=8_000)
+
+
+@dataclass
+class PackingReport:
+    """Summary of how well a set of batches used the provider limits."""
+    batches: int
+    items: int
+    tokens: int
+    truncated_items: int
+    token_budget: int
+
+    @property
+    def fill_efficiency(self) -> float:
+        """Share of the available token budget (batches x max tokens) actually used."""
+        capacity = self.batches * self.token_budget
+        return self.tokens / capacity if capacity else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "tokens": self.tokens,
+            "truncated_items": self.truncated_items,
+            "fill_efficiency": round(self.fill_efficiency, 4),
+        }
+
+
+def truncate_to_token_limit(text: str, max_tokens: int) -> str:
+    """
+    Truncate a text so that its estimated token count fits `max_tokens`.
+
+    The cut is made on the character budget and moved back to the last
+    newline when one exists in the final tenth, so code is cut between lines.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind("\n", int(max_chars * 0.9), max_chars)
+    return text[:cut if cut > 0 else max_chars]
+
+
+def pack_batches(token_counts: Sequence[int], limits: BatchLimits) -> List[List[int]]:
+    """
+    Pack items into batches that respect the batch size and token limits.
+
+    Items are taken in order (next-fit), which keeps neighbouring chunks of a
+    file together and makes the packing deterministic. Token counts larger
+    than `max_tokens_per_input` are counted at that limit, since such inputs
+    are truncated before being sent.
+
+    Args:
+        token_counts: Estimated token count of each item.
+        limits: Provider limits to respect.
+
+    Returns:
+        A list of batches, each being a list of item indexes.
+    """
+    batches: List[List[int]] = []
+    current: List[int] = []
+    current_tokens = 0
+
+    for index, tokens in enumerate(token_counts):
+        tokens = max(1, min(tokens, limits.max_tokens_per_input))
+        if current and (
+            len(current) >= limits.max_batch_size
+            or current_tokens + tokens > limits.max_tokens_per_request
+        ):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(index)
+        current_tokens += tokens
+
+    if current:
+        batches.append(current)
+    return batches
@@ -8,9 +8,12 @@ import os
 import re
 import logging
 from typing import List, Dict, Any, Optional, Tuple
-from dataclasses import dataclass
+from dataclasses import dataclass, field, fields
+from uuid import uuid4
 import asyncio
 
+import numpy as np
+
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -39,7 +42,11 @@ class DocumentChunk:
     end_char: int
     metadata: Dict[str, Any]
     token_count: Optional[int] = None
-    embedding: Optional[List[float]] = None # Add embedding field here
+    # Contiguous float32 vector (4 bytes per dimension), as returned by the providers.
+    embedding: Optional[np.ndarray] = None
+    # Assigned client-side so that a chunk can be referenced (dead letters, re-embedding)
+    # without a round-trip to read back the generated key.
+    id: str = field(default_factory=lambda: str(uuid4()))
     
     def __post_init__(self):
         """Calculate token count if not provided."""
@@ -47,6 +54,14 @@ class DocumentChunk:
             # Rough estimation: ~4 characters per token
             self.token_count = len(self.content) // 4
 
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Shallow dict view of the chunk.
+        Unlike `dataclasses.asdict`, the metadata and the embedding buffer are
+        shared, not deep-copied.
+        """
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
 class SemanticChunker:
     """Semantic document chunker using LLM for intelligent splitting."""
     
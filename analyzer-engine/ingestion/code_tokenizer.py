@@ -0,0 +1,53 @@
+"""
+Code-aware tokenization.
+
+Source code identifiers carry several words (`getUserById`, `snake_case_names`,
+`HTTPServerError`). Generic tokenizers keep them whole, so a search for "user"
+never matches `getUserById`. This tokenizer emits both the full identifier and
+its sub-words, all lowercased.
+"""
+
+import re
+from typing import Iterator, List
+
+# Identifiers and numbers; everything else (operators, punctuation) is a separator.
+_WORD_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|\d+")
+# camelCase / PascalCase / acronym boundaries: "HTTPServerError" -> HTTP, Server, Error
+_CAMEL_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z]|\d|\b)|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+MIN_TOKEN_LENGTH = 2
+
+
+def split_identifier(identifier: str) -> List[str]:
+    """
+    Split an identifier on underscores and camelCase boundaries.
+
+    Example: "parse_HTTPResponse2" -> ["parse", "http", "response", "2"]
+    """
+    parts: List[str] = []
+    for piece in identifier.split("_"):
+        if piece:
+            parts.extend(match.lower() for match in _CAMEL_RE.findall(piece))
+    return parts
+
+
+def iter_code_tokens(text: str) -> Iterator[str]:
+    """
+    Yield the tokens of a text: every identifier lowercased, followed by its
+    sub-words when it has more than one.
+    """
+    for match in _WORD_RE.finditer(text):
+        word = match.group()
+        lowered = word.lower().strip("_")
+        if len(lowered) >= MIN_TOKEN_LENGTH:
+            yield lowered
+        parts = split_identifier(word)
+        if len(parts) > 1:
+            for part in parts:
+                if len(part) >= MIN_TOKEN_LENGTH:
+                    yield part
+
+
+def tokenize_code(text: str) -> List[str]:
+    """Return the list of code-aware tokens of a text (see `iter_code_tokens`)."""
+    return list(iter_code_tokens(text))
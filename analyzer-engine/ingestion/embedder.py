@@ -5,13 +5,22 @@ This module is responsible for converting text chunks into vector embeddings.
 
 import asyncio
 import logging
+import time
 from typing import List, Optional
 from datetime import datetime
 import os
 
+import numpy as np
 from dotenv import load_dotenv
 
 from .chunker import DocumentChunk
+from .embedding_cache import EmbeddingCache, content_hash, create_embedding_cache
+from .batching import (
+    DEFAULT_BATCH_LIMITS, BatchLimits, PackingReport, pack_batches, truncate_to_token_limit
+)
+from .rate_limiting import AdaptiveConcurrencyLimiter, RateLimiter, is_rate_limit_error
+from .query_coalescer import QueryCoalescer
+from .metrics import LatencyRecorder
 
 # Import the new flexible provider factory
 try:
@@ -35,21 +44,81 @@ class EmbeddingGenerator:
         self,
         batch_size: int = 100,
         max_retries: int = 3,
-        retry_delay: float = 1.0
+        retry_delay: float = 1.0,
+        provider: Optional[EmbeddingProvider] = None,
+        cache: Optional[EmbeddingCache] = None,
+        use_cache: bool = True,
+        max_concurrency: Optional[int] = None,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        query_batch_window_ms: Optional[float] = None,
+        query_max_batch_size: Optional[int] = None
     ):
         """
         Initialize embedding generator.
         
         Args:
-            batch_size: Number of texts to process in parallel.
+            batch_size: Maximum number of texts per request. Batches are packed by token
+                count, within this bound and the provider's `batch_limits`.
             max_retries: Maximum number of retry attempts for failed API calls.
             retry_delay: Delay between retries in seconds.
+            provider: Embedding provider to use. Defaults to the one configured by `get_embedder`.
+            cache: Embedding cache to use. Defaults to the one configured by `create_embedding_cache`.
+            use_cache: Set to False to bypass the embedding cache entirely.
+            max_concurrency: Upper bound of batches in flight (env EMBEDDING_MAX_CONCURRENCY, default 8).
+                The effective limit adapts between 1 and this value.
+            requests_per_minute: Provider request budget (env EMBEDDING_REQUESTS_PER_MINUTE, unlimited if unset).
+            tokens_per_minute: Provider token budget (env EMBEDDING_TOKENS_PER_MINUTE, unlimited if unset).
+            query_batch_window_ms: Window during which concurrent `embed_query` calls are coalesced
+                into one batch request (env EMBEDDING_QUERY_BATCH_WINDOW_MS, default 3; 0 disables).
+            query_max_batch_size: Maximum queries per coalesced request (env EMBEDDING_QUERY_MAX_BATCH_SIZE, default 32).
         """
-        self.provider: EmbeddingProvider = get_embedder()
+        self.provider: EmbeddingProvider = provider or get_embedder()
         self.batch_size = batch_size
         self.max_retries = max_retries
         self.retry_delay = retry_delay
         self.dimension = self.provider.get_embedding_dimension()
+        self.model_name = getattr(self.provider, "model_name", None) or os.getenv("EMBEDDING_MODEL", "unknown")
+        
+        if cache is None and use_cache:
+            cache = create_embedding_cache(
+                provider=self.provider.__class__.__name__,
+                model=self.model_name,
+                dimension=self.dimension
+            )
+        self.cache: Optional[EmbeddingCache] = cache if use_cache else None
+        
+        max_concurrency = max_concurrency or int(os.getenv("EMBEDDING_MAX_CONCURRENCY") or 8)
+        self.concurrency = AdaptiveConcurrencyLimiter(
+            initial_limit=min(4, max_concurrency),
+            max_limit=max_concurrency
+        )
+        requests_per_minute = requests_per_minute or float(os.getenv("EMBEDDING_REQUESTS_PER_MINUTE") or 0)
+        tokens_per_minute = tokens_per_minute or float(os.getenv("EMBEDDING_TOKENS_PER_MINUTE") or 0)
+        provider_limits: BatchLimits = getattr(self.provider, "batch_limits", DEFAULT_BATCH_LIMITS)
+        self.batch_limits = BatchLimits(
+            max_batch_size=min(batch_size, provider_limits.max_batch_size),
+            max_tokens_per_request=provider_limits.max_tokens_per_request,
+            max_tokens_per_input=provider_limits.max_tokens_per_input
+        )
+        self.last_packing_report: Optional[PackingReport] = None
+        
+        self.rate_limiter: Optional[RateLimiter] = (
+            RateLimiter(requests_per_minute, tokens_per_minute)
+            if requests_per_minute or tokens_per_minute else None
+        )
+        
+        if query_batch_window_ms is None:
+            query_batch_window_ms = float(os.getenv("EMBEDDING_QUERY_BATCH_WINDOW_MS") or 3.0)
+        query_max_batch_size = min(
+            query_max_batch_size or int(os.getenv("EMBEDDING_QUERY_MAX_BATCH_SIZE") or 32),
+            self.batch_limits.max_batch_size
+        )
+        self.query_coalescer: Optional[QueryCoalescer] = (
+            QueryCoalescer(self.provider, window_ms=query_batch_window_ms, max_batch_size=query_max_batch_size)
+            if query_batch_window_ms > 0 else None
+        )
+        self.query_latency = LatencyRecorder()
         
         logger.info(
             f"EmbeddingGenerator initialized with provider: {self.provider.__class__.__name__} "
@@ -69,54 +138,158 @@ class EmbeddingGenerator:
             progress_callback: Optional callback for progress updates.
         
         Returns:
-            The same list of chunks with the `embedding` attribute populated.
+            The same list of chunks with the `embedding` attribute populated. Chunks whose
+            batch failed after all retries keep `embedding=None` and an `embedding_error` entry
+            in their metadata.
         """
         if not chunks:
             return []
         
         logger.info(f"Generating embeddings for {len(chunks)} chunks...")
         
-        total_batches = (len(chunks) + self.batch_size - 1) // self.batch_size
+        # Only cache misses are sent to the provider.
+        pending = self._attach_cached_embeddings(chunks)
+        if not pending:
+            logger.info(f"All {len(chunks)} embeddings served from cache.")
+            return chunks
         
-        for i in range(0, len(chunks), self.batch_size):
-            batch_chunks = chunks[i:i + self.batch_size]
-            batch_texts = [chunk.content for chunk in batch_chunks]
-            
-            current_batch_num = (i // self.batch_size) + 1
-            logger.info(f"Processing batch {current_batch_num}/{total_batches}")
-
-            for attempt in range(self.max_retries):
-                try:
-                    embeddings = await self.provider.generate_embeddings_batch(batch_texts)
-                    
-                    # Attach embeddings to their corresponding chunks
-                    for chunk, embedding in zip(batch_chunks, embeddings):
-                        chunk.embedding = embedding
-                        chunk.metadata["embedding_model"] = os.getenv("EMBEDDING_MODEL")
-                        chunk.metadata["embedding_generated_at"] = datetime.now().isoformat()
-                    
-                    if progress_callback:
-                        progress_callback(current_batch_num, total_batches)
-                    
-                    break  # Success, exit retry loop
-
-                except Exception as e:
-                    logger.error(f"Failed to process batch {current_batch_num} on attempt {attempt + 1}: {e}")
-                    if attempt == self.max_retries - 1:
-                        logger.error(f"Batch {current_batch_num} failed after all retries. Filling with zero vectors.")
-                        # Fallback: fill with zero vectors on permanent failure
-                        for chunk in batch_chunks:
-                            chunk.embedding = [0.0] * self.dimension
-                            chunk.metadata["embedding_error"] = str(e)
-                    else:
-                        delay = self.retry_delay * (2 ** attempt)
-                        logger.info(f"Retrying batch in {delay:.2f} seconds...")
-                        await asyncio.sleep(delay)
+        batches = self._pack_batches(pending)
+        progress = {"completed": 0, "total": len(batches)}
+        
+        # Batches are dispatched concurrently; each one attaches its results to its own
+        # chunks, so the output order is the input order whatever the completion order.
+        await asyncio.gather(*(
+            self._embed_batch(batch_num, batch_chunks, progress, progress_callback)
+            for batch_num, batch_chunks in enumerate(batches, start=1)
+        ))
         
         logger.info(f"Finished generating embeddings for {len(chunks)} chunks.")
+        if self.cache is not None:
+            logger.info(f"Embedding cache stats: {self.cache.stats.as_dict()}")
         return chunks
 
-    async def embed_query(self, query: str) -> List[float]:
+    async def _embed_batch(
+        self,
+        batch_num: int,
+        batch_chunks: List[DocumentChunk],
+        progress: dict,
+        progress_callback: Optional[callable] = None
+    ) -> None:
+        """
+        Embed one batch under the rate limiter and the adaptive concurrency limiter,
+        retrying with exponential backoff.
+        """
+        max_input_tokens = self.batch_limits.max_tokens_per_input
+        batch_texts = [truncate_to_token_limit(chunk.content, max_input_tokens) for chunk in batch_chunks]
+        batch_tokens = sum(min(chunk.token_count or 0, max_input_tokens) for chunk in batch_chunks)
+        total_batches = progress["total"]
+        
+        for attempt in range(self.max_retries):
+            try:
+                async with self.concurrency.slot():
+                    if self.rate_limiter:
+                        await self.rate_limiter.acquire(batch_tokens)
+                    logger.info(f"Processing batch {batch_num}/{total_batches} (concurrency limit: {self.concurrency.limit})")
+                    started_at = time.perf_counter()
+                    embeddings = await self.provider.generate_embeddings_batch(batch_texts)
+                    self.concurrency.record_success(time.perf_counter() - started_at)
+                
+                # Attach embeddings to their corresponding chunks
+                for chunk, embedding in zip(batch_chunks, embeddings):
+                    chunk.embedding = embedding
+                    chunk.metadata["embedding_model"] = self.model_name
+                    chunk.metadata["embedding_generated_at"] = datetime.now().isoformat()
+                    if (chunk.token_count or 0) > max_input_tokens:
+                        chunk.metadata["embedding_truncated"] = True
+                
+                # Cache entries are keyed on the full content: truncation is deterministic.
+                self._store_in_cache([chunk.content for chunk in batch_chunks], embeddings)
+                
+                progress["completed"] += 1
+                if progress_callback:
+                    progress_callback(progress["completed"], total_batches)
+                return
+
+            except Exception as e:
+                rate_limited = is_rate_limit_error(e)
+                if rate_limited:
+                    self.concurrency.record_throttle()
+                logger.error(f"Failed to process batch {batch_num} on attempt {attempt + 1}: {e}")
+                if attempt == self.max_retries - 1:
+                    logger.error(f"Batch {batch_num} failed after all retries. Chunks left without embedding.")
+                    # No zero-vector fallback: the chunks are stored without embedding and
+                    # dead-lettered by the repository, then repaired by the `reembed` command.
+                    for chunk in batch_chunks:
+                        chunk.embedding = None
+                        chunk.metadata["embedding_error"] = str(e)
+                else:
+                    delay = self.retry_delay * (2 ** attempt)
+                    if rate_limited and getattr(e, "retry_after", None):
+                        delay = max(delay, e.retry_after)
+                    logger.info(f"Retrying batch in {delay:.2f} seconds...")
+                    await asyncio.sleep(delay)
+
+    def _pack_batches(self, chunks: List[DocumentChunk]) -> List[List[DocumentChunk]]:
+        """
+        Pack chunks into batches by estimated token count against the provider limits.
+        
+        Returns:
+            The batches of chunks, in input order.
+        """
+        token_counts = [chunk.token_count or 0 for chunk in chunks]
+        batches = [[chunks[i] for i in indexes] for indexes in pack_batches(token_counts, self.batch_limits)]
+        
+        truncated = sum(1 for tokens in token_counts if tokens > self.batch_limits.max_tokens_per_input)
+        self.last_packing_report = PackingReport(
+            batches=len(batches),
+            items=len(chunks),
+            tokens=sum(min(tokens, self.batch_limits.max_tokens_per_input) for tokens in token_counts),
+            truncated_items=truncated,
+            token_budget=self.batch_limits.max_tokens_per_request
+        )
+        logger.info(f"Batch packing: {self.last_packing_report.as_dict()}")
+        if truncated:
+            logger.warning(
+                f"{truncated} chunk(s) exceed {self.batch_limits.max_tokens_per_input} tokens "
+                f"and will be truncated for embedding."
+            )
+        return batches
+
+    def _attach_cached_embeddings(self, chunks: List[DocumentChunk]) -> List[DocumentChunk]:
+        """
+        Attach cached embeddings to the chunks that have one.
+        
+        Returns:
+            The chunks that still need to be embedded by the provider.
+        """
+        if self.cache is None:
+            return list(chunks)
+        
+        hashes = [content_hash(chunk.content) for chunk in chunks]
+        cached = self.cache.get_many(hashes)
+        
+        pending = []
+        for chunk, digest in zip(chunks, hashes):
+            embedding = cached.get(digest)
+            if embedding is None:
+                pending.append(chunk)
+                continue
+            chunk.embedding = embedding
+            chunk.metadata["embedding_model"] = self.model_name
+            chunk.metadata["embedding_cached"] = True
+        return pending
+
+    def _store_in_cache(self, texts: List[str], embeddings: np.ndarray) -> None:
+        """Store freshly generated embeddings, skipping all-zero vectors."""
+        if self.cache is None:
+            return
+        self.cache.put_many({
+            content_hash(text): embedding
+            for text, embedding in zip(texts, embeddings)
+            if np.any(embedding)
+        })
+
+    async def embed_query(self, query: str) -> np.ndarray:
         """
         Generate an embedding for a single search query.
         
@@ -124,9 +297,39 @@ class EmbeddingGenerator:
             query: The search query text.
         
         Returns:
-            The embedding vector for the query.
+            The float32 embedding vector for the query.
+        """
+        with self.query_latency.time():
+            if self.cache is not None:
+                digest = content_hash(query)
+                cached = self.cache.get_many([digest]).get(digest)
+                if cached is not None:
+                    return cached
+            
+            if self.query_coalescer is not None:
+                embedding = await self.query_coalescer.embed(query)
+            else:
+                embedding = await self.provider.generate_embedding(query)
+            self._store_in_cache([query], [embedding])
+            return embedding
+
+    def close(self) -> None:
+        """Release the provider's resources (e.g. its thread pool) and the embedding cache."""
+        close_provider = getattr(self.provider, "close", None)
+        if callable(close_provider):
+            close_provider()
+        if self.cache is not None:
+            self.cache.close()
+
+    def query_stats(self) -> dict:
+        """
+        Latency of `embed_query` calls (p50/p99, cache hits included) and,
+        when enabled, of the coalesced provider requests.
         """
-        return await self.provider.generate_embedding(query)
+        stats = {"embed_query": self.query_latency.snapshot()}
+        if self.query_coalescer is not None:
+            stats["coalescer"] = self.query_coalescer.stats()
+        return stats
 
     def get_embedding_dimension(self) -> int:
         """
@@ -180,7 +383,7 @@ async def main():
     embedded_chunks = await embedder.embed_chunks(chunks, progress_callback)
     
     for i, chunk in enumerate(embedded_chunks):
-        embedding_preview = chunk.embedding[:5] if chunk.embedding else None
+        embedding_preview = chunk.embedding[:5] if chunk.embedding is not None else None
         print(f"Chunk {i}: {len(chunk.content)} chars, embedding dim: {len(chunk.embedding)}, preview: {embedding_preview}...")
     
     query_embedding = await embedder.embed_query("Google AI research")
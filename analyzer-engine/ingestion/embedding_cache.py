@@ -0,0 +1,264 @@
+"""
+Persistent embedding cache.
+
+Stores embedding vectors on local disk, keyed by (provider, model, dimension,
+content hash), so that unchanged texts are never sent to the provider twice.
+Vectors are kept as raw float32 blobs and evicted in LRU order once the
+configured size cap is exceeded. Access times of cache hits are buffered in
+memory and written with the next `put_many`, so lookups never commit.
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join(".jabbarroot_data", "embedding_cache.sqlite")
+DEFAULT_MAX_ENTRIES = 200_000
+
+# SQLite limits the number of host parameters per statement; stay well below it.
+_MAX_KEYS_PER_QUERY = 500
+# Buffered access times are flushed once this many hits are pending, even without writes.
+_MAX_PENDING_TOUCHES = 10_000
+
+
+def content_hash(text: str) -> str:
+    """Return the SHA-256 hex digest used to identify a text in the cache."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss counters for an EmbeddingCache instance."""
+    hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hit_rate, 4),
+        }
+
+
+class EmbeddingCache:
+    """
+    Local SQLite-backed cache of embedding vectors with LRU eviction.
+
+    Lookups and writes are plain local-disk operations (tens of microseconds),
+    so the synchronous sqlite3 driver is used directly; the connection is
+    opened lazily on first use.
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        model: str,
+        dimension: int,
+        path: str = DEFAULT_CACHE_PATH,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            provider: Name of the embedding provider (part of the cache key).
+            model: Name of the embedding model (part of the cache key).
+            dimension: Vector dimension (part of the cache key).
+            path: SQLite database file, or ":memory:" for a process-local cache.
+            max_entries: Maximum number of vectors kept before LRU eviction.
+        """
+        self.provider = provider
+        self.model = model
+        self.dimension = dimension
+        self.path = path
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pending_touches: Dict[str, float] = {}
+        # Row count of the table, read once when the connection opens and then kept up to date
+        # by writes and evictions, so that enforcing the size cap never scans the table.
+        self._row_count = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode = WAL;")
+            self._conn.execute("PRAGMA synchronous = NORMAL;")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    provider TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    dimension INTEGER NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    last_access REAL NOT NULL,
+                    PRIMARY KEY (provider, model, dimension, content_hash)
+                );
+                CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings(last_access);
+            """)
+            self._conn.commit()
+            (self._row_count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+            logger.info(f"Embedding cache opened at: {self.path}")
+        return self._conn
+
+    def get_many(self, hashes: Sequence[str]) -> Dict[str, np.ndarray]:
+        """
+        Look up vectors for the given content hashes.
+
+        Args:
+            hashes: Content hashes to look up.
+
+        Returns:
+            A mapping of content hash to float32 vector for every cache hit.
+        """
+        if not hashes:
+            return {}
+
+        conn = self._connection()
+        unique_hashes = list(dict.fromkeys(hashes))
+        found: Dict[str, np.ndarray] = {}
+
+        for i in range(0, len(unique_hashes), _MAX_KEYS_PER_QUERY):
+            batch = unique_hashes[i:i + _MAX_KEYS_PER_QUERY]
+            placeholders = ",".join("?" * len(batch))
+            rows = conn.execute(
+                f"SELECT content_hash, vector FROM embeddings "
+                f"WHERE provider = ? AND model = ? AND dimension = ? AND content_hash IN ({placeholders})",
+                (self.provider, self.model, self.dimension, *batch),
+            ).fetchall()
+            for digest, blob in rows:
+                found[digest] = np.frombuffer(blob, dtype=np.float32)
+
+        if found:
+            now = time.time()
+            self._pending_touches.update((digest, now) for digest in found)
+            if len(self._pending_touches) >= _MAX_PENDING_TOUCHES:
+                self._flush_touches(conn)
+                conn.commit()
+
+        hits = sum(1 for digest in hashes if digest in found)
+        self.stats.hits += hits
+        self.stats.misses += len(hashes) - hits
+        return found
+
+    def put_many(self, items: Dict[str, Sequence[float]]) -> None:
+        """
+        Store vectors for the given content hashes, then enforce the size cap.
+
+        Args:
+            items: A mapping of content hash to vector.
+        """
+        if not items:
+            return
+
+        conn = self._connection()
+        now = time.time()
+        replaced = len(self._existing(conn, list(items)))
+        conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (provider, model, dimension, content_hash, vector, last_access) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (self.provider, self.model, self.dimension, digest,
+                 np.asarray(vector, dtype=np.float32).tobytes(), now)
+                for digest, vector in items.items()
+            ],
+        )
+        self.stats.writes += len(items)
+        self._row_count += len(items) - replaced
+        # Pending access times must land before eviction picks the least recently used rows.
+        self._flush_touches(conn)
+        self._evict(conn)
+        conn.commit()
+
+    def _existing(self, conn: sqlite3.Connection, hashes: List[str]) -> List[str]:
+        """Return the given content hashes that already have a row (primary-key lookups)."""
+        existing: List[str] = []
+        for i in range(0, len(hashes), _MAX_KEYS_PER_QUERY):
+            batch = hashes[i:i + _MAX_KEYS_PER_QUERY]
+            placeholders = ",".join("?" * len(batch))
+            existing.extend(digest for (digest,) in conn.execute(
+                f"SELECT content_hash FROM embeddings "
+                f"WHERE provider = ? AND model = ? AND dimension = ? AND content_hash IN ({placeholders})",
+                (self.provider, self.model, self.dimension, *batch),
+            ))
+        return existing
+
+    def _flush_touches(self, conn: sqlite3.Connection) -> None:
+        """Write the buffered access times of cache hits (the caller commits)."""
+        if not self._pending_touches:
+            return
+        conn.executemany(
+            "UPDATE embeddings SET last_access = MAX(last_access, ?) "
+            "WHERE provider = ? AND model = ? AND dimension = ? AND content_hash = ?",
+            [(accessed_at, self.provider, self.model, self.dimension, digest)
+             for digest, accessed_at in self._pending_touches.items()],
+        )
+        self._pending_touches.clear()
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Delete the least recently used entries above `max_entries`."""
+        overflow = self._row_count - self.max_entries
+        if overflow <= 0:
+            return
+        conn.execute(
+            "DELETE FROM embeddings WHERE rowid IN "
+            "(SELECT rowid FROM embeddings ORDER BY last_access ASC LIMIT ?)",
+            (overflow,),
+        )
+        self._row_count -= overflow
+        self.stats.evictions += overflow
+        logger.debug(f"Embedding cache evicted {overflow} least recently used entries.")
+
+    def __len__(self) -> int:
+        (count,) = self._connection().execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        return count
+
+    def close(self) -> None:
+        """Write pending access times, then close the underlying SQLite connection."""
+        if self._conn is not None:
+            self._flush_touches(self._conn)
+            self._conn.commit()
+            self._conn.close()
+            self._conn = None
+
+
+def create_embedding_cache(provider: str, model: str, dimension: int) -> Optional[EmbeddingCache]:
+    """
+    Create the embedding cache configured by environment variables.
+
+    EMBEDDING_CACHE_ENABLED (default "true"), EMBEDDING_CACHE_PATH and
+    EMBEDDING_CACHE_MAX_ENTRIES control the cache.
+
+    Returns:
+        An EmbeddingCache instance, or None if caching is disabled.
+    """
+    if os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() in ("0", "false", "no"):
+        return None
+    return EmbeddingCache(
+        provider=provider,
+        model=model,
+        dimension=dimension,
+        path=os.getenv("EMBEDDING_CACHE_PATH", DEFAULT_CACHE_PATH),
+        max_entries=int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+    )
@@ -0,0 +1,48 @@
+"""
+Lightweight in-process metrics.
+Latency samples are kept in a bounded ring buffer so percentiles reflect recent traffic.
+"""
+
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict
+
+import numpy as np
+
+
+class LatencyRecorder:
+    """Records durations (seconds) and reports count, mean and percentiles in milliseconds."""
+
+    def __init__(self, max_samples: int = 10_000):
+        self._samples: Deque[float] = deque(maxlen=max_samples)
+        self.count = 0
+        self.total = 0.0
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+
+    @contextmanager
+    def time(self):
+        """Record the wall-clock duration of the enclosed block."""
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(time.perf_counter() - started_at)
+
+    def percentile(self, q: float) -> float:
+        """Return the q-th percentile (0-100) of the recent samples, in milliseconds."""
+        if not self._samples:
+            return 0.0
+        return float(np.percentile(np.fromiter(self._samples, dtype=np.float64), q)) * 1000
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(50), 3),
+            "p99_ms": round(self.percentile(99), 3),
+        }
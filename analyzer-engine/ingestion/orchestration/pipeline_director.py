@@ -34,4 +34,10 @@ class PipelineDirector:
             context = await stage.execute(context)
         
         logger.info(f"PipelineDirector: Process finished for {context.file_path}.")
-        return context
\ No newline at end of file
+        return context
+
+    async def close(self):
+        """Ferme les étapes du pipeline (vidage des écritures différées incluses)."""
+        for stage in self.pipeline:
+            await stage.close()
+        logger.info("PipelineDirector: all stages closed.")
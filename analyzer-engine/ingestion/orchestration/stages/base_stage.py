@@ -8,4 +8,8 @@ class IPipelineStage(ABC):
     @abstractmethod
     async def execute(self, context: ExecutionContext) -> ExecutionContext:
         """Exécute la logique de l'étape et retourne le contexte mis à jour."""
-        pass
\ No newline at end of file
+        pass
+
+    async def close(self) -> None:
+        """Libère les ressources de l'étape (tampons à vider, connexions). Sans effet par défaut."""
+        pass
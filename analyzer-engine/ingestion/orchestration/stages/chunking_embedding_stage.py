@@ -1,9 +1,6 @@
 # Fichier : analyzer-engine/ingestion/orchestration/stages/chunking_embedding_stage.py
 
 import logging
-# ========================= AJOUTER CET IMPORT =========================
-from dataclasses import asdict
-# ======================================================================
 from .base_stage import IPipelineStage
 from ..execution_context import ExecutionContext
 from ...chunker import SimpleChunker
@@ -30,8 +27,11 @@ class ChunkingEmbeddingStage(IPipelineStage):
         
         embedded_chunks = await self.embedder.embed_chunks(doc_chunks)
         
-        context.chunks = [asdict(chunk) for chunk in embedded_chunks]
-        # ==============================================================================
+        # `to_dict` partage le buffer float32 de l'embedding au lieu de le copier en profondeur (asdict).
+        context.chunks = [chunk.to_dict() for chunk in embedded_chunks]
         
         logger.info(f"Generated {len(context.chunks)} embedded chunks.")
-        return context
\ No newline at end of file
+        return context
+
+    async def close(self) -> None:
+        self.embedder.close()
@@ -1,22 +1,60 @@
 # analyzer-engine/ingestion/orchestration/stages/storage_stage.py
+import os
+import asyncio
 import logging
 from datetime import datetime
+from typing import Any, Dict, List, Optional
 from .base_stage import IPipelineStage
 from ..execution_context import ExecutionContext
-from ...storage.repositories.sqlite_graph_repository import SQLiteGraphRepository
-from ...storage.repositories.postgres_repository import PostgresRepository
+from core.contracts.repository_contract import ICodeRepository
+from core.contracts.vector_repository_contract import IVectorRepository
+from ...storage.repositories import create_code_repository, create_vector_repository
+from ...storage.lexical_index import LexicalIndex, create_lexical_index
+from ...storage.blob_store import blob_hash
 
 logger = logging.getLogger(__name__)
 
 class StorageStage(IPipelineStage):
-    """Étape responsable de la persistance des données via les repositories."""
+    """
+    Étape responsable de la persistance des données via les repositories.
 
-    def __init__(self):
-        self.code_repo = SQLiteGraphRepository()
-        self.vector_repo = PostgresRepository()
+    Les écritures sont différées (write-behind) : les lignes du graphe et les chunks de
+    plusieurs fichiers s'accumulent dans un tampon, vidé en une transaction par backend
+    dès que `flush_rows` lignes sont en attente ou `flush_interval` secondes après la
+    première mise en tampon. `close()` vide le tampon restant.
+
+    L'index lexical (BM25) est mis à jour au fil des vidages avec les documents
+    effectivement écrits, et sauvegardé à la fermeture.
+    """
+
+    def __init__(
+        self,
+        code_repo: Optional[ICodeRepository] = None,
+        vector_repo: Optional[IVectorRepository] = None,
+        flush_rows: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        lexical_index: Optional[LexicalIndex] = None
+    ):
+        self.code_repo = code_repo or create_code_repository()
+        self.vector_repo = vector_repo or create_vector_repository()
+        self.lexical_index = lexical_index if lexical_index is not None else create_lexical_index()
+        # Lignes (entités + relations + chunks) en attente au-delà desquelles le tampon est vidé.
+        self.flush_rows = flush_rows or int(os.getenv("STORAGE_FLUSH_ROWS") or 5000)
+        # Délai maximal (secondes) pendant lequel une écriture peut rester en tampon.
+        self.flush_interval = flush_interval if flush_interval is not None else float(os.getenv("STORAGE_FLUSH_INTERVAL") or 2.0)
+
+        self.flush_count = 0
+        self.last_flush_results: Dict[str, Dict[str, Any]] = {}
+
+        self._graph_buffer: List[Dict[str, Any]] = []
+        self._document_buffer: List[Dict[str, Any]] = []
+        self._buffered_rows = 0
+        self._flush_lock = asyncio.Lock()
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_tasks: set = set()
 
     async def execute(self, context: ExecutionContext) -> ExecutionContext:
-        logger.info(f"StorageStage: Storing data for {context.file_path}")
+        logger.info(f"StorageStage: Buffering data for {context.file_path}")
 
          # 1. Assembler un dictionnaire de métadonnées riche pour le document.
         document_metadata = {
@@ -26,24 +64,116 @@ class StorageStage(IPipelineStage):
             "chunk_count": len(context.chunks),
             "ingested_at": datetime.utcnow().isoformat()
         }
-        
-        # Stockage du graphe
-        file_data = {
+
+        # Stockage du graphe : le texte du fichier y est stocké une fois, compressé (blob), et
+        # les entités qui en sont extraites le référencent au lieu d'en garder une copie.
+        self._graph_buffer.append({
             "file_path": context.file_path,
             "entities": context.entities,
-            "relationships": context.relationships
-        }
-        graph_result = await self.code_repo.add_code_structure(file_data)
-        logger.info(f"Graph storage result: {graph_result}")
-
-        # Stockage vectoriel
-        document_content = f"Code container for {context.file_path}"
-        chunks_saved = await self.vector_repo.save_document_with_chunks(
-            context.file_path,
-            document_content,
-            context.chunks,
-            document_metadata
-        )
-        logger.info(f"Vector storage: {chunks_saved} chunks saved.")
-        
-        return context
\ No newline at end of file
+            "relationships": context.relationships,
+            "source_code": context.source_code
+        })
+
+        # Stockage vectoriel. Le contenu des chunks reste dans le store vectoriel (recherche plein texte).
+        self._document_buffer.append({
+            "file_path": context.file_path,
+            "document_content": f"Code container for {context.file_path}",
+            "chunks": context.chunks,
+            "document_metadata": document_metadata,
+            "content_hash": blob_hash(context.source_code.encode("utf-8"))
+        })
+        self._buffered_rows += len(context.entities) + len(context.relationships) + len(context.chunks)
+
+        if self._buffered_rows >= self.flush_rows:
+            await self.flush()
+        elif self._flush_handle is None:
+            loop = asyncio.get_running_loop()
+            self._flush_handle = loop.call_later(self.flush_interval, self._schedule_flush)
+
+        return context
+
+    def _schedule_flush(self) -> None:
+        """Rappel du minuteur : lance le vidage du tampon en tâche de fond."""
+        self._flush_handle = None
+        task = asyncio.get_running_loop().create_task(self._background_flush())
+        # Garder une référence pour que la tâche ne soit pas collectée en cours d'exécution.
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def _background_flush(self) -> None:
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"StorageStage: background flush failed: {e}", exc_info=True)
+
+    async def flush(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Écrit le contenu du tampon : une transaction SQLite et une transaction PostgreSQL
+        pour tous les fichiers en attente. Les erreurs sont isolées par fichier ; si un backend
+        échoue pour tout le lot (connexion, commit...), chaque fichier du lot reçoit l'erreur
+        (`{"error": ...}`) et l'autre backend est tout de même écrit.
+
+        Returns:
+            Le résultat par fichier (graphe et vecteurs), vide si le tampon l'était.
+        """
+        async with self._flush_lock:
+            if self._flush_handle is not None:
+                self._flush_handle.cancel()
+                self._flush_handle = None
+            if not self._graph_buffer and not self._document_buffer:
+                return {}
+
+            graph_batch, self._graph_buffer = self._graph_buffer, []
+            document_batch, self._document_buffer = self._document_buffer, []
+            self._buffered_rows = 0
+
+            graph_results = await self._write_batch("graph", self.code_repo.add_code_structures, graph_batch)
+            vector_results = await self._write_batch("vector", self.vector_repo.save_documents_with_chunks, document_batch)
+            self._update_lexical_index(document_batch, vector_results)
+
+            results = {
+                doc["file_path"]: {
+                    "graph": graph_results.get(doc["file_path"], {}),
+                    "vector": vector_results.get(doc["file_path"], {})
+                }
+                for doc in document_batch
+            }
+            failed = [path for path, result in results.items() if "error" in result["graph"] or "error" in result["vector"]]
+            self.flush_count += 1
+            self.last_flush_results = results
+            logger.info(f"StorageStage: flushed {len(results)} files ({len(failed)} failed).")
+            if failed:
+                logger.error(f"StorageStage: storage failed for {failed}")
+            return results
+
+    async def _write_batch(self, backend: str, write, batch: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Écrit un lot sur un backend ; un échec du lot entier devient une erreur par fichier."""
+        try:
+            return await write(batch)
+        except Exception as e:
+            logger.error(f"StorageStage: {backend} write failed for the whole batch: {e}", exc_info=True)
+            return {item["file_path"]: {"error": str(e)} for item in batch}
+
+    def _update_lexical_index(self, document_batch: List[Dict[str, Any]], vector_results: Dict[str, Dict[str, Any]]) -> None:
+        """Indexe les documents écrits ; les documents en erreur ou inchangés sont laissés tels quels."""
+        if self.lexical_index is None:
+            return
+        for doc in document_batch:
+            result = vector_results.get(doc["file_path"], {})
+            if "error" in result or result.get("unchanged"):
+                continue
+            self.lexical_index.add_document(doc["file_path"], doc["chunks"])
+
+    async def close(self) -> None:
+        """Vide le tampon restant, sauvegarde l'index lexical et ferme les repositories (même en cas d'échec)."""
+        try:
+            await self.flush()
+            if self._flush_tasks:
+                await asyncio.gather(*self._flush_tasks, return_exceptions=True)
+            if self.lexical_index is not None and self.lexical_index.dirty and self.lexical_index.path is not None:
+                self.lexical_index.save()
+        finally:
+            try:
+                await self.code_repo.close()
+            finally:
+                await self.vector_repo.close()
@@ -4,12 +4,17 @@ This module acts as a factory for creating provider-specific clients.
 """
 
 import os
+import base64
 import logging
 from typing import Optional, Any, Protocol, List
 from pydantic_ai.providers.openai import OpenAIProvider
 from pydantic_ai.models.openai import OpenAIModel
+import numpy as np
 from dotenv import load_dotenv
 from .providers_google import GoogleAIEmbedder
+from .rate_limiting import is_rate_limit_error
+from .batching import BatchLimits
+from core.exceptions.base_exceptions import EmbeddingProviderError, RateLimitExceededError
 
 # Load environment variables
 load_dotenv()
@@ -21,22 +26,31 @@ class EmbeddingProvider(Protocol):
     """
     Defines a common interface for all embedding providers.
     This ensures that the application can switch between providers seamlessly.
+
+    Vectors are returned as contiguous float32 NumPy arrays: a 1-D array for a
+    single text, a (len(texts), dimension) matrix for a batch.
     """
-    async def generate_embedding(self, text: str) -> List[float]:
+    async def generate_embedding(self, text: str) -> np.ndarray:
         ...
 
-    async def generate_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
+    async def generate_embeddings_batch(self, texts: List[str]) -> np.ndarray:
         ...
 
     def get_embedding_dimension(self) -> int:
         ...
 
+    # Providers may also expose a `batch_limits: BatchLimits` attribute describing
+    # their per-request limits; DEFAULT_BATCH_LIMITS is used otherwise.
+
 # --- Provider Implementations ---
 
 class OpenAIEmbedderWrapper:
     """
     Wrapper for OpenAI embedding client to conform to the EmbeddingProvider protocol.
     """
+    # OpenAI embeddings API: 2048 inputs and 300k tokens per request, 8191 tokens per input.
+    batch_limits = BatchLimits(max_batch_size=2048, max_tokens_per_request=300_000, max_tokens_per_input=8_191)
+
     def __init__(self, model_name: str, api_key: str, base_url: str):
         import openai  # Lazy import
         self.model_name = model_name
@@ -44,21 +58,40 @@ class OpenAIEmbedderWrapper:
         # Standardize on 1536 for OpenAI's text-embedding-3-small/large
         self.dimension = 1536
 
-    async def generate_embedding(self, text: str) -> List[float]:
+    @staticmethod
+    def _decode(data) -> np.ndarray:
+        # base64 responses are raw little-endian float32: ~4x smaller than JSON and no float parsing.
+        # Some OpenAI-compatible servers (Ollama, some vLLM/LiteLLM setups) ignore `encoding_format`
+        # and still return float lists.
+        if isinstance(data, list):
+            return np.asarray(data, dtype=np.float32)
+        return np.frombuffer(base64.b64decode(data), dtype=np.float32)
+
+    async def generate_embedding(self, text: str) -> np.ndarray:
         try:
-            response = await self.client.embeddings.create(model=self.model_name, input=text)
-            return response.data[0].embedding
+            response = await self.client.embeddings.create(model=self.model_name, input=text, encoding_format="base64")
+            return self._decode(response.data[0].embedding)
         except Exception as e:
+            if is_rate_limit_error(e):
+                raise RateLimitExceededError(f"OpenAI rate limit: {e}") from e
             logger.error(f"OpenAI embedding failed: {e}")
-            return [0.0] * self.dimension
+            raise EmbeddingProviderError(f"OpenAI embedding failed: {e}") from e
 
-    async def generate_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
+    async def generate_embeddings_batch(self, texts: List[str]) -> np.ndarray:
         try:
-            response = await self.client.embeddings.create(model=self.model_name, input=texts)
-            return [data.embedding for data in response.data]
+            response = await self.client.embeddings.create(model=self.model_name, input=texts, encoding_format="base64")
+            if len(response.data) != len(texts):
+                raise EmbeddingProviderError(f"Expected {len(texts)} embeddings, got {len(response.data)}")
+            if not response.data:
+                return np.empty((0, self.dimension), dtype=np.float32)
+            return np.stack([self._decode(data.embedding) for data in response.data])
         except Exception as e:
+            if is_rate_limit_error(e):
+                # Let the caller back off and retry.
+                raise RateLimitExceededError(f"OpenAI rate limit: {e}") from e
             logger.error(f"OpenAI batch embedding failed: {e}")
-            return [[0.0] * self.dimension for _ in texts]
+            # Failed chunks are dead-lettered by the caller, never stored as zero vectors.
+            raise EmbeddingProviderError(f"OpenAI batch embedding failed: {e}") from e
 
     def get_embedding_dimension(self) -> int:
         return self.dimension
@@ -99,6 +132,12 @@ def get_embedder() -> EmbeddingProvider:
         ValueError: If the provider is unsupported or API keys are missing.
     """
     provider_name = os.getenv('EMBEDDING_PROVIDER', 'openai').lower()
+    
+    # Offline provider: no network access and no API key required.
+    if provider_name in ('local', 'hashing'):
+        from .providers_local import create_local_embedder
+        return create_local_embedder()
+    
     api_key = os.getenv('EMBEDDING_API_KEY')
     
     if not api_key:
@@ -163,7 +202,9 @@ def validate_configuration() -> bool:
     Returns:
         True if configuration is valid, False otherwise.
     """
-    required_vars = ['LLM_API_KEY', 'LLM_CHOICE', 'EMBEDDING_API_KEY', 'EMBEDDING_MODEL']
+    required_vars = ['LLM_API_KEY', 'LLM_CHOICE']
+    if os.getenv('EMBEDDING_PROVIDER', 'openai').lower() not in ('local', 'hashing'):
+        required_vars += ['EMBEDDING_API_KEY', 'EMBEDDING_MODEL']
     missing_vars = [var for var in required_vars if not os.getenv(var)]
     
     if missing_vars:
@@ -0,0 +1,93 @@
+"""
+Local fake embedding provider for tests and benchmarks.
+It simulates network latency and provider-side rate limiting without any network access.
+"""
+import asyncio
+import hashlib
+import random
+from typing import List, Optional
+
+import numpy as np
+
+from core.exceptions.base_exceptions import RateLimitExceededError
+from .batching import DEFAULT_BATCH_LIMITS, BatchLimits
+
+
+class FakeEmbeddingProvider:
+    """
+    Deterministic embedding provider with configurable latency and rate-limit behaviour.
+    Implements the EmbeddingProvider protocol.
+    """
+
+    def __init__(
+        self,
+        dimension: int = 8,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        max_concurrent_requests: Optional[int] = None,
+        fail_first_n_requests: int = 0,
+        model_name: str = "fake-embedding",
+        batch_limits: BatchLimits = DEFAULT_BATCH_LIMITS
+    ):
+        """
+        Initializes the fake provider.
+
+        Args:
+            dimension (int): Size of the generated vectors.
+            latency (float): Simulated round-trip time per request, in seconds.
+            jitter (float): Maximum random extra latency per request, in seconds.
+            max_concurrent_requests (Optional[int]): Requests beyond this number in flight
+                are rejected with RateLimitExceededError (simulates HTTP 429).
+            fail_first_n_requests (int): Number of initial requests rejected with
+                RateLimitExceededError, regardless of concurrency.
+            model_name (str): Model name reported to callers.
+            batch_limits (BatchLimits): Per-request limits advertised to the EmbeddingGenerator.
+        """
+        self.dimension = dimension
+        self.latency = latency
+        self.jitter = jitter
+        self.max_concurrent_requests = max_concurrent_requests
+        self.fail_first_n_requests = fail_first_n_requests
+        self.model_name = model_name
+        self.batch_limits = batch_limits
+        self.batch_sizes: List[int] = []
+
+        self.request_count = 0
+        self.rate_limited_count = 0
+        self.texts_embedded = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def _vector(self, text: str) -> np.ndarray:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        return np.random.default_rng(seed).standard_normal(self.dimension).astype(np.float32)
+
+    async def _request(self, texts: List[str]) -> np.ndarray:
+        self.request_count += 1
+        if self.request_count <= self.fail_first_n_requests:
+            self.rate_limited_count += 1
+            raise RateLimitExceededError("Simulated rate limit (initial failures)")
+        if self.max_concurrent_requests is not None and self.in_flight >= self.max_concurrent_requests:
+            self.rate_limited_count += 1
+            raise RateLimitExceededError("Simulated rate limit (too many concurrent requests)")
+
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+            if delay:
+                await asyncio.sleep(delay)
+            self.texts_embedded += len(texts)
+            self.batch_sizes.append(len(texts))
+            return np.stack([self._vector(text) for text in texts]) if texts else np.zeros((0, self.dimension), dtype=np.float32)
+        finally:
+            self.in_flight -= 1
+
+    async def generate_embedding(self, text: str) -> np.ndarray:
+        return (await self._request([text]))[0]
+
+    async def generate_embeddings_batch(self, texts: List[str]) -> np.ndarray:
+        return await self._request(texts)
+
+    def get_embedding_dimension(self) -> int:
+        return self.dimension
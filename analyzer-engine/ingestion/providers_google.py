@@ -3,11 +3,19 @@ Google AI provider implementation for embeddings.
 """
 import os
 import logging
-from typing import List, Optional
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Union
 import asyncio
+import numpy as np
 import google.generativeai as genai
 from dotenv import load_dotenv
 
+from .rate_limiting import is_rate_limit_error
+from .batching import BatchLimits
+from .metrics import LatencyRecorder
+from core.exceptions.base_exceptions import EmbeddingProviderError, RateLimitExceededError
+
 load_dotenv()
 logger = logging.getLogger(__name__)
 
@@ -18,21 +26,37 @@ logger = logging.getLogger(__name__)
 EMBEDDING_DIMENSION = 768
 # The model name in the SDK is different from the API identifier
 SDK_MODEL_NAME = "models/text-embedding-004"
+# batchEmbedContents accepts at most 100 requests; text-embedding-004 reads 2048 tokens per input.
+BATCH_LIMITS = BatchLimits(max_batch_size=100, max_tokens_per_request=100 * 2048, max_tokens_per_input=2048)
 
 
 class GoogleAIEmbedder:
     """
     Wrapper for Google AI (Gemini) embedding model.
     Implements a common interface for embedding generation.
+
+    The SDK call is synchronous: it runs on a dedicated, sized thread pool
+    (not the default asyncio executor shared with the rest of the process),
+    and batches larger than the API limit are split into parallel sub-requests.
     """
+    batch_limits = BATCH_LIMITS
 
-    def __init__(self, model_name: str = SDK_MODEL_NAME, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        model_name: str = SDK_MODEL_NAME,
+        api_key: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        embed_fn: Optional[Callable[..., Dict[str, Any]]] = None
+    ):
         """
         Initializes the Google AI embedder.
 
         Args:
             model_name (str): The model name to use, e.g., 'models/text-embedding-004'.
             api_key (Optional[str]): The API key. Defaults to EMBEDDING_API_KEY env var.
+            max_workers (Optional[int]): Size of the dedicated thread pool.
+                Defaults to GOOGLE_EMBEDDING_MAX_WORKERS env var, or 8.
+            embed_fn (Optional[Callable]): Stand-in for `genai.embed_content`, for tests.
         """
         self.model_name = model_name
         self.api_key = api_key or os.getenv("EMBEDDING_API_KEY")
@@ -42,8 +66,25 @@ class GoogleAIEmbedder:
         # Configure the genai library
         genai.configure(api_key=self.api_key)
         self.dimension = EMBEDDING_DIMENSION
+        self.max_batch_size = BATCH_LIMITS.max_batch_size
+        self._embed_fn = embed_fn or genai.embed_content
+        self.max_workers = max_workers or int(os.getenv("GOOGLE_EMBEDDING_MAX_WORKERS") or 8)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="google-embed")
+        self.request_latency = LatencyRecorder()
+
+    async def _embed_content(self, content: Union[str, List[str]]) -> Dict[str, Any]:
+        """Run one SDK request on the dedicated executor and record its duration."""
+        loop = asyncio.get_running_loop()
+        call = functools.partial(
+            self._embed_fn,
+            model=self.model_name,
+            content=content,
+            task_type="retrieval_document"  # or "retrieval_query"
+        )
+        with self.request_latency.time():
+            return await loop.run_in_executor(self._executor, call)
 
-    async def generate_embedding(self, text: str) -> List[float]:
+    async def generate_embedding(self, text: str) -> np.ndarray:
         """
         Generate embedding for a single text.
 
@@ -51,52 +92,46 @@ class GoogleAIEmbedder:
             text (str): The text to embed.
 
         Returns:
-            List[float]: The embedding vector.
+            np.ndarray: The float32 embedding vector.
         """
         try:
-            # genai.embed_content is synchronous, so we run it in an executor
-            # to avoid blocking the asyncio event loop.
-            loop = asyncio.get_running_loop()
-            result = await loop.run_in_executor(
-                None,  # Uses the default ThreadPoolExecutor
-                lambda: genai.embed_content(
-                    model=self.model_name,
-                    content=text,
-                    task_type="retrieval_document" # or "retrieval_query"
-                )
-            )
-            return result['embedding']
+            result = await self._embed_content(text)
+            return np.asarray(result['embedding'], dtype=np.float32)
         except Exception as e:
+            if is_rate_limit_error(e):
+                raise RateLimitExceededError(f"Google AI rate limit: {e}") from e
             logger.error(f"Google AI embedding for single text failed: {e}")
-            # Return a zero vector on failure, matching the dimension.
-            return [0.0] * self.dimension
+            raise EmbeddingProviderError(f"Google AI embedding failed: {e}") from e
+
+    async def _embed_sub_batch(self, texts: List[str]) -> np.ndarray:
+        """Embed at most `max_batch_size` texts in one request."""
+        try:
+            result = await self._embed_content(texts)
+            return np.asarray(result['embedding'], dtype=np.float32).reshape(len(texts), -1)
+        except Exception as e:
+            if is_rate_limit_error(e):
+                # Let the caller back off and retry.
+                raise RateLimitExceededError(f"Google AI rate limit: {e}") from e
+            logger.error(f"Google AI embedding batch failed: {e}")
+            # Failed chunks are dead-lettered by the caller, never stored as zero vectors.
+            raise EmbeddingProviderError(f"Google AI embedding batch failed: {e}") from e
 
-    async def generate_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
+    async def generate_embeddings_batch(self, texts: List[str]) -> np.ndarray:
         """
         Generate embeddings for a batch of texts.
+        Batches above the API limit are split and the sub-requests run in parallel.
 
         Args:
             texts (List[str]): A list of texts to embed.
 
         Returns:
-            List[List[float]]: A list of embedding vectors.
+            np.ndarray: A (len(texts), dimension) float32 matrix.
         """
-        try:
-            # genai.embed_content handles batching internally.
-            loop = asyncio.get_running_loop()
-            result = await loop.run_in_executor(
-                None,
-                lambda: genai.embed_content(
-                    model=self.model_name,
-                    content=texts,
-                    task_type="retrieval_document"
-                )
-            )
-            return [e for e in result['embedding']]
-        except Exception as e:
-            logger.error(f"Google AI embedding batch failed: {e}")
-            # Fallback to zero vectors for the entire failed batch.
-            return [[0.0] * self.dimension for _ in texts]
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        sub_batches = [texts[i:i + self.max_batch_size] for i in range(0, len(texts), self.max_batch_size)]
+        results = await asyncio.gather(*(self._embed_sub_batch(batch) for batch in sub_batches))
+        return results[0] if len(results) == 1 else np.concatenate(results)
 
     def get_embedding_dimension(self) -> int:
         """
@@ -105,4 +140,12 @@ class GoogleAIEmbedder:
         Returns:
             int: The vector dimension size.
         """
-        return self.dimension
\ No newline at end of file
+        return self.dimension
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-request timing of the SDK calls (count, mean, p50, p99)."""
+        return {**self.request_latency.snapshot(), "max_workers": self.max_workers}
+
+    def close(self) -> None:
+        """Shut down the dedicated thread pool."""
+        self._executor.shutdown(wait=False)
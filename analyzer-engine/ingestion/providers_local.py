@@ -0,0 +1,107 @@
+"""
+Local, offline embedding provider.
+Feature-hashing embedder running on the CPU with NumPy: no network access,
+no model download, deterministic across processes and machines.
+"""
+import os
+import hashlib
+import logging
+from functools import lru_cache
+from typing import List, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+from .batching import BatchLimits
+from .code_tokenizer import tokenize_code
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# Matches the vector(768) columns of the default schema.
+DEFAULT_DIMENSION = 768
+MODEL_NAME = "local-feature-hashing-v1"
+
+
+@lru_cache(maxsize=1 << 18)
+def _hash_feature(feature: str, dimension: int) -> Tuple[int, float]:
+    """
+    Map a feature to a (bucket, sign) pair.
+    BLAKE2b is used instead of `hash()`, which is salted per process.
+    """
+    digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+    sign = 1.0 if digest >> 63 else -1.0
+    return digest % dimension, sign
+
+
+class LocalHashingEmbedder:
+    """
+    Signed feature-hashing embedder (the "hashing trick").
+    Implements the EmbeddingProvider protocol.
+
+    Features are code-aware tokens (identifiers and their camelCase/snake_case
+    sub-words) plus adjacent token bigrams. Counts are log-scaled and each
+    vector is L2-normalized, so cosine similarity reflects lexical overlap.
+    """
+    # No remote API: limits only bound memory per request.
+    batch_limits = BatchLimits(max_batch_size=1024, max_tokens_per_request=2_000_000, max_tokens_per_input=100_000)
+
+    def __init__(self, dimension: int = DEFAULT_DIMENSION, use_bigrams: bool = True):
+        """
+        Initializes the local embedder.
+
+        Args:
+            dimension (int): Size of the generated vectors.
+            use_bigrams (bool): Whether adjacent token pairs are hashed as extra features.
+        """
+        self.model_name = MODEL_NAME
+        self.dimension = dimension
+        self.use_bigrams = use_bigrams
+
+    def _features(self, text: str) -> List[str]:
+        tokens = tokenize_code(text)
+        if self.use_bigrams:
+            tokens.extend(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+        return tokens
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed a batch of texts.
+
+        Returns:
+            np.ndarray: A (len(texts), dimension) float32 matrix of unit vectors
+            (all-zero rows for texts without any feature).
+        """
+        rows: List[int] = []
+        columns: List[int] = []
+        signs: List[float] = []
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                column, sign = _hash_feature(feature, self.dimension)
+                rows.append(row)
+                columns.append(column)
+                signs.append(sign)
+
+        matrix = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        if rows:
+            np.add.at(matrix, (np.asarray(rows), np.asarray(columns)), np.asarray(signs, dtype=np.float32))
+            # Sublinear term frequency: a token repeated 100 times should not dominate.
+            np.copysign(np.log1p(np.abs(matrix)), matrix, out=matrix)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+
+    async def generate_embedding(self, text: str) -> np.ndarray:
+        return self.embed([text])[0]
+
+    async def generate_embeddings_batch(self, texts: List[str]) -> np.ndarray:
+        return self.embed(texts)
+
+    def get_embedding_dimension(self) -> int:
+        return self.dimension
+
+
+def create_local_embedder() -> LocalHashingEmbedder:
+    """Create the local embedder with the dimension configured by VECTOR_DIMENSION."""
+    dimension = int(os.getenv("VECTOR_DIMENSION") or DEFAULT_DIMENSION)
+    return LocalHashingEmbedder(dimension=dimension)
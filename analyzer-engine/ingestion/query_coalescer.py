@@ -0,0 +1,102 @@
+"""
+Micro-batching of concurrent query embeddings.
+
+Concurrent `embed` calls arriving within a short window (a few milliseconds),
+or until `max_batch_size` is reached, are sent to the provider as a single
+`generate_embeddings_batch` request; each caller's future is then resolved
+with its own vector.
+"""
+
+import asyncio
+import logging
+from typing import List, Optional, Set, Tuple
+
+import numpy as np
+
+from .metrics import LatencyRecorder
+
+logger = logging.getLogger(__name__)
+
+
+class QueryCoalescer:
+    """Coalesces concurrent single-text embedding requests into batch requests."""
+
+    def __init__(self, provider, window_ms: float = 3.0, max_batch_size: int = 32):
+        """
+        Initialize the coalescer.
+
+        Args:
+            provider: An EmbeddingProvider.
+            window_ms: How long the first query of a batch waits for others to join.
+            max_batch_size: A batch is dispatched immediately once it reaches this size.
+        """
+        self.provider = provider
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max(1, max_batch_size)
+
+        self.latency = LatencyRecorder()
+        self.batches_sent = 0
+        self.queries_coalesced = 0
+
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._dispatch_tasks: Set[asyncio.Task] = set()
+
+    async def embed(self, text: str) -> np.ndarray:
+        """Embed one text, sharing the provider round-trip with concurrent callers."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        started_at = loop.time()
+
+        self._pending.append((text, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window, self._flush)
+
+        try:
+            return await future
+        finally:
+            self.latency.record(loop.time() - started_at)
+
+    def _flush(self) -> None:
+        """Hand the pending queries over to a dispatch task."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        task = asyncio.get_running_loop().create_task(self._dispatch(batch))
+        # Keep a reference so the task is not garbage-collected mid-flight.
+        self._dispatch_tasks.add(task)
+        task.add_done_callback(self._dispatch_tasks.discard)
+
+    async def _dispatch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        # Identical concurrent queries are embedded once.
+        texts = list(dict.fromkeys(text for text, _ in batch))
+        self.batches_sent += 1
+        self.queries_coalesced += len(batch)
+
+        try:
+            vectors = await self.provider.generate_embeddings_batch(texts)
+        except Exception as e:
+            logger.error(f"Coalesced query embedding failed for {len(batch)} queries: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        index = {text: i for i, text in enumerate(texts)}
+        for text, future in batch:
+            if not future.done():  # The caller may have been cancelled meanwhile.
+                future.set_result(vectors[index[text]])
+
+    def stats(self) -> dict:
+        """Latency percentiles of `embed` calls and batching counters."""
+        return {
+            **self.latency.snapshot(),
+            "batches_sent": self.batches_sent,
+            "average_batch_size": round(self.queries_coalesced / self.batches_sent, 2) if self.batches_sent else 0.0,
+        }
@@ -0,0 +1,171 @@
+"""
+Rate limiting and adaptive concurrency control for embedding requests.
+
+A TokenBucket enforces a per-minute budget (requests or tokens), and an
+AdaptiveConcurrencyLimiter bounds the number of requests in flight using
+AIMD: the limit grows by one after a window of healthy requests and is
+halved on HTTP 429 (or reduced on latency spikes).
+"""
+
+import asyncio
+import time
+import logging
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from core.exceptions.base_exceptions import RateLimitExceededError
+
+logger = logging.getLogger(__name__)
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """
+    Detect a provider rate-limit error regardless of the SDK that raised it.
+
+    Recognizes our own RateLimitExceededError, HTTP errors carrying a 429
+    status (openai, httpx) and gRPC RESOURCE_EXHAUSTED errors (google).
+    """
+    if isinstance(error, RateLimitExceededError):
+        return True
+    for attr in ("status_code", "code", "status"):
+        value = getattr(error, attr, None)
+        if value == 429:
+            return True
+    return error.__class__.__name__ in ("RateLimitError", "ResourceExhausted", "TooManyRequests")
+
+
+class TokenBucket:
+    """
+    Asynchronous token bucket refilled continuously at `rate_per_minute`.
+
+    The bucket capacity equals one minute of budget, so short bursts are
+    allowed while the long-run rate never exceeds the configured limit.
+    """
+
+    def __init__(self, rate_per_minute: float):
+        if rate_per_minute <= 0:
+            raise ValueError("rate_per_minute must be positive")
+        self.capacity = float(rate_per_minute)
+        self.rate_per_second = rate_per_minute / 60.0
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate_per_second)
+        self._updated_at = now
+
+    async def acquire(self, amount: float = 1.0) -> float:
+        """
+        Wait until `amount` tokens are available and consume them.
+
+        Requests larger than the bucket capacity are clamped to the capacity
+        so that they can still proceed (once per full refill).
+
+        Returns:
+            The time spent waiting, in seconds.
+        """
+        amount = min(float(amount), self.capacity)
+        waited = 0.0
+        # The lock keeps waiters in FIFO order: a large request cannot be starved by small ones.
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return waited
+                delay = (amount - self._tokens) / self.rate_per_second
+                waited += delay
+                await asyncio.sleep(delay)
+
+
+class RateLimiter:
+    """Combines optional request-per-minute and token-per-minute buckets."""
+
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+
+    async def acquire(self, token_count: int) -> float:
+        """Wait for one request slot and `token_count` tokens. Returns the wait time."""
+        waited = 0.0
+        if self.requests:
+            waited += await self.requests.acquire(1)
+        if self.tokens:
+            waited += await self.tokens.acquire(max(1, token_count))
+        return waited
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Bounds the number of in-flight requests with an AIMD-adjusted limit.
+
+    - Success: after `limit` consecutive healthy requests, the limit grows by one.
+    - Rate limited (429): the limit is halved.
+    - Latency spike (latency > spike_factor x moving average): the limit shrinks by one.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 16,
+        spike_factor: float = 3.0,
+        smoothing: float = 0.2
+    ):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = min(max(initial_limit, self.min_limit), self.max_limit)
+        self.spike_factor = spike_factor
+        self.smoothing = smoothing
+        self.average_latency: Optional[float] = None
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._healthy_streak = 0
+        self._condition = asyncio.Condition()
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one concurrency slot for the duration of the block."""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self.in_flight -= 1
+                self._condition.notify_all()
+
+    def record_success(self, latency: float) -> None:
+        """Feed a successful request latency (seconds) into the controller."""
+        is_spike = (
+            self.average_latency is not None
+            and latency > self.average_latency * self.spike_factor
+        )
+        self.average_latency = (
+            latency if self.average_latency is None
+            else (1 - self.smoothing) * self.average_latency + self.smoothing * latency
+        )
+        if is_spike:
+            self._decrease(self.limit - 1, reason=f"latency spike ({latency:.3f}s)")
+            return
+
+        self._healthy_streak += 1
+        if self._healthy_streak >= self.limit and self.limit < self.max_limit:
+            self.limit += 1
+            self._healthy_streak = 0
+            logger.debug(f"Embedding concurrency increased to {self.limit}.")
+
+    def record_throttle(self) -> None:
+        """Signal that the provider rejected a request with a rate-limit error."""
+        self._decrease(self.limit // 2, reason="rate limited")
+
+    def _decrease(self, new_limit: int, reason: str) -> None:
+        self._healthy_streak = 0
+        new_limit = max(self.min_limit, new_limit)
+        if new_limit < self.limit:
+            logger.info(f"Embedding concurrency reduced from {self.limit} to {new_limit}: {reason}.")
+            self.limit = new_limit
@@ -0,0 +1,123 @@
+"""
+Background repair of chunks whose embedding failed at ingestion time.
+
+Failed chunks are stored with a NULL embedding (so they never show up in search
+results) and queued in the repository's dead-letter table. The worker drains
+that queue in batches, embeds the chunks again through the regular
+EmbeddingGenerator (cache, batching, rate limiting and retries included) and
+writes the vectors back in place.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from core.contracts.vector_repository_contract import IVectorRepository
+from .chunker import DocumentChunk
+from .embedder import EmbeddingGenerator
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ReembedReport:
+    """Outcome of a re-embedding pass."""
+    processed: int = 0
+    repaired: int = 0
+    failed: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return {"processed": self.processed, "repaired": self.repaired, "failed": self.failed}
+
+
+class ReembeddingWorker:
+    """Drains the dead-letter queue of a vector repository."""
+
+    def __init__(
+        self,
+        repository: IVectorRepository,
+        embedder: EmbeddingGenerator,
+        batch_size: int = 100,
+        max_attempts: int = 5
+    ):
+        """
+        Initialize the worker.
+
+        Args:
+            repository: Repository holding the chunks and their dead letters.
+            embedder: Embedding generator used to embed the chunks again.
+            batch_size: Number of dead letters fetched per pass.
+            max_attempts: Chunks that already failed this many re-embedding attempts are skipped.
+        """
+        self.repository = repository
+        self.embedder = embedder
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+
+    async def run_once(self) -> ReembedReport:
+        """
+        Re-embed one batch of pending chunks.
+
+        Returns:
+            The report of the pass; `processed` is 0 when the queue is empty.
+        """
+        pending = await self.repository.get_pending_reembeds(self.batch_size, self.max_attempts)
+        report = ReembedReport(processed=len(pending))
+        if not pending:
+            return report
+
+        chunks = [
+            DocumentChunk(
+                id=row["chunk_id"],
+                content=row["content"],
+                index=row.get("chunk_index") or 0,
+                start_char=0,
+                end_char=len(row["content"]),
+                metadata={},
+                token_count=row.get("token_count")
+            )
+            for row in pending
+        ]
+        await self.embedder.embed_chunks(chunks)
+
+        repaired = {chunk.id: chunk.embedding for chunk in chunks if chunk.embedding is not None}
+        failed = [chunk for chunk in chunks if chunk.embedding is None]
+
+        report.repaired = await self.repository.update_chunk_embeddings(repaired)
+        if failed:
+            # Chunks of one batch share the same error; keep the first one as representative.
+            error = failed[0].metadata.get("embedding_error") or "missing embedding"
+            await self.repository.record_reembed_failures([chunk.id for chunk in failed], error)
+            report.failed = len(failed)
+
+        logger.info(f"Re-embedding pass: {report.as_dict()}")
+        return report
+
+    async def run(self, watch: bool = False, interval: float = 30.0, max_passes: Optional[int] = None) -> ReembedReport:
+        """
+        Re-embed pending chunks until the queue is drained.
+
+        Args:
+            watch: Keep polling the queue every `interval` seconds instead of returning once it is empty.
+            interval: Polling interval, in seconds, when the queue is empty (watch mode only).
+            max_passes: Optional upper bound on the number of passes.
+
+        Returns:
+            The cumulated report of all passes.
+        """
+        total = ReembedReport()
+        passes = 0
+        while max_passes is None or passes < max_passes:
+            report = await self.run_once()
+            passes += 1
+            total.processed += report.processed
+            total.repaired += report.repaired
+            total.failed += report.failed
+
+            # A pass that repaired nothing would fetch the same rows again right away.
+            if report.processed == 0 or report.repaired == 0:
+                if not watch:
+                    break
+                await asyncio.sleep(interval)
+        return total
@@ -0,0 +1,121 @@
+# FICHIER: analyzer-engine/ingestion/storage/blob_store.py
+"""
+Texte source adressé par contenu et compressé.
+
+Chaque texte distinct (un fichier source) est stocké une seule fois, sous l'empreinte
+SHA-256 de son encodage UTF-8 : la même que le `content_hash` des documents. Il est
+compressé en zstd si le paquet `zstandard` est installé, en zlib sinon ; le codec est
+enregistré avec chaque blob, pour qu'un blob reste lisible quel que soit le réglage courant.
+
+Les entités du graphe extraites du fichier ne stockent plus leur texte mais une référence
+(empreinte, offset, longueur), offset et longueur étant comptés en octets du texte UTF-8.
+Les chunks gardent leur contenu dans le store vectoriel (recherche plein texte, embeddings).
+À la lecture, le blob est décompressé à la demande et conservé dans un petit cache LRU.
+"""
+import os
+import zlib
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from core.exceptions.base_exceptions import RepositoryError
+
+try:
+    import zstandard
+except ImportError:  # Dépendance optionnelle : repli sur zlib.
+    zstandard = None
+
+DEFAULT_CACHE_MB = 16
+_ZSTD_LEVEL = 9
+_ZLIB_LEVEL = 6
+
+
+def blob_hash(data: bytes) -> str:
+    """Empreinte d'un blob : SHA-256 hexadécimal de son contenu."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def default_codec() -> str:
+    """
+    Codec des nouveaux blobs, choisi par GRAPH_BLOB_COMPRESSION : "zstd", "zlib" ou "auto"
+    (défaut : zstd si `zstandard` est installé, zlib sinon).
+    """
+    codec = (os.getenv("GRAPH_BLOB_COMPRESSION") or "auto").lower()
+    if codec == "auto":
+        return "zstd" if zstandard is not None else "zlib"
+    if codec not in ("zstd", "zlib"):
+        raise RepositoryError(f"Unknown GRAPH_BLOB_COMPRESSION codec: {codec!r} (expected 'auto', 'zstd' or 'zlib')")
+    return codec
+
+
+def compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RepositoryError("zstd compression requires the 'zstandard' package")
+        return zstandard.ZstdCompressor(level=_ZSTD_LEVEL).compress(data)
+    return zlib.compress(data, _ZLIB_LEVEL)
+
+
+def decompress(payload: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RepositoryError("This blob is zstd-compressed: install the 'zstandard' package to read it")
+        return zstandard.ZstdDecompressor().decompress(payload)
+    if codec == "zlib":
+        return zlib.decompress(payload)
+    raise RepositoryError(f"Unknown blob codec: {codec!r}")
+
+
+def locate(data: bytes, fragment: str) -> Optional[Tuple[int, int]]:
+    """
+    Position (offset, longueur), en octets, de `fragment` dans le texte UTF-8 `data`,
+    ou None s'il n'y figure pas. La recherche se fait directement sur les octets : en
+    UTF-8, une séquence valide ne peut commencer qu'à une frontière de caractère.
+    """
+    if not fragment:
+        return None
+    encoded = fragment.encode('utf-8')
+    offset = data.find(encoded)
+    return None if offset < 0 else (offset, len(encoded))
+
+
+class BlobCache:
+    """Cache LRU des blobs décompressés, borné en octets."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[bytes]:
+        data = self._entries.get(key)
+        if data is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_bytes or key in self._entries:
+            return
+        self._entries[key] = data
+        self.current_bytes += len(data)
+        while self.current_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.current_bytes -= len(evicted)
+
+    def discard(self, key: str) -> None:
+        data = self._entries.pop(key, None)
+        if data is not None:
+            self.current_bytes -= len(data)
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "bytes": self.current_bytes, "hits": self.hits, "misses": self.misses}
+
+
+def create_blob_cache() -> BlobCache:
+    """Cache des blobs décompressés, de GRAPH_BLOB_CACHE_MB mégaoctets (défaut 16)."""
+    return BlobCache(int(os.getenv("GRAPH_BLOB_CACHE_MB") or DEFAULT_CACHE_MB) * 1024 * 1024)
@@ -0,0 +1,13 @@
+# FICHIER: analyzer-engine/ingestion/storage/content_hash.py
+"""Empreinte de contenu des documents, partagée par les repositories vectoriels (upsert idempotent)."""
+import hashlib
+from typing import Any, Dict, List
+
+
+def default_content_hash(document_content: str, chunks: List[Dict[str, Any]]) -> str:
+    """Empreinte SHA-256 du document et de ses chunks, utilisée quand l'appelant n'en fournit pas."""
+    digest = hashlib.sha256(document_content.encode('utf-8'))
+    for c in chunks:
+        digest.update(b'\x00')
+        digest.update(c['content'].encode('utf-8'))
+    return digest.hexdigest()
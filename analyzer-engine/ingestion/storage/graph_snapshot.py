@@ -0,0 +1,389 @@
+# FICHIER: analyzer-engine/ingestion/storage/graph_snapshot.py
+"""
+Snapshot en mémoire du graphe de code, au format CSR (Compressed Sparse Row).
+
+Chaque entité reçoit un indice dense. Les relations sortantes du nœud `i` sont
+`out_targets[out_offsets[i]:out_offsets[i + 1]]` (int32), les relations entrantes
+sont stockées de la même façon dans `in_offsets` / `in_sources`. Les noms et les
+chemins de fichiers sont internés : chaque nœud ne porte qu'un code int32.
+
+Un parcours en largeur traite tout un niveau par opérations vectorisées, sans
+aller-retour SQL par saut. Le snapshot se rafraîchit en ne rechargeant que les
+fichiers modifiés (table `file_versions`), et se partage en lecture seule entre
+processus via des fichiers `.npy` ouverts en mémoire mappée (`save` / `open`).
+"""
+import os
+import json
+import shutil
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.exceptions.base_exceptions import EntityNotFoundError, RepositoryError
+
+logger = logging.getLogger(__name__)
+
+_DIRECTIONS = ("outgoing", "incoming", "both")
+_ARRAYS = (
+    "entity_ids", "name_codes", "type_codes", "file_codes",
+    "out_offsets", "out_targets", "out_types", "in_offsets", "in_sources", "in_types",
+)
+
+
+def _build_csr(n_nodes: int, sources: np.ndarray, targets: np.ndarray, types: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Adjacence CSR : offsets (n_nodes + 1) et voisins / types triés par nœud d'origine."""
+    order = np.argsort(sources, kind="stable")
+    offsets = np.zeros(n_nodes + 1, dtype=np.int32)
+    np.cumsum(np.bincount(sources, minlength=n_nodes), out=offsets[1:])
+    return offsets, targets[order].astype(np.int32), types[order].astype(np.int8)
+
+
+def _gather(offsets: np.ndarray, values: np.ndarray, types: np.ndarray, nodes: np.ndarray, type_mask: Optional[np.ndarray]) -> np.ndarray:
+    """Concatène les listes d'adjacence des `nodes`, filtrées par type de relation."""
+    starts = offsets[nodes].astype(np.int64)
+    lengths = offsets[nodes + 1] - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.int32)
+    # Position de chaque voisin : début de sa liste + rang dans la liste.
+    positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+    if type_mask is None:
+        return values[positions]
+    return values[positions[type_mask[types[positions]]]]
+
+
+def _encode_strings(strings: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def _decode_strings(blob: np.ndarray, offsets: np.ndarray) -> List[str]:
+    data = blob.tobytes()
+    return [data[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+
+
+class GraphSnapshot:
+    """Vue immuable du graphe de code en adjacence CSR ; `refresh` retourne un nouveau snapshot."""
+
+    def __init__(
+        self,
+        version: int,
+        entity_ids: np.ndarray,
+        name_codes: np.ndarray,
+        type_codes: np.ndarray,
+        file_codes: np.ndarray,
+        out_offsets: np.ndarray,
+        out_targets: np.ndarray,
+        out_types: np.ndarray,
+        in_offsets: np.ndarray,
+        in_sources: np.ndarray,
+        in_types: np.ndarray,
+        names: List[str],
+        files: List[str],
+        entity_types: List[str],
+        relationship_types: List[str]
+    ):
+        self.version = version
+        self.entity_ids = entity_ids
+        self.name_codes = name_codes
+        self.type_codes = type_codes
+        self.file_codes = file_codes
+        self.out_offsets = out_offsets
+        self.out_targets = out_targets
+        self.out_types = out_types
+        self.in_offsets = in_offsets
+        self.in_sources = in_sources
+        self.in_types = in_types
+        self.names = names
+        self.files = files
+        self.entity_types = entity_types
+        self.relationship_types = relationship_types
+        self._name_lookup: Optional[Dict[str, int]] = None
+        self._nodes_by_name: Optional[np.ndarray] = None
+        self._sorted_name_codes: Optional[np.ndarray] = None
+
+    # ------------------------------------------------------------------ construction
+
+    @classmethod
+    async def load(cls, repo) -> "GraphSnapshot":
+        """Construit un snapshot complet à partir d'un SQLiteGraphRepository."""
+        export = await repo.export_graph()
+        snapshot = cls._from_rows(export["version"], export["entities"], export["relationships"], [], [], [], [])
+        logger.info(f"Graph snapshot v{snapshot.version} loaded: {snapshot.num_nodes} nodes, {snapshot.num_edges} edges.")
+        return snapshot
+
+    async def refresh(self, repo) -> "GraphSnapshot":
+        """
+        Nouveau snapshot intégrant les fichiers écrits depuis `self.version` : leurs entités et les
+        relations qui les touchent sont rechargées, le reste est repris tel quel (sans requête SQL).
+        """
+        export = await repo.export_graph(since_version=self.version)
+        if export["version"] < self.version:
+            # Base recréée entre-temps : les versions ne sont plus comparables.
+            return await GraphSnapshot.load(repo)
+        if not export["changed_files"]:
+            return self
+
+        # Fichiers modifiés : retirer leurs nœuds et toutes les relations qui les touchent.
+        changed = set(export["changed_files"])
+        changed_codes = np.array([code for code, path in enumerate(self.files) if path in changed], dtype=np.int32)
+        kept_nodes = ~np.isin(self.file_codes, changed_codes)
+        sources = np.repeat(np.arange(self.num_nodes, dtype=np.int32), np.diff(self.out_offsets))
+        kept_edges = kept_nodes[sources] & kept_nodes[self.out_targets]
+
+        kept_entities = (
+            self.entity_ids[kept_nodes], self.name_codes[kept_nodes],
+            self.type_codes[kept_nodes], self.file_codes[kept_nodes]
+        )
+        kept_relationships = (
+            self.entity_ids[sources[kept_edges]], self.entity_ids[self.out_targets[kept_edges]], self.out_types[kept_edges]
+        )
+        snapshot = GraphSnapshot._from_rows(
+            export["version"], export["entities"], export["relationships"],
+            list(self.names), list(self.files), list(self.entity_types), list(self.relationship_types),
+            kept_entities, kept_relationships
+        )
+        logger.info(
+            f"Graph snapshot refreshed v{self.version} -> v{snapshot.version}: "
+            f"{len(changed)} files, {snapshot.num_nodes} nodes, {snapshot.num_edges} edges."
+        )
+        return snapshot
+
+    @classmethod
+    def _from_rows(
+        cls,
+        version: int,
+        entity_rows: Sequence[Tuple[int, str, str, str]],
+        relationship_rows: Sequence[Tuple[int, int, str]],
+        names: List[str],
+        files: List[str],
+        entity_types: List[str],
+        relationship_types: List[str],
+        kept_entities: Optional[Tuple[np.ndarray, ...]] = None,
+        kept_relationships: Optional[Tuple[np.ndarray, ...]] = None
+    ) -> "GraphSnapshot":
+        """Interne les chaînes des nouvelles lignes, fusionne avec les lignes conservées et construit le CSR."""
+        tables = [(names, {s: i for i, s in enumerate(names)}), (entity_types, {s: i for i, s in enumerate(entity_types)}),
+                  (files, {s: i for i, s in enumerate(files)}), (relationship_types, {s: i for i, s in enumerate(relationship_types)})]
+
+        def intern(table: int, value: str) -> int:
+            strings, codes = tables[table]
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(strings)
+                strings.append(value)
+            return code
+
+        ids = np.fromiter((row[0] for row in entity_rows), dtype=np.int64, count=len(entity_rows))
+        new_names = np.fromiter((intern(0, row[1]) for row in entity_rows), dtype=np.int32, count=len(entity_rows))
+        new_types = np.fromiter((intern(1, row[2]) for row in entity_rows), dtype=np.int8, count=len(entity_rows))
+        new_files = np.fromiter((intern(2, row[3]) for row in entity_rows), dtype=np.int32, count=len(entity_rows))
+        edge_sources = np.fromiter((row[0] for row in relationship_rows), dtype=np.int64, count=len(relationship_rows))
+        edge_targets = np.fromiter((row[1] for row in relationship_rows), dtype=np.int64, count=len(relationship_rows))
+        edge_types = np.fromiter((intern(3, row[2]) for row in relationship_rows), dtype=np.int8, count=len(relationship_rows))
+
+        if kept_entities is not None:
+            ids, new_names, new_types, new_files = (
+                np.concatenate([kept, new]) for kept, new in zip(kept_entities, (ids, new_names, new_types, new_files))
+            )
+            edge_sources, edge_targets, edge_types = (
+                np.concatenate([kept, new]) for kept, new in zip(kept_relationships, (edge_sources, edge_targets, edge_types))
+            )
+
+        # Nœuds triés par ID d'entité : l'indice d'une entité s'obtient par recherche dichotomique.
+        order = np.argsort(ids, kind="stable")
+        ids, new_names, new_types, new_files = ids[order], new_names[order], new_types[order], new_files[order]
+        source_index = np.searchsorted(ids, edge_sources)
+        target_index = np.searchsorted(ids, edge_targets)
+        n = ids.size
+        # Une relation dont une extrémité est absente (écriture concurrente) est ignorée jusqu'au prochain rafraîchissement.
+        valid = (source_index < n) & (target_index < n)
+        valid[valid] &= (ids[source_index[valid]] == edge_sources[valid]) & (ids[target_index[valid]] == edge_targets[valid])
+        source_index, target_index, edge_types = source_index[valid], target_index[valid], edge_types[valid]
+
+        out_offsets, out_targets, out_types = _build_csr(n, source_index, target_index, edge_types)
+        in_offsets, in_sources, in_types = _build_csr(n, target_index, source_index, edge_types)
+        return cls(
+            version, ids, new_names, new_types, new_files,
+            out_offsets, out_targets, out_types, in_offsets, in_sources, in_types,
+            names, files, entity_types, relationship_types
+        )
+
+    # ------------------------------------------------------------------ requêtes
+
+    @property
+    def num_nodes(self) -> int:
+        return int(self.entity_ids.size)
+
+    @property
+    def num_edges(self) -> int:
+        return int(self.out_targets.size)
+
+    def find(self, name: str, file_path: Optional[str] = None) -> np.ndarray:
+        """Indices des nœuds portant ce nom (et appartenant à ce fichier, si fourni)."""
+        if self._name_lookup is None:
+            # Construits au premier appel : dictionnaire des noms, nœuds triés par code de nom et
+            # codes triés. `refresh` rend un nouveau snapshot : ces index ne sont jamais périmés.
+            self._name_lookup = {s: i for i, s in enumerate(self.names)}
+            self._nodes_by_name = np.argsort(self.name_codes, kind="stable")
+            self._sorted_name_codes = self.name_codes[self._nodes_by_name]
+        code = self._name_lookup.get(name)
+        if code is None:
+            return np.zeros(0, dtype=np.int64)
+        start, stop = np.searchsorted(self._sorted_name_codes, [code, code + 1])
+        nodes = self._nodes_by_name[start:stop]
+        if file_path is not None:
+            nodes = nodes[[self.files[self.file_codes[i]] == file_path for i in nodes]]
+        return nodes
+
+    def node(self, index: int) -> Dict[str, Any]:
+        """Description d'un nœud : id d'entité, nom, type et fichier."""
+        return {
+            "id": int(self.entity_ids[index]),
+            "name": self.names[self.name_codes[index]],
+            "type": self.entity_types[self.type_codes[index]],
+            "file_path": self.files[self.file_codes[index]],
+        }
+
+    def successors(self, index: int, relationship_types: Optional[List[str]] = None) -> np.ndarray:
+        return _gather(self.out_offsets, self.out_targets, self.out_types, np.array([index]), self._type_mask(relationship_types))
+
+    def predecessors(self, index: int, relationship_types: Optional[List[str]] = None) -> np.ndarray:
+        return _gather(self.in_offsets, self.in_sources, self.in_types, np.array([index]), self._type_mask(relationship_types))
+
+    def out_degree(self) -> np.ndarray:
+        """Degré sortant de chaque nœud."""
+        return np.diff(self.out_offsets)
+
+    def in_degree(self) -> np.ndarray:
+        """Degré entrant de chaque nœud."""
+        return np.diff(self.in_offsets)
+
+    def top_degree(self, k: int = 10, direction: str = "incoming") -> List[Dict[str, Any]]:
+        """Les `k` nœuds de plus fort degré (ex: fonctions les plus appelées avec "incoming")."""
+        if direction not in _DIRECTIONS:
+            raise RepositoryError(f"Invalid direction {direction!r}, expected one of {list(_DIRECTIONS)}")
+        degrees = {
+            "incoming": self.in_degree,
+            "outgoing": self.out_degree,
+            "both": lambda: self.in_degree() + self.out_degree(),
+        }[direction]()
+        k = min(k, self.num_nodes)
+        if k <= 0:
+            return []
+        top = np.argpartition(-degrees, k - 1)[:k]
+        top = top[np.argsort(-degrees[top], kind="stable")]
+        return [{**self.node(i), "degree": int(degrees[i])} for i in top]
+
+    def bfs(
+        self,
+        sources: np.ndarray,
+        max_depth: int,
+        direction: str = "outgoing",
+        relationship_types: Optional[List[str]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Parcours en largeur depuis `sources`, un niveau par itération vectorisée.
+
+        Returns:
+            Les indices des nœuds atteints (sources comprises) et leur distance.
+        """
+        if direction not in _DIRECTIONS:
+            raise RepositoryError(f"Invalid direction {direction!r}, expected one of {list(_DIRECTIONS)}")
+        type_mask = self._type_mask(relationship_types)
+        visited = np.zeros(self.num_nodes, dtype=bool)
+        frontier = np.unique(np.asarray(sources, dtype=np.int64))
+        visited[frontier] = True
+        levels = [frontier]
+        for _ in range(max_depth):
+            reached = []
+            if direction in ("outgoing", "both"):
+                reached.append(_gather(self.out_offsets, self.out_targets, self.out_types, frontier, type_mask))
+            if direction in ("incoming", "both"):
+                reached.append(_gather(self.in_offsets, self.in_sources, self.in_types, frontier, type_mask))
+            frontier = np.unique(np.concatenate(reached))
+            frontier = frontier[~visited[frontier]]
+            if frontier.size == 0:
+                break
+            visited[frontier] = True
+            levels.append(frontier)
+        # Les niveaux sont collectés au fil du parcours : pas de balayage final des n nœuds.
+        depths = np.concatenate([np.full(level.size, depth, dtype=np.int32) for depth, level in enumerate(levels)])
+        return np.concatenate(levels).astype(np.int64), depths
+
+    def neighborhood(
+        self,
+        entity_name: str,
+        max_depth: int = 2,
+        direction: str = "both",
+        relationship_types: Optional[List[str]] = None,
+        file_path: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Équivalent en mémoire de `SQLiteGraphRepository.get_neighborhood` (sans borne de fan-out) :
+        entités atteignables en au plus `max_depth` relations, triées par distance puis par nom.
+        """
+        sources = self.find(entity_name, file_path)
+        if sources.size == 0:
+            raise EntityNotFoundError(entity_name)
+        nodes, depths = self.bfs(sources, max_depth, direction, relationship_types)
+        results = [{**self.node(i), "depth": int(d)} for i, d in zip(nodes, depths) if d > 0]
+        results.sort(key=lambda r: (r["depth"], r["name"], r["file_path"]))
+        return results
+
+    def _type_mask(self, relationship_types: Optional[List[str]]) -> Optional[np.ndarray]:
+        if not relationship_types:
+            return None
+        return np.array([t in relationship_types for t in self.relationship_types] or [False], dtype=bool)
+
+    # ------------------------------------------------------------------ partage entre processus
+
+    def save(self, directory: str) -> None:
+        """
+        Écrit le snapshot dans `directory` (un fichier `.npy` par tableau). Le répertoire est
+        remplacé d'un bloc : les processus qui ont ouvert l'ancien le lisent jusqu'à sa fermeture.
+        """
+        tmp_dir = directory.rstrip(os.sep) + ".tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        for name in _ARRAYS:
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), getattr(self, name))
+        for name in ("names", "files"):
+            blob, offsets = _encode_strings(getattr(self, name))
+            np.save(os.path.join(tmp_dir, f"{name}_blob.npy"), blob)
+            np.save(os.path.join(tmp_dir, f"{name}_offsets.npy"), offsets)
+        with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "version": self.version,
+                "entity_types": self.entity_types,
+                "relationship_types": self.relationship_types,
+            }, f)
+
+        old_dir = directory.rstrip(os.sep) + ".old"
+        shutil.rmtree(old_dir, ignore_errors=True)
+        if os.path.exists(directory):
+            os.replace(directory, old_dir)
+        os.replace(tmp_dir, directory)
+        shutil.rmtree(old_dir, ignore_errors=True)
+        logger.info(f"Graph snapshot v{self.version} saved to {directory}.")
+
+    @classmethod
+    def open(cls, directory: str) -> "GraphSnapshot":
+        """Ouvre un snapshot sauvegardé ; les tableaux sont mappés en mémoire, en lecture seule."""
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r") for name in _ARRAYS}
+        strings = {
+            name: _decode_strings(
+                np.load(os.path.join(directory, f"{name}_blob.npy"), mmap_mode="r"),
+                np.load(os.path.join(directory, f"{name}_offsets.npy"))
+            )
+            for name in ("names", "files")
+        }
+        with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        return cls(
+            meta["version"], **arrays, **strings,
+            entity_types=meta["entity_types"], relationship_types=meta["relationship_types"]
+        )
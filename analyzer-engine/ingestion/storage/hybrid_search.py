@@ -0,0 +1,119 @@
+# FICHIER: analyzer-engine/ingestion/storage/hybrid_search.py
+"""
+Recherche hybride côté client : fusion par rang réciproque (RRF) des résultats
+vectoriels d'un IVectorRepository et des résultats BM25 d'un LexicalIndex.
+
+Contrairement à `IVectorRepository.hybrid_search`, rien ne dépend d'une fonction SQL :
+le même code fonctionne avec PostgreSQL comme avec le store embarqué.
+"""
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from core.contracts.vector_repository_contract import IVectorRepository
+from core.models.db import ChunkResult
+from .lexical_index import LexicalIndex
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RRF_K = 60
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[str]],
+    weights: Optional[Sequence[float]] = None,
+    k: int = DEFAULT_RRF_K
+) -> List[Tuple[str, float]]:
+    """
+    Fusionne des classements par rang réciproque : score(d) = Σ poids_i / (k + rang_i(d)).
+
+    Le score est ramené dans [0, 1] en le divisant par le maximum atteignable
+    (premier de chaque classement).
+
+    Returns:
+        Les identifiants et leur score fusionné, du meilleur au moins bon.
+    """
+    weights = list(weights) if weights is not None else [1.0] * len(rankings)
+    scores: Dict[str, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + weight / (k + rank)
+    best = sum(weights) / (k + 1)
+    fused = [(item, score / best if best > 0 else 0.0) for item, score in scores.items()]
+    fused.sort(key=lambda pair: pair[1], reverse=True)
+    return fused
+
+
+class HybridSearcher:
+    """Recherche hybride (vecteur + BM25) utilisable avec n'importe quel IVectorRepository."""
+
+    def __init__(self, vector_repo: IVectorRepository, lexical_index: LexicalIndex, rrf_k: int = DEFAULT_RRF_K, candidates: int = 50):
+        """
+        Args:
+            rrf_k: Constante de lissage de la fusion RRF.
+            candidates: Nombre minimal de résultats demandés à chaque source avant fusion.
+        """
+        self.vector_repo = vector_repo
+        self.lexical_index = lexical_index
+        self.rrf_k = rrf_k
+        self.candidates = candidates
+
+    async def search(
+        self,
+        embedding: Sequence[float],
+        query_text: str,
+        limit: int,
+        text_weight: float = 0.3,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None
+    ) -> List[ChunkResult]:
+        """
+        Recherche hybride : `text_weight` pondère le classement BM25, `1 - text_weight`
+        le classement vectoriel. Les chunks trouvés uniquement par BM25 sont chargés
+        depuis le repository via `get_chunks`.
+        """
+        pool = max(limit, self.candidates)
+        vector_results = await self.vector_repo.vector_search(embedding, pool, ef_search=ef_search, probes=probes)
+        lexical_results = self.lexical_index.search(query_text, pool)
+
+        fused = reciprocal_rank_fusion(
+            [[r.chunk_id for r in vector_results], [chunk_id for chunk_id, _ in lexical_results]],
+            weights=[1 - text_weight, text_weight],
+            k=self.rrf_k
+        )
+
+        by_id = {r.chunk_id: r for r in vector_results}
+        results: List[ChunkResult] = []
+        start = 0
+        # Un chunk de l'index lexical absent du repository (index en retard) est ignoré et le
+        # suivant du classement prend sa place : les chunks manquants sont chargés par lots.
+        while len(results) < limit and start < len(fused):
+            window = fused[start:start + limit - len(results)]
+            start += len(window)
+            missing = [chunk_id for chunk_id, _ in window if chunk_id not in by_id]
+            if missing:
+                by_id.update((r.chunk_id, r) for r in await self.vector_repo.get_chunks(missing))
+            results.extend(by_id[chunk_id].model_copy(update={"score": score}) for chunk_id, score in window if chunk_id in by_id)
+        return results
+
+async def rebuild_lexical_index(vector_repo: IVectorRepository, lexical_index: LexicalIndex, page_size: int = 500) -> int:
+    """
+    Reconstruit l'index lexical à partir des chunks déjà stockés dans le repository
+    (première mise en service, ou index perdu).
+
+    Returns:
+        Le nombre de chunks indexés.
+    """
+    indexed = 0
+    cursor = None
+    while True:
+        page = await vector_repo.list_documents_page(page_size, cursor)
+        for document in page.documents:
+            chunks = await vector_repo.get_document_chunks(document.id)
+            indexed += lexical_index.add_document(
+                document.source, [{"id": str(c["chunk_id"]), "content": c["content"]} for c in chunks]
+            )
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    logger.info(f"Lexical index rebuilt: {indexed} chunks.")
+    return indexed
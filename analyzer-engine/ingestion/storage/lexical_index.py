@@ -0,0 +1,252 @@
+# FICHIER: analyzer-engine/ingestion/storage/lexical_index.py
+"""
+Index inversé local du contenu des chunks, avec score BM25.
+
+La tokenisation est celle du code (`tokenize_code`) : `getUserById` est indexé sous
+`getuserbyid`, `get`, `user`, `by` et `id`, ce que la recherche plein texte de
+PostgreSQL ne sait pas faire.
+
+Représentation compacte : une liste de postings par terme, stockée dans des
+`array` typés (uint32 pour les numéros de chunk, uint16 pour les fréquences) et lue
+sans copie par NumPy au moment du score. Remplacer un document marque ses anciens
+chunks comme supprimés ; l'index est compacté quand ces chunks deviennent majoritaires,
+et avant chaque sauvegarde (format CSR dans un fichier `.npz`).
+"""
+import os
+import math
+import logging
+from array import array
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..code_tokenizer import tokenize_code
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_PATH = os.path.join(".jabbarroot_data", "lexical_index.npz")
+_MAX_FREQUENCY = 0xFFFF
+
+
+class LexicalIndex:
+    """Index inversé BM25 des chunks, mis à jour document par document."""
+
+    def __init__(self, path: Optional[str] = None, k1: float = 1.2, b: float = 0.75):
+        """
+        Args:
+            path: Fichier de sauvegarde (chargé s'il existe), ou None pour un index en mémoire.
+            k1: Saturation de la fréquence des termes (BM25).
+            b: Poids de la normalisation par la longueur du chunk (BM25).
+        """
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self.dirty = False
+        self._reset()
+        if path is not None and os.path.exists(path):
+            self._load(path)
+
+    def _reset(self) -> None:
+        self._term_ids: Dict[str, int] = {}
+        self._postings: List[array] = []
+        self._frequencies: List[array] = []
+        self._chunk_ids: List[str] = []
+        self._sources: List[str] = []
+        self._lengths = array('I')
+        self._live = bytearray()
+        self._ordinals_by_source: Dict[str, List[int]] = {}
+        self._live_count = 0
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return self._live_count
+
+    # ------------------------------------------------------------------ mise à jour
+
+    def add_document(self, source: str, chunks: List[Dict[str, Any]]) -> int:
+        """
+        Indexe les chunks d'un document, en remplaçant ceux déjà indexés pour cette source.
+        Les chunks sans `id` sont ignorés (ils ne pourraient pas être rapprochés du store vectoriel).
+
+        Returns:
+            Le nombre de chunks indexés.
+        """
+        self.remove_document(source)
+        ordinals = []
+        for chunk in chunks:
+            if not chunk.get('id'):
+                continue
+            ordinal = len(self._chunk_ids)
+            counts = Counter(tokenize_code(chunk['content']))
+            for term, count in counts.items():
+                term_id = self._term_ids.get(term)
+                if term_id is None:
+                    term_id = self._term_ids[term] = len(self._postings)
+                    self._postings.append(array('I'))
+                    self._frequencies.append(array('H'))
+                self._postings[term_id].append(ordinal)
+                self._frequencies[term_id].append(min(count, _MAX_FREQUENCY))
+            length = sum(counts.values())
+            self._chunk_ids.append(str(chunk['id']))
+            self._sources.append(source)
+            self._lengths.append(length)
+            self._live.append(1)
+            self._live_count += 1
+            self._total_length += length
+            ordinals.append(ordinal)
+        if ordinals:
+            self._ordinals_by_source[source] = ordinals
+            self.dirty = True
+        return len(ordinals)
+
+    def remove_document(self, source: str) -> None:
+        """Retire de l'index les chunks d'un document (marqués supprimés jusqu'au compactage)."""
+        ordinals = self._ordinals_by_source.pop(source, None)
+        if not ordinals:
+            return
+        for ordinal in ordinals:
+            self._live[ordinal] = 0
+            self._total_length -= self._lengths[ordinal]
+        self._live_count -= len(ordinals)
+        self.dirty = True
+        if len(self._chunk_ids) - self._live_count > self._live_count:
+            self.compact()
+
+    def compact(self) -> None:
+        """Réécrit les postings sans les chunks supprimés et renumérote les chunks restants."""
+        live = np.frombuffer(self._live, dtype=np.uint8).astype(bool)
+        if live.all():
+            return
+        remap = np.cumsum(live, dtype=np.int64) - 1
+        term_ids: Dict[str, int] = {}
+        postings: List[array] = []
+        frequencies: List[array] = []
+        for term, term_id in self._term_ids.items():
+            docs = np.frombuffer(self._postings[term_id], dtype=np.uint32)
+            kept = live[docs]
+            if not kept.any():
+                continue
+            term_ids[term] = len(postings)
+            postings.append(array('I', remap[docs[kept]].astype(np.uint32).tobytes()))
+            frequencies.append(array('H', np.frombuffer(self._frequencies[term_id], dtype=np.uint16)[kept].tobytes()))
+
+        kept_ordinals = np.flatnonzero(live)
+        self._term_ids, self._postings, self._frequencies = term_ids, postings, frequencies
+        self._chunk_ids = [self._chunk_ids[i] for i in kept_ordinals]
+        self._sources = [self._sources[i] for i in kept_ordinals]
+        self._lengths = array('I', np.frombuffer(self._lengths, dtype=np.uint32)[kept_ordinals].tobytes())
+        self._live = bytearray(b'\x01' * len(self._chunk_ids))
+        self._ordinals_by_source = {}
+        for ordinal, source in enumerate(self._sources):
+            self._ordinals_by_source.setdefault(source, []).append(ordinal)
+
+    # ------------------------------------------------------------------ recherche
+
+    def search(self, query: str, limit: int) -> List[Tuple[str, float]]:
+        """
+        Retourne les `limit` meilleurs chunks pour la requête, par score BM25 décroissant.
+
+        Returns:
+            Une liste de couples (chunk_id, score BM25).
+        """
+        terms = [term for term in dict.fromkeys(tokenize_code(query)) if term in self._term_ids]
+        if not terms or self._live_count == 0 or limit <= 0:
+            return []
+
+        live = np.frombuffer(self._live, dtype=np.uint8).astype(bool)
+        lengths = np.frombuffer(self._lengths, dtype=np.uint32)
+        average_length = max(self._total_length / self._live_count, 1.0)
+        scores = np.zeros(len(self._chunk_ids), dtype=np.float32)
+        for term in terms:
+            term_id = self._term_ids[term]
+            docs = np.frombuffer(self._postings[term_id], dtype=np.uint32)
+            kept = live[docs]
+            docs = docs[kept]
+            if docs.size == 0:
+                continue
+            tf = np.frombuffer(self._frequencies[term_id], dtype=np.uint16)[kept].astype(np.float32)
+            idf = math.log(1 + (self._live_count - docs.size + 0.5) / (docs.size + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * lengths[docs] / average_length)
+            # Un chunk figure au plus une fois par liste de postings : l'addition indexée est sûre.
+            scores[docs] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        candidates = np.flatnonzero(scores > 0)
+        if candidates.size > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+        ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(self._chunk_ids[i], float(scores[i])) for i in ranked]
+
+    def stats(self) -> Dict[str, int]:
+        """Taille de l'index : termes, chunks vivants, chunks supprimés et postings."""
+        return {
+            "terms": len(self._term_ids),
+            "chunks": self._live_count,
+            "deleted_chunks": len(self._chunk_ids) - self._live_count,
+            "postings": sum(len(p) for p in self._postings),
+        }
+
+    # ------------------------------------------------------------------ persistance
+
+    def save(self, path: Optional[str] = None) -> None:
+        """Compacte puis écrit l'index (CSR) ; l'écriture passe par un fichier temporaire."""
+        path = path or self.path
+        if path is None:
+            raise ValueError("No path given to save the lexical index")
+        self.compact()
+        terms = list(self._term_ids)
+        term_ids = [self._term_ids[t] for t in terms]
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(self._postings[i]) for i in term_ids])
+        empty = np.zeros(0, dtype=np.uint32)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                terms=np.array(terms, dtype=str),
+                offsets=offsets,
+                postings=np.concatenate([np.frombuffer(self._postings[i], dtype=np.uint32) for i in term_ids] or [empty]),
+                frequencies=np.concatenate([np.frombuffer(self._frequencies[i], dtype=np.uint16) for i in term_ids] or [empty.astype(np.uint16)]),
+                chunk_ids=np.array(self._chunk_ids, dtype=str),
+                sources=np.array(self._sources, dtype=str),
+                lengths=np.frombuffer(self._lengths, dtype=np.uint32),
+                params=np.array([self.k1, self.b]),
+            )
+        os.replace(tmp_path, path)
+        self.dirty = False
+        logger.info(f"Lexical index saved to {path}: {self.stats()}")
+
+    def _load(self, path: str) -> None:
+        with np.load(path) as data:
+            offsets = data["offsets"]
+            postings = data["postings"].astype(np.uint32)
+            frequencies = data["frequencies"].astype(np.uint16)
+            for term_id, term in enumerate(data["terms"].tolist()):
+                self._term_ids[term] = term_id
+                start, stop = offsets[term_id], offsets[term_id + 1]
+                self._postings.append(array('I', postings[start:stop].tobytes()))
+                self._frequencies.append(array('H', frequencies[start:stop].tobytes()))
+            self._chunk_ids = data["chunk_ids"].tolist()
+            self._sources = data["sources"].tolist()
+            self._lengths = array('I', data["lengths"].astype(np.uint32).tobytes())
+        self._live = bytearray(b'\x01' * len(self._chunk_ids))
+        for ordinal, source in enumerate(self._sources):
+            self._ordinals_by_source.setdefault(source, []).append(ordinal)
+        self._live_count = len(self._chunk_ids)
+        self._total_length = int(np.frombuffer(self._lengths, dtype=np.uint32).sum())
+        logger.info(f"Lexical index loaded from {path}: {self.stats()}")
+
+
+def create_lexical_index() -> Optional[LexicalIndex]:
+    """
+    Crée l'index lexical configuré par LEXICAL_INDEX_ENABLED (défaut "true") et
+    LEXICAL_INDEX_PATH (":memory:" pour un index non persistant).
+
+    Returns:
+        Une instance de LexicalIndex, ou None si l'index est désactivé.
+    """
+    if os.getenv("LEXICAL_INDEX_ENABLED", "true").lower() in ("0", "false", "no"):
+        return None
+    path = os.getenv("LEXICAL_INDEX_PATH") or DEFAULT_INDEX_PATH
+    return LexicalIndex(path=None if path == ":memory:" else path)
@@ -0,0 +1,24 @@
+# FICHIER: analyzer-engine/ingestion/storage/pagination.py
+"""Curseurs opaques de pagination par clé (created_at, id), partagés par les repositories vectoriels."""
+import json
+import uuid
+import base64
+from datetime import datetime
+from typing import Tuple
+
+from core.exceptions.base_exceptions import RepositoryError
+
+
+def encode_cursor(created_at: datetime, document_id: str) -> str:
+    """Curseur opaque de pagination : position (created_at, id) du dernier document servi."""
+    payload = json.dumps([created_at.isoformat(), document_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Décode un curseur produit par `encode_cursor` ; lève RepositoryError s'il est invalide."""
+    try:
+        created_at, document_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return datetime.fromisoformat(created_at), str(uuid.UUID(document_id))
+    except (ValueError, TypeError, UnicodeError) as e:
+        raise RepositoryError(f"Invalid pagination cursor: {cursor!r}") from e
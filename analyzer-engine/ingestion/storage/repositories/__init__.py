@@ -0,0 +1,37 @@
+# FICHIER: analyzer-engine/ingestion/storage/repositories/__init__.py
+import os
+
+from core.contracts.repository_contract import ICodeRepository
+from core.contracts.vector_repository_contract import IVectorRepository
+from core.exceptions.base_exceptions import RepositoryError
+
+
+def create_vector_repository() -> IVectorRepository:
+    """
+    Crée le repository vectoriel choisi par VECTOR_STORE : "postgres" (défaut, pgvector)
+    ou "numpy" (store embarqué, sans serveur). Les imports sont différés pour ne charger
+    que le backend utilisé.
+    """
+    backend = (os.getenv("VECTOR_STORE") or "postgres").lower()
+    if backend == "postgres":
+        from .postgres_repository import PostgresRepository
+        return PostgresRepository()
+    if backend == "numpy":
+        from .numpy_vector_repository import create_numpy_vector_repository
+        return create_numpy_vector_repository()
+    raise RepositoryError(f"Unknown VECTOR_STORE backend: {backend!r} (expected 'postgres' or 'numpy')")
+
+
+def create_code_repository() -> ICodeRepository:
+    """
+    Crée le repository du graphe choisi par GRAPH_STORE : "sqlite" (défaut, une seule base,
+    SQLITE_DB_PATH) ou "sharded" (une base par dépôt dans GRAPH_SHARDS_DIR, écritures parallèles).
+    """
+    backend = (os.getenv("GRAPH_STORE") or "sqlite").lower()
+    if backend == "sqlite":
+        from .sqlite_graph_repository import SQLiteGraphRepository
+        return SQLiteGraphRepository()
+    if backend == "sharded":
+        from .sharded_graph_repository import ShardedGraphRepository
+        return ShardedGraphRepository()
+    raise RepositoryError(f"Unknown GRAPH_STORE backend: {backend!r} (expected 'sqlite' or 'sharded')")
@@ -0,0 +1,632 @@
+# FICHIER: analyzer-engine/ingestion/storage/repositories/numpy_vector_repository.py
+"""
+Implémentation embarquée du contrat IVectorRepository, sans serveur.
+
+- Les vecteurs (normalisés, float32) vivent dans une matrice mappée en mémoire
+  (`vectors.f32`) : une ligne par chunk, réutilisée après suppression.
+- Documents, chunks et file des ré-embeddings vivent dans une base SQLite (`store.sqlite`).
+- La recherche exacte est un produit matriciel suivi d'un `argpartition` (top-k en O(n)).
+- Un index IVF optionnel (`build_index`) restreint le calcul aux `probes` listes les plus
+  proches de la requête, pour les corpus de plusieurs millions de chunks.
+- Les vecteurs sont écrits dans des lignes libres et synchronisés sur disque avant la
+  validation de la transaction SQLite qui les référence : un arrêt brutal ne laisse
+  jamais un chunk pointer vers une ligne non écrite.
+
+Avec `path=None`, tout reste en mémoire (tests, exécutions éphémères).
+"""
+import os
+import json
+import uuid
+import sqlite3
+import logging
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.contracts.vector_repository_contract import IVectorRepository
+from core.models.db import ChunkResult, DocumentMetadata, DocumentPage
+from core.exceptions.base_exceptions import RepositoryError
+from ...code_tokenizer import tokenize_code
+from ..pagination import decode_cursor, encode_cursor
+from ..content_hash import default_content_hash
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_PATH = os.path.join(".jabbarroot_data", "vector_store")
+DEFAULT_DIMENSION = 768
+# Capacité initiale de la matrice, doublée à chaque extension.
+_INITIAL_CAPACITY = 1024
+# Lignes traitées par bloc lors de l'affectation aux listes IVF (borne la mémoire temporaire).
+_ASSIGN_BLOCK = 65536
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+    CREATE TABLE IF NOT EXISTS documents (
+        id TEXT PRIMARY KEY,
+        title TEXT NOT NULL,
+        source TEXT NOT NULL UNIQUE,
+        content TEXT NOT NULL,
+        metadata TEXT NOT NULL DEFAULT '{}',
+        content_hash TEXT,
+        chunk_count INTEGER NOT NULL DEFAULT 0,
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_documents_created_at_id ON documents (created_at DESC, id DESC);
+    CREATE TABLE IF NOT EXISTS chunks (
+        id TEXT PRIMARY KEY,
+        row INTEGER NOT NULL UNIQUE,
+        document_id TEXT NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+        content TEXT NOT NULL,
+        chunk_index INTEGER NOT NULL,
+        metadata TEXT NOT NULL DEFAULT '{}',
+        token_count INTEGER,
+        has_embedding INTEGER NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_chunks_document_id ON chunks (document_id, chunk_index);
+    CREATE TABLE IF NOT EXISTS embedding_dead_letters (
+        chunk_id TEXT PRIMARY KEY REFERENCES chunks(id) ON DELETE CASCADE,
+        error TEXT NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        created_at TEXT NOT NULL,
+        last_attempt_at TEXT
+    );
+    CREATE TABLE IF NOT EXISTS ivf_unindexed_rows (row INTEGER PRIMARY KEY);
+"""
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """Normalise chaque ligne (L2) : la similarité cosinus devient un simple produit scalaire."""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices des k meilleurs scores, triés par score décroissant (argpartition puis tri de k éléments)."""
+    if k >= scores.size:
+        return np.argsort(-scores, kind="stable")
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+class NumpyVectorRepository(IVectorRepository):
+    """Implémentation du contrat IVectorRepository en processus : matrice NumPy mappée + SQLite."""
+
+    def __init__(self, path: Optional[str] = DEFAULT_STORE_PATH, dimension: int = DEFAULT_DIMENSION, default_probes: int = 8):
+        """
+        Args:
+            path: Répertoire du store, ou None pour un store purement en mémoire.
+            dimension: Dimension des vecteurs.
+            default_probes: Listes IVF explorées par requête quand un index est construit.
+        """
+        self.path = path
+        self.dimension = dimension
+        self.default_probes = default_probes
+        self.conn: Optional[sqlite3.Connection] = None
+
+        self._matrix: Optional[np.ndarray] = None
+        self._valid = np.zeros(0, dtype=bool)
+        self._n_rows = 0
+        self._free_rows: List[int] = []
+
+        # Index IVF : centroïdes, lignes triées par liste (CSR) et lignes ajoutées depuis la construction.
+        self._centroids: Optional[np.ndarray] = None
+        self._list_rows: Optional[np.ndarray] = None
+        self._list_offsets: Optional[np.ndarray] = None
+        self._unindexed_rows: List[int] = []
+        logger.info(f"NumpyVectorRepository instance created at: {self.path or ':memory:'}")
+
+    # ------------------------------------------------------------------ cycle de vie
+
+    async def initialize(self) -> None:
+        if self.conn is not None:
+            return
+        try:
+            if self.path is not None:
+                os.makedirs(self.path, exist_ok=True)
+            db_path = os.path.join(self.path, "store.sqlite") if self.path is not None else ":memory:"
+            self.conn = sqlite3.connect(db_path, check_same_thread=False)
+            self.conn.row_factory = sqlite3.Row
+            self.conn.execute("PRAGMA foreign_keys = ON;")
+            if self.path is not None:
+                self.conn.execute("PRAGMA journal_mode = WAL;")
+                self.conn.execute("PRAGMA synchronous = NORMAL;")
+            self.conn.executescript(_SCHEMA)
+            self._load()
+            logger.info(f"NumpyVectorRepository initialized with {int(self._valid.sum())} vectors.")
+        except (sqlite3.Error, OSError, ValueError) as e:
+            logger.error(f"Failed to initialize NumpyVectorRepository: {e}", exc_info=True)
+            raise RepositoryError(f"Failed to initialize NumpyVectorRepository: {e}")
+
+    async def close(self) -> None:
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+        if isinstance(self._matrix, np.memmap):
+            self._matrix.flush()
+        self._matrix = None
+        logger.info("NumpyVectorRepository closed.")
+
+    def _load(self) -> None:
+        stored_dimension = self.conn.execute("SELECT value FROM meta WHERE key = 'dimension'").fetchone()
+        if stored_dimension is None:
+            self.conn.execute("INSERT INTO meta (key, value) VALUES ('dimension', ?)", (str(self.dimension),))
+            self.conn.commit()
+        elif int(stored_dimension[0]) != self.dimension:
+            raise RepositoryError(f"Store dimension is {stored_dimension[0]}, repository configured for {self.dimension}")
+
+        n_rows = self.conn.execute("SELECT value FROM meta WHERE key = 'n_rows'").fetchone()
+        self._n_rows = int(n_rows[0]) if n_rows else 0
+        self._open_matrix(max(_INITIAL_CAPACITY, self._n_rows))
+
+        self._valid = np.zeros(self._matrix.shape[0], dtype=bool)
+        used = np.zeros(self._matrix.shape[0], dtype=bool)
+        for row, has_embedding in self.conn.execute("SELECT row, has_embedding FROM chunks"):
+            used[row] = True
+            self._valid[row] = bool(has_embedding)
+        self._free_rows = np.flatnonzero(~used[:self._n_rows]).tolist()
+        self._load_index()
+
+    def _open_matrix(self, capacity: int) -> None:
+        """Ouvre (ou agrandit) la matrice des vecteurs à au moins `capacity` lignes."""
+        if self.path is None:
+            matrix = np.zeros((capacity, self.dimension), dtype=np.float32)
+            if self._matrix is not None:
+                matrix[:self._matrix.shape[0]] = self._matrix
+            self._matrix = matrix
+            return
+
+        file_path = os.path.join(self.path, "vectors.f32")
+        row_bytes = self.dimension * 4
+        current = os.path.getsize(file_path) // row_bytes if os.path.exists(file_path) else 0
+        if isinstance(self._matrix, np.memmap):
+            self._matrix.flush()
+            self._matrix = None
+        if current < capacity:
+            with open(file_path, "ab") as f:
+                f.truncate(capacity * row_bytes)
+            current = capacity
+        self._matrix = np.memmap(file_path, dtype=np.float32, mode="r+", shape=(current, self.dimension))
+
+    def _ensure_capacity(self, n_rows: int) -> None:
+        capacity = self._matrix.shape[0]
+        if n_rows <= capacity:
+            return
+        while capacity < n_rows:
+            capacity *= 2
+        self._open_matrix(capacity)
+        valid = np.zeros(capacity, dtype=bool)
+        valid[:self._valid.size] = self._valid
+        self._valid = valid
+
+    # ------------------------------------------------------------------ recherche
+
+    async def vector_search(self, embedding: Sequence[float], limit: int, ef_search: Optional[int] = None, probes: Optional[int] = None) -> List[ChunkResult]:
+        rows, scores = self._nearest_rows(embedding, limit, probes)
+        return self._to_results(rows, scores)
+
+    async def hybrid_search(self, embedding: Sequence[float], query_text: str, limit: int, text_weight: float, ef_search: Optional[int] = None, probes: Optional[int] = None) -> List[ChunkResult]:
+        """
+        Recherche hybride : les candidats sont les plus proches voisins vectoriels (pool élargi),
+        re-classés par similarité vectorielle et recouvrement des tokens de la requête.
+        Sans index lexical, un chunk absent du pool vectoriel ne peut pas remonter par le seul texte.
+        """
+        rows, vector_scores = self._nearest_rows(embedding, max(limit * 10, 100), probes)
+        if rows.size == 0:
+            return []
+        query_tokens = set(tokenize_code(query_text))
+        contents = self._contents_by_row(rows)
+        text_scores = np.array([
+            len(query_tokens & set(tokenize_code(contents[int(row)]))) / len(query_tokens) if query_tokens else 0.0
+            for row in rows
+        ], dtype=np.float32)
+        combined = vector_scores * (1 - text_weight) + text_scores * text_weight
+        order = _top_k(combined, limit)
+        return self._to_results(rows[order], combined[order])
+
+    def _nearest_rows(self, embedding: Sequence[float], limit: int, probes: Optional[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """Retourne les lignes des `limit` vecteurs les plus proches et leurs similarités cosinus."""
+        self._require_connection()
+        query = _normalize(self._as_vector(embedding))
+        empty = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        if limit <= 0:
+            return empty
+        if self._centroids is not None:
+            candidates = self._ivf_candidates(query, probes or self.default_probes)
+            if candidates.size == 0:
+                return empty
+            scores = self._matrix[candidates] @ query
+            order = _top_k(scores, limit)
+            return candidates[order], scores[order]
+
+        # Recherche exacte : produit sur la tranche contiguë (sans copie), lignes invalides écartées.
+        scores = self._matrix[:self._n_rows] @ query
+        scores[~self._valid[:self._n_rows]] = -np.inf
+        rows = _top_k(scores, limit)
+        rows = rows[np.isfinite(scores[rows])]
+        return rows, scores[rows]
+
+    def _ivf_candidates(self, query: np.ndarray, probes: int) -> np.ndarray:
+        lists = _top_k(self._centroids @ query, min(probes, self._centroids.shape[0]))
+        parts = [self._list_rows[self._list_offsets[l]:self._list_offsets[l + 1]] for l in lists]
+        candidates = np.concatenate(parts)
+        if self._unindexed_rows:
+            # Une ligne réutilisée peut figurer à la fois dans une liste et parmi les lignes non indexées.
+            candidates = np.unique(np.concatenate([candidates, np.asarray(self._unindexed_rows, dtype=np.int64)]))
+        return candidates[self._valid[candidates]]
+
+    def _contents_by_row(self, rows: np.ndarray) -> Dict[int, str]:
+        placeholders = ",".join("?" * len(rows))
+        cursor = self.conn.execute(f"SELECT row, content FROM chunks WHERE row IN ({placeholders})", [int(r) for r in rows])
+        return {row: content for row, content in cursor}
+
+    def _to_results(self, rows: np.ndarray, scores: np.ndarray) -> List[ChunkResult]:
+        if rows.size == 0:
+            return []
+        placeholders = ",".join("?" * len(rows))
+        records = {
+            record["row"]: record for record in self.conn.execute(
+                f"SELECT c.row, c.id, c.document_id, c.content, c.metadata, d.title, d.source "
+                f"FROM chunks c JOIN documents d ON d.id = c.document_id WHERE c.row IN ({placeholders})",
+                [int(r) for r in rows]
+            )
+        }
+        return [
+            ChunkResult(
+                chunk_id=record["id"], document_id=record["document_id"], content=record["content"],
+                score=float(score), metadata=json.loads(record["metadata"]),
+                document_title=record["title"], document_source=record["source"]
+            )
+            for row, score in zip(rows, scores)
+            if (record := records.get(int(row))) is not None
+        ]
+
+    # ------------------------------------------------------------------ index IVF
+
+    def build_index(self, n_lists: Optional[int] = None, iterations: int = 10, sample_size: int = 100_000, seed: int = 0) -> Dict[str, Any]:
+        """
+        Construit l'index IVF (k-means sphérique) sur les vecteurs présents.
+        Les vecteurs ajoutés ensuite sont parcourus exhaustivement jusqu'à la reconstruction.
+
+        Args:
+            n_lists: Nombre de listes (défaut : racine carrée du nombre de vecteurs).
+            iterations: Itérations de k-means.
+            sample_size: Taille de l'échantillon d'entraînement des centroïdes.
+        """
+        self._require_connection()
+        rows = np.flatnonzero(self._valid[:self._n_rows])
+        if rows.size == 0:
+            raise RepositoryError("Cannot build an index on an empty store")
+        n_lists = max(1, min(n_lists or int(np.sqrt(rows.size)), rows.size))
+
+        rng = np.random.default_rng(seed)
+        sample = self._matrix[rng.choice(rows, size=min(sample_size, rows.size), replace=False)]
+        centroids = sample[rng.choice(sample.shape[0], size=n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+            for l in range(n_lists):
+                members = sample[assignments == l]
+                # Liste vide : réinitialisée sur un point tiré au hasard.
+                centroids[l] = members.sum(axis=0) if members.size else sample[rng.integers(sample.shape[0])]
+            centroids = _normalize(centroids)
+
+        assignments = np.concatenate([
+            np.argmax(self._matrix[rows[i:i + _ASSIGN_BLOCK]] @ centroids.T, axis=1)
+            for i in range(0, rows.size, _ASSIGN_BLOCK)
+        ])
+        self._set_index(centroids, rows, assignments)
+        self._save_index(rows, assignments)
+        with self.conn:
+            self.conn.execute("DELETE FROM ivf_unindexed_rows")
+        logger.info(f"IVF index built: {n_lists} lists over {rows.size} vectors.")
+        return self.index_info()
+
+    def drop_index(self) -> None:
+        """Supprime l'index IVF : les recherches redeviennent exactes."""
+        self._centroids = self._list_rows = self._list_offsets = None
+        self._unindexed_rows = []
+        if self.path is not None and os.path.exists(os.path.join(self.path, "ivf.npz")):
+            os.remove(os.path.join(self.path, "ivf.npz"))
+        with self.conn:
+            self.conn.execute("DELETE FROM ivf_unindexed_rows")
+
+    def index_info(self) -> Dict[str, Any]:
+        if self._centroids is None:
+            return {"method": "exact", "vectors": int(self._valid.sum())}
+        return {
+            "method": "ivf",
+            "lists": int(self._centroids.shape[0]),
+            "indexed_rows": int(self._list_rows.size),
+            "unindexed_rows": len(self._unindexed_rows),
+            "default_probes": self.default_probes,
+        }
+
+    def _set_index(self, centroids: np.ndarray, rows: np.ndarray, assignments: np.ndarray) -> None:
+        order = np.argsort(assignments, kind="stable")
+        self._centroids = centroids.astype(np.float32)
+        self._list_rows = rows[order].astype(np.int64)
+        self._list_offsets = np.concatenate([[0], np.cumsum(np.bincount(assignments, minlength=centroids.shape[0]))])
+        self._unindexed_rows = []
+
+    def _save_index(self, rows: np.ndarray, assignments: np.ndarray) -> None:
+        if self.path is not None:
+            np.savez(os.path.join(self.path, "ivf.npz"), centroids=self._centroids, rows=rows, assignments=assignments)
+
+    def _load_index(self) -> None:
+        index_path = os.path.join(self.path, "ivf.npz") if self.path is not None else None
+        if index_path is None or not os.path.exists(index_path):
+            return
+        with np.load(index_path) as data:
+            self._set_index(data["centroids"], data["rows"], data["assignments"])
+        # Lignes hors index : absentes des listes, ou réécrites depuis la construction (elles
+        # figurent encore dans la liste de leur ancien vecteur).
+        unindexed = np.ones(self._valid.size, dtype=bool)
+        unindexed[self._list_rows] = False
+        for (row,) in self.conn.execute("SELECT row FROM ivf_unindexed_rows"):
+            unindexed[row] = True
+        self._unindexed_rows = np.flatnonzero(self._valid & unindexed).tolist()
+
+    # ------------------------------------------------------------------ lecture des documents
+
+    async def get_document(self, document_id: str) -> Optional[Dict[str, Any]]:
+        self._require_connection()
+        row = self.conn.execute("SELECT id, title, source, content, metadata FROM documents WHERE id = ?", (document_id,)).fetchone()
+        if row is None:
+            return None
+        return {**dict(row), "metadata": json.loads(row["metadata"])}
+
+    async def list_documents(self, limit: int, offset: int) -> List[DocumentMetadata]:
+        self._require_connection()
+        rows = self.conn.execute(
+            "SELECT * FROM documents ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?", (limit, offset)
+        ).fetchall()
+        return [self._to_document_metadata(row) for row in rows]
+
+    async def list_documents_page(self, limit: int, cursor: Optional[str] = None) -> DocumentPage:
+        self._require_connection()
+        if cursor is None:
+            rows = self.conn.execute(
+                "SELECT * FROM documents ORDER BY created_at DESC, id DESC LIMIT ?", (limit + 1,)
+            ).fetchall()
+        else:
+            created_at, document_id = decode_cursor(cursor)
+            rows = self.conn.execute(
+                "SELECT * FROM documents WHERE (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC LIMIT ?",
+                (created_at.isoformat(), document_id, limit + 1)
+            ).fetchall()
+        documents = [self._to_document_metadata(row) for row in rows[:limit]]
+        next_cursor = encode_cursor(documents[-1].created_at, documents[-1].id) if len(rows) > limit else None
+        return DocumentPage(documents=documents, next_cursor=next_cursor)
+
+    async def get_document_chunks(self, document_id: str) -> List[Dict[str, Any]]:
+        self._require_connection()
+        rows = self.conn.execute(
+            "SELECT id AS chunk_id, content, chunk_index, metadata FROM chunks WHERE document_id = ? ORDER BY chunk_index",
+            (document_id,)
+        ).fetchall()
+        return [{**dict(row), "metadata": json.loads(row["metadata"])} for row in rows]
+
+    async def get_chunks(self, chunk_ids: List[str]) -> List[ChunkResult]:
+        self._require_connection()
+        if not chunk_ids:
+            return []
+        placeholders = ",".join("?" * len(chunk_ids))
+        rows = [row for (row,) in self.conn.execute(f"SELECT row FROM chunks WHERE id IN ({placeholders})", list(chunk_ids))]
+        by_id = {r.chunk_id: r for r in self._to_results(np.asarray(rows, dtype=np.int64), np.zeros(len(rows), dtype=np.float32))}
+        return [by_id[chunk_id] for chunk_id in chunk_ids if chunk_id in by_id]
+
+    @staticmethod
+    def _to_document_metadata(row: sqlite3.Row) -> DocumentMetadata:
+        return DocumentMetadata(
+            id=row["id"], title=row["title"], source=row["source"], metadata=json.loads(row["metadata"]),
+            created_at=datetime.fromisoformat(row["created_at"]), updated_at=datetime.fromisoformat(row["updated_at"]),
+            chunk_count=row["chunk_count"]
+        )
+
+    # ------------------------------------------------------------------ écriture
+
+    async def save_document_with_chunks(self, file_path: str, document_content: str, chunks: List[Dict[str, Any]], document_metadata: Dict[str, Any], content_hash: Optional[str] = None) -> int:
+        self._require_connection()
+        rows_before = (self._n_rows, list(self._free_rows))
+        try:
+            with self.conn:
+                saved, writes, freed = self._save_document(file_path, document_content, chunks, document_metadata, content_hash)
+                self._write_vectors(writes)
+        except (sqlite3.Error, OSError) as e:
+            self._n_rows, self._free_rows = rows_before
+            raise RepositoryError(f"Failed to save document {file_path}: {e}")
+        self._apply_vector_writes(writes, freed)
+        return saved or 0
+
+    async def save_documents_with_chunks(self, documents: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        self._require_connection()
+        results: Dict[str, Dict[str, Any]] = {}
+        all_writes: List[Tuple[int, Optional[np.ndarray]]] = []
+        all_freed: List[int] = []
+        batch_rows_before = (self._n_rows, list(self._free_rows))
+        try:
+            with self.conn:
+                for doc in documents:
+                    file_path = doc['file_path']
+                    rows_before = (self._n_rows, list(self._free_rows))
+                    self.conn.execute("SAVEPOINT document_write")
+                    try:
+                        saved, writes, freed = self._save_document(
+                            file_path, doc['document_content'], doc['chunks'],
+                            doc['document_metadata'], doc.get('content_hash')
+                        )
+                        self.conn.execute("RELEASE SAVEPOINT document_write")
+                    except (sqlite3.Error, RepositoryError, ValueError, TypeError, KeyError) as e:
+                        self.conn.execute("ROLLBACK TO SAVEPOINT document_write")
+                        self.conn.execute("RELEASE SAVEPOINT document_write")
+                        # Les lignes allouées par le document annulé redeviennent disponibles.
+                        self._n_rows, self._free_rows = rows_before
+                        logger.error(f"Vector write failed for {file_path}, document skipped: {e}")
+                        results[file_path] = {"chunks_saved": 0, "error": str(e)}
+                        continue
+                    all_writes.extend(writes)
+                    all_freed.extend(freed)
+                    results[file_path] = {"chunks_saved": saved or 0, "unchanged": saved is None}
+                self._store_row_count()
+                self._write_vectors(all_writes)
+        except (sqlite3.Error, OSError) as e:
+            self._n_rows, self._free_rows = batch_rows_before
+            raise RepositoryError(f"Failed to save document batch: {e}")
+        self._apply_vector_writes(all_writes, all_freed)
+        return results
+
+    def _save_document(self, file_path: str, document_content: str, chunks: List[Dict[str, Any]], document_metadata: Dict[str, Any], content_hash: Optional[str]) -> Tuple[Optional[int], List[Tuple[int, Optional[np.ndarray]]], List[int]]:
+        """
+        Écrit document et chunks dans la transaction SQLite courante (upsert par source).
+        Les chunks reçoivent des lignes libres : celles de l'ancienne version restent référencées
+        jusqu'à la validation et ne sont libérées qu'ensuite. Retourne les écritures de vecteurs
+        et les lignes libérées. Le nombre de chunks vaut None si le contenu est inchangé.
+        """
+        if content_hash is None:
+            content_hash = default_content_hash(document_content, chunks)
+        vectors = [None if c.get('embedding') is None else self._as_vector(c['embedding']) for c in chunks]
+
+        now = _now()
+        existing = self.conn.execute("SELECT id, content_hash FROM documents WHERE source = ?", (file_path,)).fetchone()
+        freed: List[int] = []
+        if existing is not None:
+            if existing["content_hash"] == content_hash:
+                logger.info(f"Document {file_path} unchanged (hash {content_hash[:12]}), skipping.")
+                return None, [], []
+            document_id = existing["id"]
+            freed = [row for (row,) in self.conn.execute("SELECT row FROM chunks WHERE document_id = ?", (document_id,))]
+            self.conn.execute("DELETE FROM chunks WHERE document_id = ?", (document_id,))
+            self.conn.execute(
+                "UPDATE documents SET title = ?, content = ?, metadata = ?, content_hash = ?, chunk_count = ?, updated_at = ? WHERE id = ?",
+                (file_path, document_content, json.dumps(document_metadata), content_hash, len(chunks), now, document_id)
+            )
+        else:
+            document_id = str(uuid.uuid4())
+            self.conn.execute(
+                "INSERT INTO documents (id, title, source, content, metadata, content_hash, chunk_count, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (document_id, file_path, file_path, document_content, json.dumps(document_metadata), content_hash, len(chunks), now, now)
+            )
+
+        writes: List[Tuple[int, Optional[np.ndarray]]] = []
+        records = []
+        dead_letters = []
+        for c, vector in zip(chunks, vectors):
+            chunk_id = c.get('id') or str(uuid.uuid4())
+            row = self._allocate_row()
+            writes.append((row, vector))
+            records.append((chunk_id, row, document_id, c['content'], c['index'], json.dumps(c['metadata']), c.get('token_count'), vector is not None))
+            if vector is None:
+                dead_letters.append((chunk_id, c['metadata'].get('embedding_error') or 'missing embedding', now))
+
+        self.conn.executemany(
+            "INSERT INTO chunks (id, row, document_id, content, chunk_index, metadata, token_count, has_embedding) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            records
+        )
+        if dead_letters:
+            self.conn.executemany("INSERT INTO embedding_dead_letters (chunk_id, error, created_at) VALUES (?, ?, ?)", dead_letters)
+            logger.warning(f"{len(dead_letters)} chunk(s) of {file_path} queued for re-embedding.")
+        self._store_row_count()
+        return len(records), writes, freed
+
+    def _allocate_row(self) -> int:
+        if self._free_rows:
+            return self._free_rows.pop()
+        self._n_rows += 1
+        return self._n_rows - 1
+
+    def _store_row_count(self) -> None:
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('n_rows', ?)", (str(self._n_rows),))
+
+    def _write_vectors(self, writes: List[Tuple[int, Optional[np.ndarray]]]) -> None:
+        """
+        Écrit les vecteurs dans la matrice et les synchronise sur disque, dans la transaction
+        courante et avant sa validation. Avec un index IVF, les lignes écrites sont enregistrées
+        comme non indexées (une ligne réutilisée reste dans la liste de son ancien vecteur).
+        """
+        self._ensure_capacity(self._n_rows)
+        written = [row for row, vector in writes if vector is not None]
+        for row, vector in writes:
+            if vector is not None:
+                self._matrix[row] = _normalize(vector)
+        if self._centroids is not None and written:
+            self.conn.executemany("INSERT OR IGNORE INTO ivf_unindexed_rows (row) VALUES (?)", [(row,) for row in written])
+        if isinstance(self._matrix, np.memmap) and written:
+            self._matrix.flush()
+
+    def _apply_vector_writes(self, writes: List[Tuple[int, Optional[np.ndarray]]], freed: List[int]) -> None:
+        """Met à jour l'état en mémoire (lignes valides, libres, non indexées) après validation."""
+        for row in freed:
+            self._valid[row] = False
+        self._free_rows.extend(freed)
+        for row, vector in writes:
+            self._valid[row] = vector is not None
+            if vector is not None and self._centroids is not None:
+                self._unindexed_rows.append(row)
+
+    # ------------------------------------------------------------------ ré-embedding
+
+    async def get_pending_reembeds(self, limit: int, max_attempts: int) -> List[Dict[str, Any]]:
+        self._require_connection()
+        rows = self.conn.execute(
+            """
+            SELECT dl.chunk_id, c.content, c.chunk_index, c.token_count, dl.attempts, dl.error
+            FROM embedding_dead_letters dl JOIN chunks c ON c.id = dl.chunk_id
+            WHERE dl.attempts < ? ORDER BY dl.attempts, dl.created_at LIMIT ?
+            """,
+            (max_attempts, limit)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    async def update_chunk_embeddings(self, embeddings: Dict[str, Sequence[float]]) -> int:
+        self._require_connection()
+        if not embeddings:
+            return 0
+        vectors = {chunk_id: self._as_vector(embedding) for chunk_id, embedding in embeddings.items()}
+        placeholders = ",".join("?" * len(vectors))
+        rows = dict(self.conn.execute(f"SELECT id, row FROM chunks WHERE id IN ({placeholders})", list(vectors)).fetchall())
+        writes = [(row, vectors[chunk_id]) for chunk_id, row in rows.items()]
+        with self.conn:
+            self.conn.executemany("UPDATE chunks SET has_embedding = 1 WHERE id = ?", [(chunk_id,) for chunk_id in rows])
+            self.conn.executemany("DELETE FROM embedding_dead_letters WHERE chunk_id = ?", [(chunk_id,) for chunk_id in rows])
+            self._write_vectors(writes)
+        self._apply_vector_writes(writes, [])
+        return len(rows)
+
+    async def record_reembed_failures(self, chunk_ids: List[str], error: str) -> None:
+        self._require_connection()
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE embedding_dead_letters SET attempts = attempts + 1, error = ?, last_attempt_at = ? WHERE chunk_id = ?",
+                [(error, _now(), chunk_id) for chunk_id in chunk_ids]
+            )
+
+    # ------------------------------------------------------------------ utilitaires
+
+    def _as_vector(self, embedding: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        if vector.shape != (self.dimension,):
+            raise RepositoryError(f"Expected a vector of dimension {self.dimension}, got shape {vector.shape}")
+        return vector
+
+    def _require_connection(self) -> None:
+        if self.conn is None:
+            raise RepositoryError("NumpyVectorRepository not initialized.")
+
+
+def create_numpy_vector_repository() -> NumpyVectorRepository:
+    """
+    Crée le store embarqué configuré par NUMPY_VECTOR_STORE_PATH (":memory:" pour un store
+    non persistant), VECTOR_DIMENSION et NUMPY_VECTOR_STORE_PROBES.
+    """
+    path = os.getenv("NUMPY_VECTOR_STORE_PATH") or DEFAULT_STORE_PATH
+    return NumpyVectorRepository(
+        path=None if path == ":memory:" else path,
+        dimension=int(os.getenv("VECTOR_DIMENSION") or DEFAULT_DIMENSION),
+        default_probes=int(os.getenv("NUMPY_VECTOR_STORE_PROBES") or 8),
+    )
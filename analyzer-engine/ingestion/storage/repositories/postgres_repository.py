@@ -1,30 +1,140 @@
 # FICHIER: analyzer-engine/ingestion/storage/repositories/postgres_repository.py
 import os
 import json
+import uuid
+import struct
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 from contextlib import asynccontextmanager
 
 import asyncpg
+import numpy as np
 from asyncpg.pool import Pool
 from dotenv import load_dotenv
 
 from core.contracts.vector_repository_contract import IVectorRepository
-from core.models.db import ChunkResult, DocumentMetadata
+from core.models.db import ChunkResult, DocumentMetadata, DocumentPage
 from core.exceptions.base_exceptions import RepositoryError
+from ..search_cache import SearchResultCache, create_search_cache
+from ..pagination import decode_cursor, encode_cursor
+from ..content_hash import default_content_hash
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 
+
+def _to_vector_literal(embedding: Optional[Sequence[float]]) -> Optional[str]:
+    """
+    Formate un vecteur au format texte pgvector ('[0.1,0.2,...]'), ou None (NULL) si absent :
+    paramètres `vector` quand le codec binaire n'a pas pu être enregistré. Passer par float32 donne la représentation décimale la plus courte de chaque
+    composante, au lieu des 17+ chiffres de `str(list)` sur des floats Python.
+    """
+    if embedding is None:
+        return None
+    return '[' + ','.join(np.asarray(embedding, dtype=np.float32).astype(str)) + ']'
+
+
+# Format binaire de pgvector (vector_send/vector_recv) : int16 dim, int16 inutilisé,
+# puis `dim` float4, le tout en big-endian.
+_VECTOR_HEADER = struct.Struct('>HH')
+
+# Colonnes écrites par le COPY binaire, dans l'ordre des tuples d'enregistrements.
+CHUNK_COLUMNS = ('id', 'document_id', 'content', 'embedding', 'chunk_index', 'metadata', 'token_count')
+
+# Index ANN de chunks.embedding (voir sql/modules/00_documents_chunks.sql).
+VECTOR_INDEX_NAME = 'idx_chunks_embedding'
+
+# Postgres limite une requête à 32767 paramètres : 1000 lignes x 7 colonnes restent en dessous.
+_MULTIROW_INSERT_BATCH = 1000
+
+
+def _encode_vector(embedding: Sequence[float]) -> bytes:
+    """Encode un vecteur au format binaire pgvector, sans passer par sa représentation texte."""
+    values = np.asarray(embedding, dtype='>f4')
+    return _VECTOR_HEADER.pack(values.size, 0) + values.tobytes()
+
+
+def _decode_vector(data: bytes) -> np.ndarray:
+    """Décode un vecteur binaire pgvector en tableau float32 natif."""
+    dimension, _ = _VECTOR_HEADER.unpack_from(data)
+    return np.frombuffer(data, dtype='>f4', count=dimension, offset=_VECTOR_HEADER.size).astype(np.float32)
+
+
+def _encode_jsonb(value: Any) -> bytes:
+    """Encode une valeur Python au format binaire jsonb (octet de version 1 + texte JSON)."""
+    return b'\x01' + json.dumps(value).encode('utf-8')
+
+
+def _decode_jsonb(data: bytes) -> Any:
+    """Décode un jsonb binaire directement en objet Python."""
+    return json.loads(data[1:])
+
+
+async def _register_vector_codec(conn: asyncpg.Connection) -> bool:
+    """
+    Enregistre le codec binaire de `vector` dans le schéma où l'extension est installée
+    (le premier du search_path à la création : `public`, ou `extensions` chez certains
+    hébergeurs). Retourne False si l'extension est absente (schéma non appliqué).
+    """
+    schema = await conn.fetchval(
+        "SELECT n.nspname FROM pg_extension e JOIN pg_namespace n ON n.oid = e.extnamespace WHERE e.extname = 'vector'"
+    )
+    if schema is None:
+        return False
+    await conn.set_type_codec(
+        'vector', schema=schema,
+        encoder=_encode_vector, decoder=_decode_vector, format='binary'
+    )
+    return True
+
+
+async def _init_connection(conn: asyncpg.Connection) -> None:
+    """
+    Hook `init` du pool : enregistre sur chaque connexion les codecs binaires de `vector`
+    (vecteurs numpy envoyés et reçus sans représentation texte) et de `jsonb` (dict Python
+    en paramètre comme en résultat, sans json.dumps/json.loads aux points d'appel).
+    """
+    await conn.set_type_codec(
+        'jsonb', schema='pg_catalog',
+        encoder=_encode_jsonb, decoder=_decode_jsonb, format='binary'
+    )
+    if not await _register_vector_codec(conn):
+        # Les paramètres `vector` partiront en littéraux texte (voir PostgresRepository._vector_param).
+        logger.warning("pgvector extension not found: vector binary codec not registered.")
+
+
+_DOCUMENT_LIST_COLUMNS = "id::text, title, source, metadata, created_at, updated_at, chunk_count"
+
+
+def _positive_int(value: int, name: str) -> int:
+    """Valide un paramètre d'index ou de recherche interpolé dans du SQL ou passé à set_config."""
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise RepositoryError(f"{name} must be a positive integer, got {value!r}")
+    return value
+
+
+def _to_chunk_result(row: asyncpg.Record, score: float) -> ChunkResult:
+    return ChunkResult(
+        chunk_id=str(row["chunk_id"]), document_id=str(row["document_id"]), content=row["content"],
+        score=score, metadata=row["metadata"],
+        document_title=row["document_title"], document_source=row["document_source"]
+    )
+
+
 class PostgresRepository(IVectorRepository):
     """Implémentation du contrat IVectorRepository pour PostgreSQL avec pgvector."""
     
     _pool: Optional[Pool] = None
+    # Codec binaire de `vector` enregistré sur les connexions du pool (voir _init_connection).
+    _vector_codec: bool = True
 
-    def __init__(self):
+    def __init__(self, search_cache: Optional[SearchResultCache] = None, use_search_cache: bool = True):
         self.database_url = os.getenv("DATABASE_URL")
         if not self.database_url:
             raise RepositoryError("DATABASE_URL environment variable not set")
+        if search_cache is None and use_search_cache:
+            search_cache = create_search_cache()
+        self.search_cache: Optional[SearchResultCache] = search_cache if use_search_cache else None
         logger.info("PostgresRepository instance created.")
 
     async def initialize(self) -> None:
@@ -33,8 +143,11 @@ class PostgresRepository(IVectorRepository):
                 PostgresRepository._pool = await asyncpg.create_pool(
                     self.database_url,
                     min_size=5, max_size=20,
-                    command_timeout=60
+                    command_timeout=60,
+                    init=_init_connection
                 )
+                async with PostgresRepository._pool.acquire() as conn:
+                    PostgresRepository._vector_codec = await _register_vector_codec(conn)
                 logger.info("PostgreSQL connection pool initialized.")
             except Exception as e:
                 logger.error(f"Failed to initialize PostgreSQL pool: {e}", exc_info=True)
@@ -54,25 +167,139 @@ class PostgresRepository(IVectorRepository):
         async with self._pool.acquire() as connection:
             yield connection
 
-    async def vector_search(self, embedding: List[float], limit: int) -> List[ChunkResult]:
+    async def vector_search(self, embedding: Sequence[float], limit: int, ef_search: Optional[int] = None, probes: Optional[int] = None) -> List[ChunkResult]:
+        return await self._search(
+            "SELECT * FROM match_chunks({vector}, $2)", "similarity",
+            embedding, (limit,), ef_search, probes
+        )
+
+    async def hybrid_search(self, embedding: Sequence[float], query_text: str, limit: int, text_weight: float, ef_search: Optional[int] = None, probes: Optional[int] = None) -> List[ChunkResult]:
+        return await self._search(
+            "SELECT * FROM hybrid_search({vector}, $2, $3, $4)", "combined_score",
+            embedding, (query_text, limit, text_weight), ef_search, probes
+        )
+
+    async def _search(self, query: str, score_column: str, embedding: Sequence[float], params: tuple, ef_search: Optional[int], probes: Optional[int]) -> List[ChunkResult]:
+        """
+        Exécute une fonction de recherche, via le cache de résultats. `{vector}` marque dans
+        `query` le paramètre $1 du vecteur de requête.
+        `ef_search` (HNSW) et `probes` (IVFFlat) règlent le compromis rappel/latence pour
+        cette seule requête : ils sont appliqués par `set_config(..., true)`, équivalent de
+        SET LOCAL, dans une transaction dédiée.
+        """
+        key = self._cache_key(query, embedding, *params, ef_search, probes)
+        cached = self.search_cache.get(key) if self.search_cache is not None else None
+        if cached is not None:
+            return cached
+
+        generation = self.search_cache.generation if self.search_cache is not None else None
+        placeholder, vector = self._vector_param(1, embedding)
+        query = query.format(vector=placeholder)
+        async with self._get_connection() as conn:
+            if ef_search is None and probes is None:
+                rows = await conn.fetch(query, vector, *params)
+            else:
+                async with conn.transaction():
+                    if ef_search is not None:
+                        await conn.execute("SELECT set_config('hnsw.ef_search', $1, true)", str(_positive_int(ef_search, "ef_search")))
+                    if probes is not None:
+                        await conn.execute("SELECT set_config('ivfflat.probes', $1, true)", str(_positive_int(probes, "probes")))
+                    rows = await conn.fetch(query, vector, *params)
+        results = [_to_chunk_result(row, row[score_column]) for row in rows]
+        if self.search_cache is not None:
+            self.search_cache.put(key, results, generation)
+        return results
+
+    async def create_vector_index(
+        self,
+        method: str = "hnsw",
+        m: int = 16,
+        ef_construction: int = 64,
+        lists: int = 100,
+        concurrently: bool = False
+    ) -> Dict[str, Any]:
+        """
+        (Re)crée l'index ANN de `chunks.embedding` avec la méthode et les paramètres donnés.
+
+        Args:
+            method: 'hnsw' (meilleur rappel, construction plus lente) ou 'ivfflat'.
+            m, ef_construction: Paramètres de construction HNSW.
+            lists: Nombre de listes IVFFlat (règle usuelle : lignes / 1000, ou sqrt(lignes) au-delà d'un million).
+            concurrently: Construit l'index sans bloquer les écritures (plus lent), sous un nom
+                temporaire échangé avec l'ancien index une fois prêt. Sinon, suppression et
+                création forment une seule transaction. Dans les deux cas, un échec laisse
+                l'ancien index en place.
+        """
+        if method == "hnsw":
+            options = f"m = {_positive_int(m, 'm')}, ef_construction = {_positive_int(ef_construction, 'ef_construction')}"
+        elif method == "ivfflat":
+            options = f"lists = {_positive_int(lists, 'lists')}"
+        else:
+            raise RepositoryError(f"Unknown vector index method: {method!r} (expected 'hnsw' or 'ivfflat')")
+
+        definition = f"ON chunks USING {method} (embedding vector_cosine_ops) WITH ({options})"
+        async with self._get_connection() as conn:
+            if concurrently:
+                # Un build concurrent interrompu laisse un index invalide sous le nom temporaire.
+                building = f"{VECTOR_INDEX_NAME}_new"
+                await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {building}")
+                await conn.execute(f"CREATE INDEX CONCURRENTLY {building} {definition}")
+                async with conn.transaction():
+                    await conn.execute(f"DROP INDEX IF EXISTS {VECTOR_INDEX_NAME}")
+                    await conn.execute(f"ALTER INDEX {building} RENAME TO {VECTOR_INDEX_NAME}")
+            else:
+                async with conn.transaction():
+                    await conn.execute(f"DROP INDEX IF EXISTS {VECTOR_INDEX_NAME}")
+                    await conn.execute(f"CREATE INDEX {VECTOR_INDEX_NAME} {definition}")
+        logger.info(f"Vector index {VECTOR_INDEX_NAME} created with {method} ({options}).")
+        return await self.vector_index_info()
+
+    async def rebuild_vector_index(self, concurrently: bool = True) -> None:
+        """
+        Reconstruit l'index ANN avec ses paramètres actuels, par exemple après une ingestion
+        massive (les centroïdes IVFFlat sont figés à la création de l'index).
+        """
+        concurrent = " CONCURRENTLY" if concurrently else ""
         async with self._get_connection() as conn:
-            embedding_str = '[' + ','.join(map(str, embedding)) + ']'
-            rows = await conn.fetch("SELECT * FROM match_chunks($1::vector, $2)", embedding_str, limit)
-            return [ChunkResult(
-                chunk_id=row["chunk_id"], document_id=row["document_id"], content=row["content"],
-                score=row["similarity"], metadata=json.loads(row["metadata"]),
-                document_title=row["document_title"], document_source=row["document_source"]
-            ) for row in rows]
-
-    async def hybrid_search(self, embedding: List[float], query_text: str, limit: int, text_weight: float) -> List[ChunkResult]:
+            await conn.execute(f"REINDEX INDEX{concurrent} {VECTOR_INDEX_NAME}")
+        logger.info(f"Vector index {VECTOR_INDEX_NAME} rebuilt.")
+
+    async def vector_index_info(self) -> Dict[str, Any]:
+        """Retourne la méthode, la définition et la taille de l'index ANN (vide s'il n'existe pas)."""
         async with self._get_connection() as conn:
-            embedding_str = '[' + ','.join(map(str, embedding)) + ']'
-            rows = await conn.fetch("SELECT * FROM hybrid_search($1::vector, $2, $3, $4)", embedding_str, query_text, limit, text_weight)
-            return [ChunkResult(
-                chunk_id=row["chunk_id"], document_id=row["document_id"], content=row["content"],
-                score=row["combined_score"], metadata=json.loads(row["metadata"]),
-                document_title=row["document_title"], document_source=row["document_source"]
-            ) for row in rows]
+            row = await conn.fetchrow(
+                """
+                SELECT am.amname AS method, pg_get_indexdef(i.oid) AS definition,
+                       pg_relation_size(i.oid) AS size_bytes
+                FROM pg_class i JOIN pg_am am ON am.oid = i.relam
+                WHERE i.relname = $1 AND i.relkind = 'i'
+                """,
+                VECTOR_INDEX_NAME
+            )
+            return dict(row) if row else {}
+
+    @staticmethod
+    def _vector_param(index: int, embedding: Optional[Sequence[float]]) -> Tuple[str, Any]:
+        """
+        Paramètre `vector` n° `index` : tableau float32 envoyé par le codec binaire, ou, si le
+        codec n'est pas enregistré, littéral texte converti côté serveur (asyncpg ne sait pas
+        envoyer un tableau numpy par le codec texte).
+        """
+        if PostgresRepository._vector_codec:
+            return f"${index}", None if embedding is None else np.asarray(embedding, dtype=np.float32)
+        return f"${index}::text::vector", _to_vector_literal(embedding)
+
+    def _cache_key(self, kind: str, embedding: Sequence[float], *params):
+        return SearchResultCache.make_key(kind, embedding, *params) if self.search_cache is not None else None
+
+    def _invalidate_search_cache(self) -> None:
+        """Toute écriture rend les résultats de recherche en cache potentiellement périmés."""
+        if self.search_cache is not None:
+            self.search_cache.invalidate()
+
+    def search_cache_stats(self) -> Dict[str, float]:
+        """Métriques du cache de résultats (taux de succès, évictions, génération...)."""
+        return self.search_cache.snapshot() if self.search_cache is not None else {}
 
     async def get_document(self, document_id: str) -> Optional[Dict[str, Any]]:
         async with self._get_connection() as conn:
@@ -81,34 +308,209 @@ class PostgresRepository(IVectorRepository):
             
     async def list_documents(self, limit: int, offset: int) -> List[DocumentMetadata]:
         async with self._get_connection() as conn:
-            # Cette requête est simplifiée, on pourrait la rendre plus complexe au besoin
-            rows = await conn.fetch("SELECT d.id::text, d.title, d.source, d.created_at, d.updated_at, COUNT(c.id) AS chunk_count FROM documents d LEFT JOIN chunks c ON d.id = c.document_id GROUP BY d.id ORDER BY d.created_at DESC LIMIT $1 OFFSET $2", limit, offset)
+            # chunk_count est maintenu à l'écriture : plus d'agrégat sur la table chunks.
+            rows = await conn.fetch(
+                f"SELECT {_DOCUMENT_LIST_COLUMNS} FROM documents ORDER BY created_at DESC, id DESC LIMIT $1 OFFSET $2",
+                limit, offset
+            )
             return [DocumentMetadata(**dict(row)) for row in rows]
 
+    async def list_documents_page(self, limit: int, cursor: Optional[str] = None) -> DocumentPage:
+        # Pagination par clé (keyset) sur (created_at, id) : coût constant quelle que soit la page,
+        # via l'index idx_documents_created_at_id.
+        async with self._get_connection() as conn:
+            if cursor is None:
+                rows = await conn.fetch(
+                    f"SELECT {_DOCUMENT_LIST_COLUMNS} FROM documents ORDER BY created_at DESC, id DESC LIMIT $1",
+                    limit + 1
+                )
+            else:
+                created_at, document_id = decode_cursor(cursor)
+                rows = await conn.fetch(
+                    f"SELECT {_DOCUMENT_LIST_COLUMNS} FROM documents WHERE (created_at, id) < ($1, $2::uuid) "
+                    "ORDER BY created_at DESC, id DESC LIMIT $3",
+                    created_at, document_id, limit + 1
+                )
+        documents = [DocumentMetadata(**dict(row)) for row in rows[:limit]]
+        next_cursor = encode_cursor(documents[-1].created_at, documents[-1].id) if len(rows) > limit else None
+        return DocumentPage(documents=documents, next_cursor=next_cursor)
+
     async def get_document_chunks(self, document_id: str) -> List[Dict[str, Any]]:
         async with self._get_connection() as conn:
             rows = await conn.fetch("SELECT * FROM get_document_chunks($1::uuid)", document_id)
             return [dict(row) for row in rows]
             
-    async def save_document_with_chunks(self, file_path: str, document_content: str, chunks: List[Dict[str, Any]], document_metadata: Dict[str, Any]) -> int:
+    async def get_chunks(self, chunk_ids: List[str]) -> List[ChunkResult]:
+        if not chunk_ids:
+            return []
+        async with self._get_connection() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT c.id AS chunk_id, c.document_id, c.content, c.metadata,
+                       d.title AS document_title, d.source AS document_source
+                FROM chunks c JOIN documents d ON d.id = c.document_id
+                WHERE c.id = ANY($1::uuid[])
+                """,
+                chunk_ids
+            )
+        by_id = {str(row["chunk_id"]): _to_chunk_result(row, 0.0) for row in rows}
+        return [by_id[chunk_id] for chunk_id in chunk_ids if chunk_id in by_id]
+
+    async def save_document_with_chunks(self, file_path: str, document_content: str, chunks: List[Dict[str, Any]], document_metadata: Dict[str, Any], content_hash: Optional[str] = None) -> int:
         async with self._get_connection() as conn:
             async with conn.transaction():
+                saved = await self._save_document(conn, file_path, document_content, chunks, document_metadata, content_hash)
+        if saved is not None:
+            self._invalidate_search_cache()
+        return saved or 0
 
-                document_id = await conn.fetchval(
-                    "INSERT INTO documents (title, source, content, metadata) VALUES ($1, $2, $3, $4) RETURNING id",
-                    file_path, file_path, document_content, json.dumps(document_metadata)
-                )
+    async def save_documents_with_chunks(self, documents: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        async with self._get_connection() as conn:
+            async with conn.transaction():
+                results: Dict[str, Dict[str, Any]] = {}
+                for doc in documents:
+                    file_path = doc['file_path']
+                    try:
+                        # Transaction imbriquée = SAVEPOINT : un document en échec n'annule que ses écritures.
+                        async with conn.transaction():
+                            chunks_saved = await self._save_document(
+                                conn, file_path, doc['document_content'], doc['chunks'],
+                                doc['document_metadata'], doc.get('content_hash')
+                            )
+                        results[file_path] = {"chunks_saved": chunks_saved or 0, "unchanged": chunks_saved is None}
+                    except (asyncpg.PostgresError, asyncpg.InterfaceError, ValueError, TypeError, KeyError) as e:
+                        logger.error(f"Vector write failed for {file_path}, document skipped: {e}")
+                        results[file_path] = {"chunks_saved": 0, "error": str(e)}
+                logger.info(f"Vector batch write: {len(documents)} documents in one transaction.")
+        if any(not result.get("unchanged", True) for result in results.values()):
+            self._invalidate_search_cache()
+        return results
+
+    async def _save_document(self, conn: asyncpg.Connection, file_path: str, document_content: str, chunks: List[Dict[str, Any]], document_metadata: Dict[str, Any], content_hash: Optional[str]) -> Optional[int]:
+        """Écrit un document et ses chunks dans la transaction courante. Retourne None si le contenu est inchangé."""
+        if content_hash is None:
+            content_hash = default_content_hash(document_content, chunks)
+
+        # Upsert sur la source : le WHERE du DO UPDATE ne laisse passer que les contenus
+        # modifiés. Contenu inchangé => aucune ligne retournée => ré-ingestion sans effet.
+        row = await conn.fetchrow(
+            """
+            INSERT INTO documents (title, source, content, metadata, content_hash, chunk_count) VALUES ($1, $2, $3, $4, $5, $6)
+            ON CONFLICT (source) DO UPDATE
+                SET title = EXCLUDED.title, content = EXCLUDED.content,
+                    metadata = EXCLUDED.metadata, content_hash = EXCLUDED.content_hash,
+                    chunk_count = EXCLUDED.chunk_count
+                WHERE documents.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+            RETURNING id, (xmax = 0) AS inserted
+            """,
+            file_path, file_path, document_content, document_metadata, content_hash, len(chunks)
+        )
+        if row is None:
+            logger.info(f"Document {file_path} unchanged (hash {content_hash[:12]}), skipping.")
+            return None
+
+        document_id = row['id']
+        if not row['inserted']:
+            # Contenu modifié : les anciens chunks (et leurs lettres mortes, en cascade)
+            # sont remplacés dans la même transaction.
+            await conn.execute("DELETE FROM chunks WHERE document_id = $1", document_id)
+
+        # Les chunks sans embedding (échec du fournisseur) sont tout de même stockés,
+        # avec embedding NULL, et mis en file d'attente pour un ré-embedding ultérieur.
+        records = []
+        dead_letters = []
+        for c in chunks:
+            chunk_id = uuid.UUID(c['id']) if c.get('id') else uuid.uuid4()
+            embedding = c.get('embedding')
+            records.append((
+                chunk_id, document_id, c['content'],
+                None if embedding is None else np.asarray(embedding, dtype=np.float32),
+                c['index'], c['metadata'], c.get('token_count')
+            ))
+            if embedding is None:
+                dead_letters.append((chunk_id, c['metadata'].get('embedding_error') or 'missing embedding'))
+
+        if not records:
+            return 0
+
+        await self._insert_chunks(conn, records)
+        if dead_letters:
+            await conn.executemany(
+                "INSERT INTO embedding_dead_letters (chunk_id, error) VALUES ($1, $2)",
+                dead_letters
+            )
+            logger.warning(f"{len(dead_letters)} chunk(s) of {file_path} queued for re-embedding.")
+        return len(records)
+
+    async def _insert_chunks(self, conn: asyncpg.Connection, records: List[tuple]) -> None:
+        """
+        Insère les chunks par COPY binaire (vecteurs encodés par le codec pgvector).
+        Le COPY s'exécute dans un savepoint : en cas d'échec (droits...), on retombe sur des
+        INSERT multi-lignes sans annuler la transaction englobante. Sans codec pgvector, le COPY
+        binaire est impossible : les INSERT multi-lignes sont utilisés directement.
+        """
+        if not PostgresRepository._vector_codec:
+            await self._insert_chunks_multirow(conn, records)
+            return
+        try:
+            async with conn.transaction():
+                await conn.copy_records_to_table('chunks', records=records, columns=CHUNK_COLUMNS)
+        except (asyncpg.PostgresError, asyncpg.InterfaceError, ValueError, TypeError) as e:
+            logger.warning(f"Binary COPY of chunks failed ({e}); falling back to multi-row INSERT.")
+            await self._insert_chunks_multirow(conn, records)
 
-                chunks_to_insert = [
-                    (document_id, c['content'], str(c['embedding']), c['index'], json.dumps(c['metadata']), c.get('token_count'))
-                    for c in chunks if c.get('embedding') is not None
-                ]
+    async def _insert_chunks_multirow(self, conn: asyncpg.Connection, records: List[tuple], table: str = 'chunks') -> None:
+        """Insère les chunks par lots d'INSERT multi-lignes (une requête par lot)."""
+        width = len(CHUNK_COLUMNS)
+        columns = ', '.join(CHUNK_COLUMNS)
+        vector_col = CHUNK_COLUMNS.index('embedding')
+        for start in range(0, len(records), _MULTIROW_INSERT_BATCH):
+            batch = records[start:start + _MULTIROW_INSERT_BATCH]
+            rows, args = [], []
+            for row, record in enumerate(batch):
+                placeholders = [f'${row * width + col + 1}' for col in range(width)]
+                placeholders[vector_col], vector = self._vector_param(row * width + vector_col + 1, record[vector_col])
+                rows.append('(' + ', '.join(placeholders) + ')')
+                args.extend((*record[:vector_col], vector, *record[vector_col + 1:]))
+            await conn.execute(f"INSERT INTO {table} ({columns}) VALUES {', '.join(rows)}", *args)
 
-                if not chunks_to_insert:
-                    return 0
+    async def get_pending_reembeds(self, limit: int, max_attempts: int) -> List[Dict[str, Any]]:
+        async with self._get_connection() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT dl.chunk_id::text AS chunk_id, c.content, c.chunk_index, c.token_count, dl.attempts, dl.error
+                FROM embedding_dead_letters dl JOIN chunks c ON c.id = dl.chunk_id
+                WHERE dl.attempts < $2
+                ORDER BY dl.attempts, dl.created_at
+                LIMIT $1
+                """,
+                limit, max_attempts
+            )
+            return [dict(row) for row in rows]
 
+    async def update_chunk_embeddings(self, embeddings: Dict[str, Sequence[float]]) -> int:
+        if not embeddings:
+            return 0
+        async with self._get_connection() as conn:
+            async with conn.transaction():
+                placeholder, _ = self._vector_param(2, None)
                 await conn.executemany(
-                    "INSERT INTO chunks (document_id, content, embedding, chunk_index, metadata, token_count) VALUES ($1, $2, $3, $4, $5, $6)",
-                    chunks_to_insert
+                    f"UPDATE chunks SET embedding = {placeholder} WHERE id = $1::uuid",
+                    [(chunk_id, self._vector_param(2, embedding)[1]) for chunk_id, embedding in embeddings.items()]
+                )
+                await conn.execute(
+                    "DELETE FROM embedding_dead_letters WHERE chunk_id = ANY($1::uuid[])",
+                    list(embeddings)
                 )
-                return len(chunks_to_insert)
\ No newline at end of file
+        self._invalidate_search_cache()
+        return len(embeddings)
+
+    async def record_reembed_failures(self, chunk_ids: List[str], error: str) -> None:
+        if not chunk_ids:
+            return
+        async with self._get_connection() as conn:
+            await conn.execute(
+                "UPDATE embedding_dead_letters SET attempts = attempts + 1, error = $2, last_attempt_at = CURRENT_TIMESTAMP "
+                "WHERE chunk_id = ANY($1::uuid[])",
+                chunk_ids, error
+            )
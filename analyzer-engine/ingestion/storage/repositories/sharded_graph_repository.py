@@ -0,0 +1,332 @@
+# FICHIER: analyzer-engine/ingestion/storage/repositories/sharded_graph_repository.py
+"""
+Graphe du code réparti en shards SQLite : une base par dépôt (ou par clé configurable).
+
+- Chaque shard est un SQLiteGraphRepository avec sa propre connexion : les fichiers de
+  dépôts différents s'écrivent en parallèle au lieu d'attendre l'unique verrou d'écriture.
+- Les lectures passent par une connexion dédiée qui attache les shards en lecture seule
+  (ATTACH ... ?mode=ro) et exécute une seule requête fédérée (UNION ALL) sur tous.
+  Les relations ne sortent jamais d'un fichier : chaque parcours reste dans son shard.
+
+SQLite limite le nombre de bases attachées (10 par défaut) : au-delà, les shards sont
+interrogés par groupes et les résultats fusionnés avec le même tri que la requête.
+"""
+import os
+import re
+import time
+import asyncio
+import hashlib
+import logging
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import quote
+
+import aiosqlite
+
+from core.contracts.repository_contract import ICodeRepository
+from core.exceptions.base_exceptions import EntityNotFoundError, RepositoryError
+from ...metrics import LatencyRecorder
+from .sqlite_graph_repository import (
+    DEFAULT_CACHED_STATEMENTS,
+    SQLiteGraphRepository,
+    _call_tree,
+    _call_tree_query,
+    _neighborhood_query,
+    _shortest_path,
+    _relationship_facts,
+    _relationships_params,
+    _relationships_query,
+    _shortest_path_query,
+    _traversal_params,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SHARDS_DIR = os.path.join(".jabbarroot_data", "graph_shards")
+DEFAULT_SHARD_KEY = "default"
+# Valeur par défaut de SQLITE_MAX_ATTACHED : nombre de shards par requête fédérée.
+_MAX_ATTACHED = 10
+_SHARD_SUFFIX = ".sqlite"
+
+
+def _safe_key(key: str) -> str:
+    """Clé utilisable comme nom de fichier."""
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", key).strip("._") or DEFAULT_SHARD_KEY
+
+
+@lru_cache(maxsize=4096)
+def _repository_root(directory: str) -> Optional[str]:
+    """Racine du dépôt git contenant `directory`, ou None."""
+    while True:
+        if os.path.exists(os.path.join(directory, ".git")):
+            return directory
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
+
+
+def repository_shard_key(file_path: str) -> str:
+    """
+    Clé de shard par défaut : le dépôt git contenant le fichier, sous la forme
+    `<nom du dépôt>-<empreinte de son chemin>` (deux clones homonymes restent distincts).
+    Les fichiers hors de tout dépôt vont dans le shard "default".
+    """
+    root = _repository_root(os.path.dirname(os.path.abspath(file_path)))
+    if root is None:
+        return DEFAULT_SHARD_KEY
+    return f"{os.path.basename(root)}-{hashlib.sha1(root.encode('utf-8')).hexdigest()[:8]}"
+
+
+class ShardedGraphRepository(ICodeRepository):
+    """Implémentation d'ICodeRepository répartie en une base SQLite par clé de shard."""
+
+    def __init__(
+        self,
+        shards_dir: Optional[str] = None,
+        shard_key: Optional[Callable[[str], str]] = None,
+        query_shards: Optional[List[str]] = None,
+        cache_size_mb: Optional[int] = None,
+        mmap_size_mb: Optional[int] = None
+    ):
+        """
+        Args:
+            shards_dir: Répertoire des shards (env GRAPH_SHARDS_DIR, défaut `.jabbarroot_data/graph_shards`).
+            shard_key: Calcule la clé de shard d'un `file_path`. Par défaut, la clé fixe GRAPH_SHARD_KEY
+                si elle est définie (ex: "depot@branche"), sinon le dépôt git du fichier.
+            query_shards: Clés des shards interrogés par les lectures (tous les shards du répertoire si None).
+            cache_size_mb, mmap_size_mb: Réglages transmis à chaque shard (voir SQLiteGraphRepository).
+        """
+        self.shards_dir = shards_dir or os.getenv("GRAPH_SHARDS_DIR") or DEFAULT_SHARDS_DIR
+        fixed_key = os.getenv("GRAPH_SHARD_KEY")
+        self.shard_key = shard_key or ((lambda _: fixed_key) if fixed_key else repository_shard_key)
+        self.query_shards = [_safe_key(key) for key in query_shards] if query_shards is not None else None
+        self.cache_size_mb = cache_size_mb
+        self.mmap_size_mb = mmap_size_mb
+        self._shards: Dict[str, SQLiteGraphRepository] = {}
+        self._shard_lock = asyncio.Lock()
+        self._reader: Optional[aiosqlite.Connection] = None
+        self._attached: Dict[str, str] = {}
+        self._read_lock = asyncio.Lock()
+        # Attente de la connexion de lecture fédérée, partagée par toutes les requêtes.
+        self.read_wait = LatencyRecorder()
+
+    async def initialize(self) -> None:
+        """Crée le répertoire des shards ; les shards eux-mêmes sont ouverts à la première écriture."""
+        os.makedirs(self.shards_dir, exist_ok=True)
+
+    async def close(self) -> None:
+        """Ferme les shards ouverts et la connexion de lecture."""
+        for shard in self._shards.values():
+            await shard.close()
+        self._shards.clear()
+        if self._reader is not None:
+            await self._reader.close()
+            self._reader = None
+            self._attached = {}
+
+    # ------------------------------------------------------------------ shards
+
+    def shard_path(self, key: str) -> str:
+        return os.path.join(self.shards_dir, _safe_key(key) + _SHARD_SUFFIX)
+
+    def shard_keys(self) -> List[str]:
+        """Clés des shards existants dans le répertoire, triées."""
+        if not os.path.isdir(self.shards_dir):
+            return []
+        return sorted(name[:-len(_SHARD_SUFFIX)] for name in os.listdir(self.shards_dir) if name.endswith(_SHARD_SUFFIX))
+
+    async def shard(self, key: str) -> SQLiteGraphRepository:
+        """Repository d'écriture du shard `key`, créé et initialisé au premier appel."""
+        key = _safe_key(key)
+        async with self._shard_lock:
+            repo = self._shards.get(key)
+            if repo is None:
+                # Les lectures passent par la connexion fédérée : pas de pool de lecteurs par shard.
+                repo = SQLiteGraphRepository(self.shard_path(key), self.cache_size_mb, self.mmap_size_mb, read_pool_size=0)
+                await repo.initialize()
+                self._shards[key] = repo
+        return repo
+
+    # ------------------------------------------------------------------ écritures
+
+    async def add_code_structure(self, file_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Écrit le graphe d'un fichier dans le shard de son dépôt."""
+        shard = await self.shard(self.shard_key(file_data.get('file_path') or ""))
+        return await shard.add_code_structure(file_data)
+
+    async def add_code_structures(self, files_data: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Regroupe les fichiers par shard et écrit les groupes en parallèle, une transaction
+        par shard. L'échec d'un shard n'annule pas les écritures des autres : ses fichiers
+        reçoivent un résultat 'error'.
+        """
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        for file_data in files_data:
+            groups.setdefault(_safe_key(self.shard_key(file_data.get('file_path') or "")), []).append(file_data)
+
+        async def write(key: str, group: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+            try:
+                return await (await self.shard(key)).add_code_structures(group)
+            except RepositoryError as e:
+                logger.error(f"Graph shard '{key}' write failed for {len(group)} files: {e}")
+                return {f['file_path']: {"error": str(e)} for f in group if f.get('file_path')}
+
+        results: Dict[str, Dict[str, Any]] = {}
+        for shard_results in await asyncio.gather(*(write(key, group) for key, group in groups.items())):
+            results.update(shard_results)
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        """Shards ouverts en écriture, attente de la connexion fédérée et attente d'écriture par shard (ms)."""
+        return {
+            "read_wait": self.read_wait.snapshot(),
+            "write_wait": {key: shard.write_wait.snapshot() for key, shard in self._shards.items()},
+        }
+
+    async def gc_blobs(self) -> int:
+        """Supprime les blobs non référencés de chaque shard ; retourne le nombre total supprimé."""
+        removed = 0
+        for key in self.shard_keys():
+            removed += await (await self.shard(key)).gc_blobs()
+        return removed
+
+    async def get_entity_source(self, entity_name: str, file_path: str) -> Optional[str]:
+        """
+        Code source d'une entité, lu dans le shard de son fichier. Une lecture ne crée pas de
+        shard : None si aucun shard n'existe pour ce fichier.
+        """
+        key = _safe_key(self.shard_key(file_path))
+        if key not in self._shards and not os.path.exists(self.shard_path(key)):
+            return None
+        return await (await self.shard(key)).get_entity_source(entity_name, file_path)
+
+    # ------------------------------------------------------------------ lectures fédérées
+
+    async def _federated_rows(
+        self,
+        build: Callable[[List[str]], str],
+        params: Dict[str, Any],
+        entity_name: str,
+        sort_key: Callable[[Any], Any],
+        limit: Optional[int]
+    ) -> List[Any]:
+        """
+        Exécute la requête construite par `build(schémas)` sur les shards interrogés, attachés par
+        groupes d'au plus _MAX_ATTACHED. Les résultats de plusieurs groupes sont fusionnés par
+        `sort_key` et bornés à `limit` (None : sans borne), comme la requête le fait au sein d'un groupe.
+        """
+        keys = [key for key in (self.query_shards if self.query_shards is not None else self.shard_keys())
+                if os.path.exists(self.shard_path(key))]
+        starts = range(0, len(keys), _MAX_ATTACHED)
+        rows: List[Any] = []
+        started_at = time.perf_counter()
+        try:
+            async with self._read_lock:
+                self.read_wait.record(time.perf_counter() - started_at)
+                for start in starts:
+                    schemas = await self._attach(keys[start:start + _MAX_ATTACHED], start)
+                    async with self._reader.execute(build(schemas), params) as cursor:
+                        rows.extend(await cursor.fetchall())
+        except Exception as e:
+            logger.error(f"Federated graph query failed for entity '{entity_name}': {e}", exc_info=True)
+            raise RepositoryError(f"Federated graph query failed: {e}")
+        if len(starts) > 1:
+            rows = sorted(rows, key=sort_key)[:limit]
+        return rows
+
+    async def _attach(self, keys: List[str], first_index: int) -> List[str]:
+        """
+        Attache les shards `keys` en lecture seule à la connexion de lecture et retourne leurs schémas,
+        numérotés à partir de `first_index` : les identifiants de nœuds préfixés par le schéma
+        (arbre des appels) restent uniques d'un groupe à l'autre.
+        """
+        if self._reader is None:
+            self._reader = await aiosqlite.connect("file::memory:", uri=True, cached_statements=DEFAULT_CACHED_STATEMENTS)
+            self._reader.row_factory = aiosqlite.Row
+        wanted = {f"shard_{first_index + offset}": key for offset, key in enumerate(keys)}
+        if wanted != self._attached:
+            for schema in self._attached:
+                await self._reader.execute(f"DETACH DATABASE {schema}")
+            self._attached = {}
+            for schema, key in wanted.items():
+                uri = f"file:{quote(os.path.abspath(self.shard_path(key)))}?mode=ro"
+                await self._reader.execute(f"ATTACH DATABASE ? AS {schema}", (uri,))
+                self._attached[schema] = key
+        return list(wanted)
+
+    async def find_entity_relationships(self, entity_name: str, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        """Voir SQLiteGraphRepository.find_entity_relationships ; les faits identiques de plusieurs shards sont fusionnés."""
+        # Chaque groupe renvoie ses `offset + limit` premiers faits : la page est découpée après fusion.
+        use_fts, params = _relationships_params(entity_name, limit + offset, 0)
+        rows = await self._federated_rows(
+            lambda schemas: _relationships_query(tuple(schemas), use_fts), params, entity_name,
+            sort_key=lambda row: (row["match_rank"], row["source_name"], row["target_name"], row["rel_type"]),
+            limit=None
+        )
+        # Triés par rang : la première occurrence d'un fait présent dans plusieurs groupes est la mieux classée.
+        facts = {(f["source"], f["relationship"], f["target"]): f for f in _relationship_facts(rows)}
+        return list(facts.values())[offset:offset + limit]
+
+    async def get_neighborhood(
+        self,
+        entity_name: str,
+        max_depth: int = 2,
+        direction: str = "both",
+        relationship_types: Optional[List[str]] = None,
+        max_fan_out: int = 200,
+        max_nodes: int = 500,
+        file_path: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Voir SQLiteGraphRepository.get_neighborhood."""
+        params = _traversal_params(direction, max_depth, max_fan_out, relationship_types)
+        params.update({"name": entity_name, "file_path": file_path, "max_rows": max_nodes * (max_depth + 1), "limit": max_nodes + 1})
+        rows = await self._federated_rows(
+            lambda schemas: _neighborhood_query(tuple(schemas), direction), params, entity_name,
+            sort_key=lambda row: (row["depth"], row["name"], row["file_path"]), limit=max_nodes + 1
+        )
+        if not rows:
+            raise EntityNotFoundError(entity_name)
+        return [dict(row) for row in rows if row["depth"] > 0][:max_nodes]
+
+    async def find_shortest_path(
+        self,
+        source_name: str,
+        target_name: str,
+        max_depth: int = 6,
+        relationship_types: Optional[List[str]] = None,
+        directed: bool = True,
+        max_fan_out: int = 200,
+        max_visited: int = 100_000
+    ) -> List[Dict[str, str]]:
+        """Voir SQLiteGraphRepository.find_shortest_path ; le plus court des chemins trouvés dans les shards."""
+        params = _traversal_params("outgoing" if directed else "both", max_depth, max_fan_out, relationship_types)
+        params.update({"source": source_name, "target": target_name, "max_visited": max_visited})
+        # Une ligne par shard, chemin trouvé ou non : toutes sont gardées pour signaler une troncature.
+        rows = await self._federated_rows(
+            lambda schemas: _shortest_path_query(tuple(schemas), directed), params, source_name,
+            sort_key=lambda row: row["truncated"], limit=None
+        )
+        return _shortest_path(rows, source_name, target_name, max_visited)
+
+    async def get_call_tree(
+        self,
+        entity_name: str,
+        direction: str = "callees",
+        max_depth: int = 3,
+        max_fan_out: int = 200,
+        max_nodes: int = 500,
+        file_path: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Voir SQLiteGraphRepository.get_call_tree ; un arbre par entité de départ, tous shards confondus."""
+        if direction not in ("callees", "callers"):
+            raise RepositoryError(f"Invalid direction {direction!r}, expected 'callees' or 'callers'")
+        params = _traversal_params("outgoing", max_depth, max_fan_out, ["CALLS"])
+        params.update({"name": entity_name, "file_path": file_path, "max_nodes": max_nodes})
+        rows = await self._federated_rows(
+            lambda schemas: _call_tree_query(tuple(schemas), direction), params, entity_name,
+            sort_key=lambda row: (row["depth"], row["name"]), limit=max_nodes
+        )
+        if not rows:
+            raise EntityNotFoundError(entity_name)
+        return _call_tree(rows)
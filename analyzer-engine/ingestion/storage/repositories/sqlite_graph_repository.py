@@ -1,19 +1,283 @@
 # FICHIER: analyzer-engine/ingestion/storage/repositories/sqlite_graph_repository.py
 
 import os
+import json
+import time
+import asyncio
 import logging
 import aiosqlite
-from typing import List, Dict, Any
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import AsyncIterator, List, Dict, Any, Optional, Sequence, Tuple
+from urllib.parse import quote
 
 # IMPORTS STRATÉGIQUES :
 # Dépendance à l'abstraction (le contrat) et aux exceptions définies dans core.
 from core.contracts.repository_contract import ICodeRepository
-from core.exceptions.base_exceptions import RepositoryError, EntityNotFoundError
+from core.exceptions.base_exceptions import RepositoryError, EntityNotFoundError, TraversalLimitError
+from ...metrics import LatencyRecorder
+from ..blob_store import blob_hash, compress, create_blob_cache, decompress, default_codec, locate
 
 logger = logging.getLogger(__name__)
 
 # La configuration de la base de données est une responsabilité de l'implémentation.
 DB_FILE = "code_graph.sqlite"
+DEFAULT_CACHE_SIZE_MB = 64
+DEFAULT_MMAP_SIZE_MB = 256
+DEFAULT_READ_POOL_SIZE = 4
+# Requêtes préparées conservées par connexion (le texte des requêtes de lecture est stable).
+DEFAULT_CACHED_STATEMENTS = 256
+
+# Compteurs d'une écriture de fichier qui n'a rien modifié.
+_NO_CHANGES = {"entities_added": 0, "entities_updated": 0, "entities_removed": 0, "relations_added": 0, "relations_removed": 0}
+
+# Sens de parcours des relations : (colonne du nœud courant, colonne du nœud atteint).
+_TRAVERSAL_DIRECTIONS = {
+    "outgoing": [("source_id", "target_id")],
+    "incoming": [("target_id", "source_id")],
+    "both": [("source_id", "target_id"), ("target_id", "source_id")],
+}
+# Filtre optionnel sur le type de relation, passé en tableau JSON (NULL = tous les types).
+_TYPE_FILTER = "(:types IS NULL OR r.type IN (SELECT value FROM json_each(:types)))"
+# Un nœud dont le degré (dans le sens du parcours) dépasse :max_fan_out est retourné mais pas développé.
+_FAN_OUT_FILTER = "(SELECT COUNT(*) FROM {schema}.relationships f WHERE f.{current} = w.id) <= :max_fan_out"
+
+
+def _traversal_params(direction: str, max_depth: int, max_fan_out: int, relationship_types: Optional[List[str]]) -> Dict[str, Any]:
+    """Valide les paramètres communs des parcours et les convertit en paramètres SQL."""
+    if direction not in _TRAVERSAL_DIRECTIONS:
+        raise RepositoryError(f"Invalid direction {direction!r}, expected one of {sorted(_TRAVERSAL_DIRECTIONS)}")
+    for name, value in (("max_depth", max_depth), ("max_fan_out", max_fan_out)):
+        if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+            raise RepositoryError(f"{name} must be a positive integer, got {value!r}")
+    return {
+        "max_depth": max_depth,
+        "max_fan_out": max_fan_out,
+        "types": json.dumps(list(relationship_types)) if relationship_types else None,
+    }
+
+
+# Requêtes de lecture du graphe. Chacune est construite pour une liste de schémas : "main" pour une
+# base seule, ou les bases attachées (ATTACH) d'une requête fédérée sur plusieurs shards. Les relations
+# ne sortent jamais d'un fichier, donc d'un shard : chaque parcours s'exécute dans son schéma et les
+# résultats sont réunis (UNION ALL) puis triés et bornés globalement.
+# Les textes sont mémorisés : à texte identique, sqlite3 réutilise la requête préparée de la connexion.
+
+def _union(subqueries: Sequence[str]) -> str:
+    return "\n            UNION ALL\n".join(f"SELECT * FROM ({query})" for query in subqueries)
+
+
+@lru_cache(maxsize=128)
+def _relationships_query(schemas: Tuple[str, ...], use_fts: bool) -> str:
+    """Relations directes des entités dont le nom contient :name, sans doublon, paginées."""
+    facts = []
+    for schema in schemas:
+        if use_fts:
+            # Phrase FTS5 : le tokenizer trigramme la traduit en recherche de sous-chaîne.
+            matched = (f"SELECT e.id, e.name FROM {schema}.entities_fts JOIN {schema}.entities e "
+                       f"ON e.id = entities_fts.rowid WHERE entities_fts MATCH :match")
+        else:
+            matched = f"SELECT id, name FROM {schema}.entities WHERE name LIKE :substring ESCAPE '\\'"
+        facts.append(f"""
+            WITH matched AS (
+                SELECT id,
+                       CASE WHEN name = :name COLLATE NOCASE THEN 0
+                            WHEN name LIKE :prefix ESCAPE '\\' THEN 1
+                            ELSE 2 END AS match_rank
+                FROM ({matched})
+            ),
+            hits AS (
+                SELECT r.source_id, r.target_id, r.type, m.match_rank
+                FROM matched m JOIN {schema}.relationships r ON r.source_id = m.id
+                UNION ALL
+                SELECT r.source_id, r.target_id, r.type, m.match_rank
+                FROM matched m JOIN {schema}.relationships r ON r.target_id = m.id
+            )
+            SELECT
+                s.name AS source_name, s.type AS source_type,
+                h.type AS rel_type,
+                t.name AS target_name, t.type AS target_type,
+                h.match_rank
+            FROM hits h
+            JOIN {schema}.entities s ON s.id = h.source_id
+            JOIN {schema}.entities t ON t.id = h.target_id
+        """)
+    # Les faits identiques (mêmes noms et types aux deux extrémités) sont fusionnés par le
+    # GROUP BY, avant la pagination : chaque page contient `limit` faits distincts.
+    return f"""
+        SELECT source_name, source_type, rel_type, target_name, target_type, MIN(match_rank) AS match_rank
+        FROM ({_union(facts)})
+        GROUP BY source_name, source_type, rel_type, target_name, target_type
+        ORDER BY match_rank, source_name, target_name, rel_type
+        LIMIT :limit OFFSET :offset
+    """
+
+
+def _relationships_params(entity_name: str, limit: int, offset: int) -> Tuple[bool, Dict[str, Any]]:
+    """Paramètres de `_relationships_query`, et s'il faut passer par l'index trigramme (3 caractères et plus)."""
+    use_fts = len(entity_name) >= 3
+    escaped = entity_name.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return use_fts, {
+        "name": entity_name, "prefix": f"{escaped}%", "substring": f"%{escaped}%",
+        "match": '"' + entity_name.replace('"', '""') + '"' if use_fts else None,
+        "limit": limit, "offset": offset
+    }
+
+
+def _relationship_facts(rows: List[Any]) -> List[Dict[str, str]]:
+    return [
+        {
+            "source": f"{rel['source_name']} ({rel['source_type']})",
+            "relationship": rel['rel_type'],
+            "target": f"{rel['target_name']} ({rel['target_type']})"
+        }
+        for rel in rows
+    ]
+
+
+@lru_cache(maxsize=128)
+def _neighborhood_query(schemas: Tuple[str, ...], direction: str) -> str:
+    """Entités atteintes depuis :name en au plus :max_depth relations, avec leur distance minimale."""
+    walks = []
+    for schema in schemas:
+        steps = "\n                UNION\n".join(
+            f"""
+                SELECT r.{reached}, w.depth + 1
+                FROM walk w JOIN {schema}.relationships r ON r.{current} = w.id
+                WHERE w.depth < :max_depth AND {_TYPE_FILTER} AND {_FAN_OUT_FILTER.format(schema=schema, current=current)}"""
+            for current, reached in _TRAVERSAL_DIRECTIONS[direction]
+        )
+        # UNION (et non UNION ALL) : un nœud n'est développé qu'une fois par profondeur. Le parcours
+        # est en largeur, la borne LIMIT coupe donc les nœuds les plus lointains.
+        walks.append(f"""
+            WITH RECURSIVE walk(id, depth) AS (
+                SELECT id, 0 FROM {schema}.entities
+                WHERE name = :name AND (:file_path IS NULL OR file_path = :file_path)
+                UNION{steps}
+                LIMIT :max_rows
+            )
+            SELECT e.name, e.type, e.file_path, MIN(w.depth) AS depth
+            FROM walk w JOIN {schema}.entities e ON e.id = w.id
+            GROUP BY e.id
+        """)
+    return f"{_union(walks)}\n            ORDER BY depth, name, file_path\n            LIMIT :limit"
+
+
+@lru_cache(maxsize=128)
+def _shortest_path_query(schemas: Tuple[str, ...], directed: bool) -> str:
+    """
+    Une ligne par schéma : étapes (tableau JSON, de l'arrivée vers le départ) et longueur du plus
+    court chemin de :source à :target (NULL si aucun), et `truncated` si le parcours a atteint
+    la borne :max_visited.
+    """
+    directions = _TRAVERSAL_DIRECTIONS["outgoing" if directed else "both"]
+    walks = []
+    for schema in schemas:
+        targets = f"(SELECT id FROM {schema}.entities WHERE name = :target)"
+        expand = "\n                UNION\n".join(
+            f"""
+                SELECT r.{reached}, w.depth + 1
+                FROM walk w JOIN {schema}.relationships r ON r.{current} = w.id
+                WHERE w.depth < :max_depth AND w.id NOT IN {targets}
+                  AND {_TYPE_FILTER} AND {_FAN_OUT_FILTER.format(schema=schema, current=current)}"""
+            for current, reached in directions
+        )
+        # Prédécesseur de b.id : un nœud développé, atteint au niveau précédent, relié par une relation.
+        predecessor = "\n                        UNION ALL\n".join(
+            f"""
+                        SELECT r.rowid FROM {schema}.relationships r JOIN reached w ON w.id = r.{current}
+                        WHERE r.{reached} = b.id AND w.depth = b.depth - 1
+                          AND {_TYPE_FILTER} AND {_FAN_OUT_FILTER.format(schema=schema, current=current)}"""
+            for current, reached in directions
+        )
+        # Parcours en largeur : `walk` ne garde qu'une ligne par (nœud, profondeur) (UNION), et la
+        # file de la CTE est traitée dans l'ordre des profondeurs, si bien que :max_visited ne coupe
+        # que les niveaux les plus profonds. `reached` retient la profondeur minimale de chaque
+        # nœud ; le chemin est reconstruit à rebours depuis l'arrivée, un prédécesseur par niveau.
+        walks.append(f"""
+            WITH RECURSIVE walk(id, depth) AS (
+                SELECT id, 0 FROM {schema}.entities WHERE name = :source
+                UNION{expand}
+                LIMIT :max_visited
+            ),
+            reached(id, depth) AS MATERIALIZED (SELECT id, MIN(depth) FROM walk GROUP BY id),
+            arrival(id, depth) AS (
+                SELECT id, depth FROM reached WHERE id IN {targets} ORDER BY depth, id LIMIT 1
+            ),
+            back(id, depth, steps) AS (
+                SELECT id, depth, json_array() FROM arrival
+                UNION ALL
+                SELECT CASE WHEN r.target_id = b.id THEN r.source_id ELSE r.target_id END, b.depth - 1,
+                       json_insert(b.steps, '$[#]', json_array(
+                           src.name || ' (' || src.type || ')', r.type, dst.name || ' (' || dst.type || ')'))
+                FROM back b
+                JOIN {schema}.relationships r ON r.rowid = (
+                    SELECT rowid FROM ({predecessor}
+                    ) LIMIT 1
+                )
+                JOIN {schema}.entities src ON src.id = r.source_id
+                JOIN {schema}.entities dst ON dst.id = r.target_id
+                WHERE b.depth > 0
+            )
+            SELECT (SELECT steps FROM back WHERE depth = 0) AS steps, (SELECT depth FROM arrival) AS depth,
+                   (SELECT COUNT(*) FROM walk) >= :max_visited AS truncated
+        """)
+    return _union(walks)
+
+
+def _shortest_path(rows: List[Any], source_name: str, target_name: str, max_visited: int) -> List[Dict[str, str]]:
+    """Le plus court des chemins trouvés ; [] s'il n'y en a pas, erreur si le parcours a été tronqué."""
+    found = [row for row in rows if row["steps"] is not None]
+    if not found:
+        if any(row["truncated"] for row in rows):
+            raise TraversalLimitError(
+                f"No path from '{source_name}' to '{target_name}' within the first {max_visited} visited nodes; "
+                f"raise max_visited or lower max_depth"
+            )
+        return []
+    steps = json.loads(min(found, key=lambda row: row["depth"])["steps"])
+    # Reconstruit à rebours : les étapes sont remises dans le sens du départ vers l'arrivée.
+    return [
+        {"source": source, "relationship": relationship, "target": target}
+        for source, relationship, target in reversed(steps)
+    ]
+
+
+@lru_cache(maxsize=128)
+def _call_tree_query(schemas: Tuple[str, ...], direction: str) -> str:
+    """Nœuds de l'arbre des appels depuis :name, identifiés par leur chemin, les moins profonds d'abord."""
+    current, reached = _TRAVERSAL_DIRECTIONS["outgoing" if direction == "callees" else "incoming"][0]
+    trees = []
+    for schema in schemas:
+        # `path` identifie chaque nœud de l'arbre : une même fonction peut y figurer sous plusieurs parents.
+        trees.append(f"""
+            WITH RECURSIVE tree(id, path, parent_path, depth) AS (
+                SELECT id, '{schema}/' || id, NULL, 0 FROM {schema}.entities
+                WHERE name = :name AND (:file_path IS NULL OR file_path = :file_path)
+                UNION ALL
+                SELECT r.{reached}, w.path || '/' || r.{reached}, w.path, w.depth + 1
+                FROM tree w JOIN {schema}.relationships r ON r.{current} = w.id
+                WHERE w.depth < :max_depth AND {_TYPE_FILTER} AND {_FAN_OUT_FILTER.format(schema=schema, current=current)}
+                LIMIT :max_nodes
+            )
+            SELECT tree.path, tree.parent_path, e.name, e.type, e.file_path, tree.depth
+            FROM tree JOIN {schema}.entities e ON e.id = tree.id
+        """)
+    # Un parent est moins profond que ses enfants : la borne globale ne coupe jamais un nœud de son parent.
+    return f"{_union(trees)}\n            ORDER BY depth, name\n            LIMIT :max_nodes"
+
+
+def _call_tree(rows: List[Any]) -> List[Dict[str, Any]]:
+    """Assemble les nœuds (triés par profondeur) en arbres imbriqués, un par entité de départ."""
+    nodes: Dict[str, Dict[str, Any]] = {}
+    roots: List[Dict[str, Any]] = []
+    for row in rows:
+        node = {"name": row["name"], "type": row["type"], "file_path": row["file_path"], "children": []}
+        nodes[row["path"]] = node
+        parent = nodes.get(row["parent_path"]) if row["parent_path"] is not None else None
+        (parent["children"] if parent is not None else roots).append(node)
+    return roots
+
 
 class SQLiteGraphRepository(ICodeRepository):
     """
@@ -21,15 +285,40 @@ class SQLiteGraphRepository(ICodeRepository):
     Cette classe encapsule toute la logique de lecture et d'écriture pour le graphe de connaissance du code.
     """
 
-    def __init__(self, db_path: str = DB_FILE):
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        cache_size_mb: Optional[int] = None,
+        mmap_size_mb: Optional[int] = None,
+        read_pool_size: Optional[int] = None
+    ):
         """
         Initialise le repository.
         
         Args:
-            db_path: Chemin vers le fichier de la base de données SQLite.
+            db_path: Chemin vers le fichier de la base de données SQLite (env SQLITE_DB_PATH,
+                défaut `code_graph.sqlite` dans le répertoire courant).
+            cache_size_mb: Taille du cache de pages SQLite (env SQLITE_CACHE_SIZE_MB, défaut 64).
+            mmap_size_mb: Taille de la projection mémoire du fichier (env SQLITE_MMAP_SIZE_MB, défaut 256 ; 0 la désactive).
+            read_pool_size: Connexions en lecture seule dédiées aux requêtes (env SQLITE_READ_POOL_SIZE,
+                défaut 4). En WAL, elles lisent pendant les transactions d'ingestion. Avec 0, ou pour
+                une base ":memory:" (propre à sa connexion), les lectures passent par la connexion d'écriture.
         """
-        self.db_path = db_path
+        self.db_path = db_path or os.getenv("SQLITE_DB_PATH") or DB_FILE
+        self.cache_size_mb = cache_size_mb if cache_size_mb is not None else int(os.getenv("SQLITE_CACHE_SIZE_MB") or DEFAULT_CACHE_SIZE_MB)
+        self.mmap_size_mb = mmap_size_mb if mmap_size_mb is not None else int(os.getenv("SQLITE_MMAP_SIZE_MB") or DEFAULT_MMAP_SIZE_MB)
+        self.read_pool_size = read_pool_size if read_pool_size is not None else int(os.getenv("SQLITE_READ_POOL_SIZE") or DEFAULT_READ_POOL_SIZE)
+        self.cached_statements = int(os.getenv("SQLITE_CACHED_STATEMENTS") or DEFAULT_CACHED_STATEMENTS)
         self.conn: aiosqlite.Connection | None = None
+        # Les transactions d'écriture partagent la connexion : une seule à la fois.
+        self._write_lock = asyncio.Lock()
+        self.blob_codec = default_codec()
+        self._blob_cache = create_blob_cache()
+        self._readers: List[aiosqlite.Connection] = []
+        self._idle_readers: asyncio.Queue = asyncio.Queue()
+        # Temps d'attente d'une connexion : lecteur libre du pool, verrou de la connexion d'écriture.
+        self.read_wait = LatencyRecorder()
+        self.write_wait = LatencyRecorder()
         logger.info(f"SQLiteGraphRepository instance created for database at: {self.db_path}")
 
     async def initialize(self) -> None:
@@ -37,27 +326,97 @@ class SQLiteGraphRepository(ICodeRepository):
         Initialise la connexion à la base de données et crée le schéma si nécessaire.
         Cette méthode est idempotente.
         """
-        if self.conn and not self.conn.is_closed():
+        if self.conn is not None:
             logger.debug("Connection already initialized.")
             return
 
         try:
             # Créer le répertoire parent s'il n'existe pas
             os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
-            self.conn = await aiosqlite.connect(self.db_path)
+            self.conn = await aiosqlite.connect(self.db_path, cached_statements=self.cached_statements)
             # Utiliser aiosqlite.Row pour accéder aux colonnes par leur nom.
             self.conn.row_factory = aiosqlite.Row
             # Activer les contraintes de clé étrangère, crucial pour l'intégrité des données.
             await self.conn.execute("PRAGMA foreign_keys = ON;")
+            await self._configure_connection()
             await self._create_tables_if_not_exists()
-            logger.info(f"SQLiteGraphRepository initialized. Database at: {self.db_path}")
+            # Les lecteurs s'ouvrent sur une base existante : après la création du schéma.
+            await self._open_read_pool()
+            logger.info(f"SQLiteGraphRepository initialized. Database at: {self.db_path} ({len(self._readers)} readers)")
         except Exception as e:
             logger.error(f"Failed to initialize SQLiteGraphRepository: {e}", exc_info=True)
             raise RepositoryError(f"Failed to initialize SQLiteGraphRepository: {e}")
 
+    async def _configure_connection(self) -> None:
+        """
+        Réglages d'écriture et de lecture de la connexion :
+        - WAL : les lectures ne bloquent plus les écritures, et un commit n'écrit que le journal ;
+        - synchronous=NORMAL : plus de fsync à chaque commit (sûr en WAL, seule la dernière
+          transaction peut être perdue en cas de coupure de courant) ;
+        - cache de pages (valeur négative = taille en Kio) et mmap pour les lectures ;
+        - tables temporaires (tris, index transitoires) en mémoire.
+        """
+        if self.db_path != ":memory:":
+            await self.conn.execute("PRAGMA journal_mode = WAL;")
+        await self.conn.execute("PRAGMA synchronous = NORMAL;")
+        await self.conn.execute(f"PRAGMA cache_size = {-self.cache_size_mb * 1024};")
+        await self.conn.execute(f"PRAGMA mmap_size = {self.mmap_size_mb * 1024 * 1024};")
+        await self.conn.execute("PRAGMA temp_store = MEMORY;")
+
+    async def _open_read_pool(self) -> None:
+        """Ouvre les connexions en lecture seule (URI `mode=ro`), chacune avec son thread aiosqlite."""
+        if self.db_path == ":memory:":
+            return
+        uri = f"file:{quote(os.path.abspath(self.db_path))}?mode=ro"
+        for _ in range(self.read_pool_size):
+            reader = await aiosqlite.connect(uri, uri=True, cached_statements=self.cached_statements)
+            reader.row_factory = aiosqlite.Row
+            await reader.execute(f"PRAGMA cache_size = {-self.cache_size_mb * 1024};")
+            await reader.execute(f"PRAGMA mmap_size = {self.mmap_size_mb * 1024 * 1024};")
+            await reader.execute("PRAGMA temp_store = MEMORY;")
+            self._readers.append(reader)
+            self._idle_readers.put_nowait(reader)
+
+    @asynccontextmanager
+    async def _reading(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Prête une connexion de lecture du pool (la connexion d'écriture s'il n'y en a pas)."""
+        if not self.conn:
+            await self.initialize()
+        if not self._readers:
+            yield self.conn
+            return
+        started_at = time.perf_counter()
+        reader = await self._idle_readers.get()
+        self.read_wait.record(time.perf_counter() - started_at)
+        try:
+            yield reader
+        finally:
+            self._idle_readers.put_nowait(reader)
+
+    @asynccontextmanager
+    async def _writing(self) -> AsyncIterator[None]:
+        """Réserve la connexion d'écriture pour une transaction, en mesurant l'attente du verrou."""
+        started_at = time.perf_counter()
+        async with self._write_lock:
+            self.write_wait.record(time.perf_counter() - started_at)
+            yield
+
+    def stats(self) -> Dict[str, Any]:
+        """Attente des connexions (ms) : lecteurs du pool et verrou d'écriture ; cache des blobs."""
+        return {
+            "read_pool_size": len(self._readers),
+            "read_wait": self.read_wait.snapshot(),
+            "write_wait": self.write_wait.snapshot(),
+            "blob_cache": self._blob_cache.stats(),
+        }
+
     async def close(self) -> None:
-        """Ferme la connexion à la base de données si elle est ouverte."""
-        if self.conn and not self.conn.is_closed():
+        """Ferme les connexions de lecture et la connexion à la base de données si elle est ouverte."""
+        for reader in self._readers:
+            await reader.close()
+        self._readers = []
+        self._idle_readers = asyncio.Queue()
+        if self.conn is not None:
             await self.conn.close()
             self.conn = None
             logger.info("SQLiteGraphRepository connection closed.")
@@ -76,6 +435,9 @@ class SQLiteGraphRepository(ICodeRepository):
                     type TEXT NOT NULL CHECK(type IN ('FUNCTION', 'CLASS', 'FILE')),
                     file_path TEXT NOT NULL,
                     source_code TEXT,
+                    blob_hash TEXT,
+                    blob_offset INTEGER,
+                    blob_length INTEGER,
                     UNIQUE(name, file_path)
                 );
 
@@ -89,155 +451,579 @@ class SQLiteGraphRepository(ICodeRepository):
                 );
 
                 CREATE INDEX IF NOT EXISTS idx_entities_name ON entities(name);
+                CREATE INDEX IF NOT EXISTS idx_entities_file_path ON entities(file_path);
                 CREATE INDEX IF NOT EXISTS idx_relationships_source ON relationships(source_id);
                 CREATE INDEX IF NOT EXISTS idx_relationships_target ON relationships(target_id);
+
+                -- Version de la dernière écriture de chaque fichier (compteur global croissant) :
+                -- permet aux snapshots du graphe de ne recharger que les fichiers modifiés.
+                CREATE TABLE IF NOT EXISTS file_versions (
+                    file_path TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL
+                );
+
+                -- Texte source stocké une fois par empreinte, compressé ; les entités en référencent
+                -- un extrait (blob_hash, blob_offset, blob_length) au lieu de copier `source_code`.
+                CREATE TABLE IF NOT EXISTS blobs (
+                    hash TEXT PRIMARY KEY,
+                    codec TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    data BLOB NOT NULL
+                );
             """)
+            await self._add_blob_columns()
+            await self._create_entity_search_index()
             await self.conn.commit()
             logger.debug("Tables 'entities' and 'relationships' are ready.")
         except Exception as e:
             logger.error(f"Failed to create tables: {e}", exc_info=True)
             raise RepositoryError(f"Failed to create tables: {e}")
 
-    async def add_code_structure(self, file_data: Dict[str, Any]) -> Dict[str, int]:
+    async def _add_blob_columns(self) -> None:
+        """Ajoute les colonnes de référence aux blobs à une base créée avant leur introduction."""
+        async with self.conn.execute("PRAGMA table_info(entities)") as cursor:
+            columns = {row["name"] for row in await cursor.fetchall()}
+        for column, column_type in (("blob_hash", "TEXT"), ("blob_offset", "INTEGER"), ("blob_length", "INTEGER")):
+            if column not in columns:
+                await self.conn.execute(f"ALTER TABLE entities ADD COLUMN {column} {column_type}")
+        await self.conn.execute("CREATE INDEX IF NOT EXISTS idx_entities_blob_hash ON entities(blob_hash)")
+
+    async def _create_entity_search_index(self) -> None:
+        """
+        Crée l'index trigramme des noms d'entités (`entities_fts`, table FTS5 à contenu externe)
+        et les triggers qui le synchronisent avec `entities`. Une base créée avant l'index
+        est indexée une fois, à sa création.
+        """
+        async with self.conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'entities_fts'") as cursor:
+            exists = await cursor.fetchone() is not None
+        await self.conn.executescript("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS entities_fts USING fts5(
+                name, content='entities', content_rowid='id', tokenize='trigram'
+            );
+
+            CREATE TRIGGER IF NOT EXISTS entities_fts_insert AFTER INSERT ON entities BEGIN
+                INSERT INTO entities_fts(rowid, name) VALUES (new.id, new.name);
+            END;
+            CREATE TRIGGER IF NOT EXISTS entities_fts_delete AFTER DELETE ON entities BEGIN
+                INSERT INTO entities_fts(entities_fts, rowid, name) VALUES ('delete', old.id, old.name);
+            END;
+            CREATE TRIGGER IF NOT EXISTS entities_fts_update AFTER UPDATE OF name ON entities BEGIN
+                INSERT INTO entities_fts(entities_fts, rowid, name) VALUES ('delete', old.id, old.name);
+                INSERT INTO entities_fts(rowid, name) VALUES (new.id, new.name);
+            END;
+        """)
+        if not exists:
+            await self.conn.execute("INSERT INTO entities_fts(entities_fts) VALUES ('rebuild')")
+
+    async def add_code_structure(self, file_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Ajoute les entités (nœuds) et relations (arêtes) d'un fichier au graphe de manière atomique.
         Cette méthode absorbe la logique de l'ancien `graph_builder.py`.
+        Réingérer un fichier remplace son graphe : les entités et relations qui n'y figurent
+        plus sont supprimées. Retourne les compteurs d'ajouts, de mises à jour et de suppressions.
         """
         if not self.conn:
             await self.initialize()
 
-        entities = file_data.get('entities', [])
-        relationships = file_data.get('relationships', [])
         file_path = file_data.get('file_path')
+        if not file_path:
+            logger.warning("No file_path provided in file_data. Skipping.")
+            return dict(_NO_CHANGES)
 
-        if not entities or not file_path:
-            logger.warning("No entities or file_path provided in file_data. Skipping.")
-            return {"entities_added": 0, "relations_added": 0}
-
-        entities_added_count = 0
-        relations_added_count = 0
-        
         # Utiliser une transaction explicite pour garantir l'atomicité.
-        async with self.conn.cursor() as cursor:
+        async with self._writing(), self.conn.cursor() as cursor:
             try:
-                # 1. Insérer toutes les entités
-                for entity in entities:
-                    await cursor.execute(
-                        "INSERT OR IGNORE INTO entities (name, type, file_path, source_code) VALUES (?, ?, ?, ?)",
-                        (entity['name'], entity['type'], file_path, entity.get('source_code', ''))
-                    )
-                    if cursor.rowcount > 0:
-                        entities_added_count += 1
-
-                # 2. Récupérer les IDs des entités pour créer les relations
-                entity_ids = {}
-                await cursor.execute("SELECT id, name FROM entities WHERE file_path = ?", (file_path,))
-                rows = await cursor.fetchall()
-                for row in rows:
-                    entity_ids[row['name']] = row['id']
-                
-                # 3. Insérer toutes les relations
-                for rel in relationships:
-                    source_id = entity_ids.get(rel['source'])
-                    target_id = entity_ids.get(rel['target'])
-                    
-                    if source_id and target_id:
-                        await cursor.execute(
-                            "INSERT OR IGNORE INTO relationships (source_id, target_id, type) VALUES (?, ?, ?)",
-                            (source_id, target_id, rel['type'])
-                        )
-                        if cursor.rowcount > 0:
-                            relations_added_count += 1
-                    else:
-                        logger.warning(f"Could not find IDs for relationship: {rel}. Skipping.")
-                
+                result = await self._write_code_structure(cursor, file_data)
                 await self.conn.commit()
-                logger.info(f"Added {entities_added_count} new entities and {relations_added_count} new relationships for {file_path}.")
-
+                logger.info(
+                    f"Graph of {file_path}: {result['entities_added']} entities added, {result['entities_updated']} updated, "
+                    f"{result['entities_removed']} removed; {result['relations_added']} relationships added, "
+                    f"{result['relations_removed']} removed."
+                )
             except Exception as e:
                 await self.conn.rollback()
                 logger.error(f"Transaction failed for {file_path}. Rolling back. Error: {e}", exc_info=True)
                 raise RepositoryError(f"Failed to add code structure: {e}")
 
-        return {"entities_added": entities_added_count, "relations_added": relations_added_count}
+        return result
 
-    async def find_entity_relationships(self, entity_name: str) -> List[Dict[str, Any]]:
+    async def add_code_structures(self, files_data: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Ajoute les structures de plusieurs fichiers en une seule transaction.
+        Chaque fichier est écrit dans son propre SAVEPOINT : l'échec d'un fichier n'annule
+        que ses propres écritures, et le résultat correspondant contient la clé 'error'.
         """
-        Recherche une entité par son nom et retourne toutes ses relations directes (entrantes et sortantes).
+        if not self.conn:
+            await self.initialize()
+
+        results: Dict[str, Dict[str, Any]] = {}
+        async with self._writing(), self.conn.cursor() as cursor:
+            try:
+                # BEGIN explicite : sans lui, le RELEASE du premier savepoint validerait la transaction.
+                await cursor.execute("BEGIN")
+                for file_data in files_data:
+                    file_path = file_data.get('file_path')
+                    # Sans entités, le fichier est tout de même écrit : son graphe stocké est vidé.
+                    if not file_path:
+                        continue
+                    await cursor.execute("SAVEPOINT file_write")
+                    try:
+                        results[file_path] = await self._write_code_structure(cursor, file_data)
+                        await cursor.execute("RELEASE SAVEPOINT file_write")
+                    except Exception as e:
+                        await cursor.execute("ROLLBACK TO SAVEPOINT file_write")
+                        await cursor.execute("RELEASE SAVEPOINT file_write")
+                        logger.error(f"Graph write failed for {file_path}, file skipped: {e}")
+                        results[file_path] = {**_NO_CHANGES, "error": str(e)}
+                await self.conn.commit()
+            except Exception as e:
+                await self.conn.rollback()
+                logger.error(f"Batch transaction failed for {len(files_data)} files. Rolling back. Error: {e}", exc_info=True)
+                raise RepositoryError(f"Failed to add code structures: {e}")
+
+        logger.info(f"Graph batch write: {len(results)} files in one transaction.")
+        return results
+
+    async def _write_code_structure(self, cursor: aiosqlite.Cursor, file_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Met le graphe d'un fichier en conformité avec `file_data`, dans la transaction courante,
+        sans la valider. Le nouvel état est comparé à celui déjà stocké pour ce `file_path` :
+        seules les entités et relations ajoutées, modifiées ou disparues sont écrites.
+        Un fichier réingéré à l'identique ne coûte que deux lectures et ne change pas de version.
+        """
+        entities = file_data.get('entities', [])
+        relationships = file_data.get('relationships', [])
+        file_path = file_data.get('file_path')
+
+        # 1. État voulu (à nom égal, la première entité l'emporte, comme avec INSERT OR IGNORE)
+        #    et état stocké des entités du fichier. Quand le texte du fichier est fourni, le code
+        #    d'une entité qui en est extrait devient une référence au blob du fichier.
+        source = file_data.get('source_code')
+        data = source.encode('utf-8') if source else None
+        file_blob = blob_hash(data) if data else None
+        wanted: Dict[str, Tuple[str, Optional[str], Optional[str], Optional[int], Optional[int]]] = {}
+        for entity in entities:
+            if entity['name'] in wanted:
+                continue
+            source_code = entity.get('source_code', '')
+            span = locate(data, source_code) if data else None
+            wanted[entity['name']] = (entity['type'], None, file_blob, *span) if span else (entity['type'], source_code, None, None, None)
+        await cursor.execute(
+            "SELECT id, name, type, source_code, blob_hash, blob_offset, blob_length FROM entities WHERE file_path = ?",
+            (file_path,)
+        )
+        stored = {row['name']: row for row in await cursor.fetchall()}
+        blob_stored = any(state[2] for state in wanted.values())
+        if blob_stored:
+            await self._store_blob(cursor, file_blob, data)
+
+        # 2. Entités disparues : leurs relations partent avec elles (ON DELETE CASCADE),
+        #    leur entrée dans l'index trigramme avec le trigger de suppression.
+        removed = [(row['id'],) for name, row in stored.items() if name not in wanted]
+        if removed:
+            await cursor.executemany("DELETE FROM entities WHERE id = ?", removed)
+
+        def unchanged(row: aiosqlite.Row, state: Tuple) -> bool:
+            entity_type, source_code, *blob_ref = state
+            return (row['type'], row['source_code'] or '', row['blob_hash'], row['blob_offset'], row['blob_length']) == \
+                   (entity_type, source_code or '', *blob_ref)
+
+        updated = [(*state, stored[name]['id']) for name, state in wanted.items() if name in stored and not unchanged(stored[name], state)]
+        if updated:
+            await cursor.executemany(
+                "UPDATE entities SET type = ?, source_code = ?, blob_hash = ?, blob_offset = ?, blob_length = ? WHERE id = ?",
+                updated
+            )
+        added = [(name, file_path, *state) for name, state in wanted.items() if name not in stored]
+        if added:
+            await cursor.executemany(
+                """
+                INSERT INTO entities (name, file_path, type, source_code, blob_hash, blob_offset, blob_length)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                added
+            )
+        # Les versions précédentes du fichier ne sont plus référencées : leurs blobs partent avec elles.
+        await self._drop_orphan_blobs(cursor, {row['blob_hash'] for row in stored.values()} - {file_blob, None})
+
+        entity_ids = {name: row['id'] for name, row in stored.items() if name in wanted}
+        if added:
+            await cursor.execute("SELECT id, name FROM entities WHERE file_path = ?", (file_path,))
+            entity_ids = {row['name']: row['id'] for row in await cursor.fetchall()}
+
+        # 3. Relations voulues, comparées à celles qui restent après la suppression des entités.
+        wanted_relations = set()
+        for rel in relationships:
+            source_id = entity_ids.get(rel['source'])
+            target_id = entity_ids.get(rel['target'])
+
+            if source_id and target_id:
+                wanted_relations.add((source_id, target_id, rel['type']))
+            else:
+                logger.warning(f"Could not find IDs for relationship: {rel}. Skipping.")
+
+        await cursor.execute(
+            """
+            SELECT r.source_id, r.target_id, r.type FROM relationships r
+            JOIN entities e ON e.id = r.source_id
+            WHERE e.file_path = ?
+            """,
+            (file_path,)
+        )
+        stored_relations = {tuple(row) for row in await cursor.fetchall()}
+        removed_relations = stored_relations - wanted_relations
+        added_relations = wanted_relations - stored_relations
+        if removed_relations:
+            await cursor.executemany(
+                "DELETE FROM relationships WHERE source_id = ? AND target_id = ? AND type = ?", sorted(removed_relations)
+            )
+        if added_relations:
+            await cursor.executemany(
+                "INSERT INTO relationships (source_id, target_id, type) VALUES (?, ?, ?)", sorted(added_relations)
+            )
+
+        result = {
+            "entities_added": len(added),
+            "entities_updated": len(updated),
+            "entities_removed": len(removed),
+            "relations_added": len(added_relations),
+            "relations_removed": len(removed_relations),
+        }
+        if any(result.values()):
+            await self._bump_file_versions(cursor, [file_path])
+        if blob_stored:
+            # Le blob n'existe que si une entité le référence : les chunks ne pointent que vers lui.
+            result["blob_hash"] = file_blob
+        return result
+
+    async def _store_blob(self, cursor: aiosqlite.Cursor, hash_: str, data: bytes) -> None:
+        """Enregistre le blob s'il n'existe pas encore (le texte n'est compressé qu'à ce moment-là)."""
+        await cursor.execute("SELECT 1 FROM blobs WHERE hash = ?", (hash_,))
+        if await cursor.fetchone() is None:
+            await cursor.execute(
+                "INSERT INTO blobs (hash, codec, size, data) VALUES (?, ?, ?, ?)",
+                (hash_, self.blob_codec, len(data), compress(data, self.blob_codec))
+            )
+
+    async def _drop_orphan_blobs(self, cursor: aiosqlite.Cursor, hashes: set) -> None:
+        for hash_ in hashes:
+            await cursor.execute(
+                "DELETE FROM blobs WHERE hash = ? AND NOT EXISTS (SELECT 1 FROM entities WHERE blob_hash = ?)",
+                (hash_, hash_)
+            )
+            if cursor.rowcount:
+                self._blob_cache.discard(hash_)
+
+    @staticmethod
+    async def _bump_file_versions(cursor: aiosqlite.Cursor, file_paths: List[str]) -> None:
+        """Attribue aux fichiers une version supérieure à toutes les versions existantes."""
+        for file_path in file_paths:
+            await cursor.execute(
+                """
+                INSERT INTO file_versions (file_path, version)
+                VALUES (?, (SELECT COALESCE(MAX(version), 0) + 1 FROM file_versions))
+                ON CONFLICT(file_path) DO UPDATE SET version = excluded.version
+                """,
+                (file_path,)
+            )
+
+    async def find_entity_relationships(self, entity_name: str, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        Recherche les entités dont le nom contient `entity_name` (insensible à la casse) et retourne
+        leurs relations directes (entrantes et sortantes), paginées par `limit` / `offset`.
         Cette méthode remplace la fonction `search_code_graph` de l'ancien `graph_utils.py`.
+
+        Les correspondances exactes passent en premier, puis les préfixes, puis les sous-chaînes.
+        La recherche s'appuie sur l'index trigramme `entities_fts` ; en dessous de 3 caractères
+        (pas de trigramme), elle se replie sur un LIKE.
         """
         if not self.conn:
             await self.initialize()
 
-        if not os.path.exists(self.db_path):
+        if self.db_path != ":memory:" and not os.path.exists(self.db_path):
             logger.warning(f"Graph database file '{self.db_path}' not found. Run ingestion first.")
             return []
 
-        results = []
+        use_fts, params = _relationships_params(entity_name, limit, offset)
         try:
-            async with self.conn.cursor() as cursor:
-                # La recherche est insensible à la casse et partielle pour plus de flexibilité.
-                search_term = f"%{entity_name}%"
-                
-                # Recherche des relations sortantes ET entrantes en une seule requête optimisée.
-                # Utilisation de UNION pour combiner les deux cas de figure.
-                query = """
-                    SELECT 
-                        s.name AS source_name, s.type AS source_type, 
-                        r.type AS rel_type, 
-                        t.name AS target_name, t.type AS target_type
-                    FROM relationships r
-                    JOIN entities s ON r.source_id = s.id
-                    JOIN entities t ON r.target_id = t.id
-                    WHERE s.name LIKE ?
-                    
-                    UNION
-                    
-                    SELECT 
-                        s.name AS source_name, s.type AS source_type, 
-                        r.type AS rel_type, 
-                        t.name AS target_name, t.type AS target_type
-                    FROM relationships r
-                    JOIN entities s ON r.source_id = s.id
-                    JOIN entities t ON r.target_id = t.id
-                    WHERE t.name LIKE ?
-                """
-                
-                await cursor.execute(query, (search_term, search_term))
+            async with self._reading() as conn, conn.execute(_relationships_query(("main",), use_fts), params) as cursor:
                 relationships = await cursor.fetchall()
-                
-                if not relationships:
-                    logger.info(f"No relationships found for entity matching '{entity_name}'.")
-                    return []
-
-                for rel in relationships:
-                    fact = {
-                        "source": f"{rel['source_name']} ({rel['source_type']})",
-                        "relationship": rel['rel_type'],
-                        "target": f"{rel['target_name']} ({rel['target_type']})"
-                    }
-                    if fact not in results:
-                        results.append(fact)
         except Exception as e:
             logger.error(f"Error querying code graph for entity '{entity_name}': {e}", exc_info=True)
             raise RepositoryError(f"Error querying code graph: {e}")
 
-        return results
-    
+        if not relationships:
+            logger.info(f"No relationships found for entity matching '{entity_name}'.")
+        return _relationship_facts(relationships)
+
+    async def get_neighborhood(
+        self,
+        entity_name: str,
+        max_depth: int = 2,
+        direction: str = "both",
+        relationship_types: Optional[List[str]] = None,
+        max_fan_out: int = 200,
+        max_nodes: int = 500,
+        file_path: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Retourne les entités atteignables depuis `entity_name` en au plus `max_depth` relations,
+        avec leur distance minimale (`depth`), en une seule requête (CTE récursive).
+
+        Args:
+            direction: "outgoing", "incoming" ou "both".
+            relationship_types: Types de relation suivis (tous si None).
+            max_fan_out: Les nœuds de degré supérieur (ex: utilitaires appelés partout) sont
+                retournés mais pas développés.
+            max_nodes: Nombre maximal d'entités retournées, les plus proches d'abord.
+            file_path: Restreint l'entité de départ à un fichier (les noms ne sont uniques que par fichier).
+
+        Raises:
+            EntityNotFoundError: Si aucune entité ne porte ce nom.
+        """
+        if not self.conn:
+            await self.initialize()
+        params = _traversal_params(direction, max_depth, max_fan_out, relationship_types)
+        params.update({"name": entity_name, "file_path": file_path, "max_rows": max_nodes * (max_depth + 1), "limit": max_nodes + 1})
+        rows = await self._fetch_traversal(_neighborhood_query(("main",), direction), params, entity_name)
+        if not rows:
+            raise EntityNotFoundError(entity_name)
+        # Les entités de départ (profondeur 0) servent à distinguer "inconnue" de "isolée".
+        return [dict(row) for row in rows if row["depth"] > 0][:max_nodes]
+
+    async def find_shortest_path(
+        self,
+        source_name: str,
+        target_name: str,
+        max_depth: int = 6,
+        relationship_types: Optional[List[str]] = None,
+        directed: bool = True,
+        max_fan_out: int = 200,
+        max_visited: int = 100_000
+    ) -> List[Dict[str, str]]:
+        """
+        Plus court chemin de `source_name` à `target_name`, en une seule requête (CTE récursive).
+
+        Le parcours est en largeur : chaque nœud est retenu à sa profondeur minimale, et le chemin
+        est reconstruit depuis l'arrivée la plus proche. Au plus `max_depth` + 1 lignes par nœud
+        sont explorées (une par profondeur), sans énumérer les chemins.
+
+        Args:
+            directed: Si False, les relations sont aussi suivies à rebours.
+            max_visited: Nombre maximal de couples (nœud, profondeur) explorés. La borne coupe les
+                niveaux les plus profonds : un chemin trouvé reste le plus court.
+
+        Returns:
+            Les relations du chemin, au format de `find_entity_relationships`, ou [] si aucun
+            chemin n'existe dans les limites données.
+
+        Raises:
+            TraversalLimitError: Si aucun chemin n'a été trouvé avant d'atteindre `max_visited`.
+        """
+        if not self.conn:
+            await self.initialize()
+        params = _traversal_params("outgoing" if directed else "both", max_depth, max_fan_out, relationship_types)
+        params.update({"source": source_name, "target": target_name, "max_visited": max_visited})
+        rows = await self._fetch_traversal(_shortest_path_query(("main",), directed), params, source_name)
+        return _shortest_path(rows, source_name, target_name, max_visited)
+
+    async def get_call_tree(
+        self,
+        entity_name: str,
+        direction: str = "callees",
+        max_depth: int = 3,
+        max_fan_out: int = 200,
+        max_nodes: int = 500,
+        file_path: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Arbre des appels (relations CALLS) depuis `entity_name`, en une seule requête (CTE récursive).
+
+        Args:
+            direction: "callees" (fonctions appelées) ou "callers" (fonctions appelantes).
+            max_nodes: Nombre maximal de nœuds de l'arbre, les moins profonds d'abord.
+
+        Returns:
+            Un arbre par entité portant ce nom : {"name", "type", "file_path", "children": [...]}.
+            Une fonction récursive réapparaît dans sa propre descendance jusqu'à `max_depth`.
+
+        Raises:
+            EntityNotFoundError: Si aucune entité ne porte ce nom.
+        """
+        if not self.conn:
+            await self.initialize()
+        if direction not in ("callees", "callers"):
+            raise RepositoryError(f"Invalid direction {direction!r}, expected 'callees' or 'callers'")
+        params = _traversal_params("outgoing", max_depth, max_fan_out, ["CALLS"])
+        params.update({"name": entity_name, "file_path": file_path, "max_nodes": max_nodes})
+        rows = await self._fetch_traversal(_call_tree_query(("main",), direction), params, entity_name)
+        if not rows:
+            raise EntityNotFoundError(entity_name)
+        return _call_tree(rows)
+
+    async def get_entity_source(self, entity_name: str, file_path: str) -> str:
+        """
+        Code source d'une entité. S'il est stocké comme référence à un blob, celui-ci est lu et
+        décompressé à la première demande, puis servi depuis le cache LRU des blobs.
+
+        Raises:
+            EntityNotFoundError: Si le fichier ne contient pas d'entité de ce nom.
+        """
+        async with self._reading() as conn:
+            try:
+                row = await self._entity_source_row(conn, "", entity_name, file_path)
+                data = self._blob_cache.get(row['blob_hash']) if row['blob_hash'] is not None else None
+                if row['blob_hash'] is not None and data is None:
+                    # Entité et blob lus par une seule requête : une réingestion concurrente ne peut
+                    # pas retirer le blob entre la lecture de la référence et celle du blob.
+                    row = await self._entity_source_row(conn, ", b.codec, b.data", entity_name, file_path)
+                    if row['blob_hash'] is not None:
+                        if row['data'] is None:
+                            raise RepositoryError(f"Blob {row['blob_hash']} referenced by an entity is missing")
+                        data = decompress(row['data'], row['codec'])
+                        self._blob_cache.put(row['blob_hash'], data)
+            except (EntityNotFoundError, RepositoryError):
+                raise
+            except Exception as e:
+                logger.error(f"Failed to read source of entity '{entity_name}': {e}", exc_info=True)
+                raise RepositoryError(f"Failed to read entity source: {e}")
+        if row['blob_hash'] is None:
+            return row['source_code'] or ''
+        return data[row['blob_offset']:row['blob_offset'] + row['blob_length']].decode('utf-8')
+
+    @staticmethod
+    async def _entity_source_row(conn: aiosqlite.Connection, blob_columns: str, entity_name: str, file_path: str) -> aiosqlite.Row:
+        async with conn.execute(
+            f"""
+            SELECT e.source_code, e.blob_hash, e.blob_offset, e.blob_length{blob_columns}
+            FROM entities e LEFT JOIN blobs b ON b.hash = e.blob_hash
+            WHERE e.name = ? AND e.file_path = ?
+            """,
+            (entity_name, file_path)
+        ) as cursor:
+            row = await cursor.fetchone()
+        if row is None:
+            raise EntityNotFoundError(entity_name)
+        return row
+
+    async def gc_blobs(self) -> int:
+        """
+        Supprime les blobs qu'aucune entité ne référence. Les écritures retirent déjà les blobs
+        des versions remplacées d'un fichier ; ce balayage complet rattrape le reste (ex: base
+        nettoyée par `clean_db`).
+
+        Returns:
+            Le nombre de blobs supprimés.
+        """
+        if not self.conn:
+            await self.initialize()
+        async with self._writing():
+            try:
+                async with self.conn.execute(
+                    "DELETE FROM blobs WHERE hash NOT IN (SELECT blob_hash FROM entities WHERE blob_hash IS NOT NULL) RETURNING hash"
+                ) as cursor:
+                    removed = [row[0] for row in await cursor.fetchall()]
+                await self.conn.commit()
+            except Exception as e:
+                await self.conn.rollback()
+                logger.error(f"Failed to collect unreferenced blobs: {e}", exc_info=True)
+                raise RepositoryError(f"Failed to collect unreferenced blobs: {e}")
+        for hash_ in removed:
+            self._blob_cache.discard(hash_)
+        logger.info(f"Blob garbage collection: {len(removed)} unreferenced blobs removed.")
+        return len(removed)
+
+    async def _fetch_traversal(self, query: str, params: Dict[str, Any], entity_name: str) -> List[aiosqlite.Row]:
+        try:
+            async with self._reading() as conn, conn.execute(query, params) as cursor:
+                return await cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Graph traversal failed for entity '{entity_name}': {e}", exc_info=True)
+            raise RepositoryError(f"Graph traversal failed: {e}")
+
+    async def get_graph_version(self) -> int:
+        """Version courante du graphe : la plus haute version de fichier (0 si vide)."""
+        async with self._reading() as conn:
+            return await self._graph_version(conn)
+
+    @staticmethod
+    async def _graph_version(conn: aiosqlite.Connection) -> int:
+        async with conn.execute("SELECT COALESCE(MAX(version), 0) FROM file_versions") as cursor:
+            return (await cursor.fetchone())[0]
+
+    async def export_graph(self, since_version: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Exporte les lignes du graphe pour construire un snapshot en mémoire.
+
+        Args:
+            since_version: Si fourni, seuls les fichiers modifiés depuis cette version sont exportés :
+                leurs entités, et les relations dont au moins une extrémité leur appartient.
+
+        Returns:
+            {"version", "changed_files" (None pour un export complet), "entities": [(id, name, type, file_path)],
+             "relationships": [(source_id, target_id, type)]}
+        """
+        async with self._reading() as conn:
+            # Sur un lecteur du pool, l'export se fait dans une transaction de lecture : version et
+            # lignes viennent du même état de la base. Sur la connexion d'écriture (pas de pool), la
+            # version est lue en premier : une écriture concurrente sera au pire ré-exportée au
+            # rafraîchissement suivant.
+            snapshot_read = conn is not self.conn
+            try:
+                if snapshot_read:
+                    await conn.execute("BEGIN")
+                return await self._export_rows(conn, since_version)
+            except Exception as e:
+                logger.error(f"Failed to export code graph: {e}", exc_info=True)
+                raise RepositoryError(f"Failed to export code graph: {e}")
+            finally:
+                if snapshot_read:
+                    await conn.rollback()
+
+    async def _export_rows(self, conn: aiosqlite.Connection, since_version: Optional[int]) -> Dict[str, Any]:
+        version = await self._graph_version(conn)
+        if since_version is None:
+            async with conn.execute("SELECT id, name, type, file_path FROM entities ORDER BY id") as cursor:
+                entities = [tuple(row) for row in await cursor.fetchall()]
+            async with conn.execute("SELECT source_id, target_id, type FROM relationships") as cursor:
+                relationships = [tuple(row) for row in await cursor.fetchall()]
+            return {"version": version, "changed_files": None, "entities": entities, "relationships": relationships}
+
+        async with conn.execute("SELECT file_path FROM file_versions WHERE version > ?", (since_version,)) as cursor:
+            changed_files = [row[0] for row in await cursor.fetchall()]
+        changed = "SELECT file_path FROM file_versions WHERE version > :since"
+        async with conn.execute(
+            f"SELECT id, name, type, file_path FROM entities WHERE file_path IN ({changed}) ORDER BY id",
+            {"since": since_version}
+        ) as cursor:
+            entities = [tuple(row) for row in await cursor.fetchall()]
+        async with conn.execute(
+            f"""
+            SELECT r.source_id, r.target_id, r.type FROM relationships r
+            JOIN entities s ON s.id = r.source_id JOIN entities t ON t.id = r.target_id
+            WHERE s.file_path IN ({changed}) OR t.file_path IN ({changed})
+            """,
+            {"since": since_version}
+        ) as cursor:
+            relationships = [tuple(row) for row in await cursor.fetchall()]
+        return {"version": version, "changed_files": changed_files, "entities": entities, "relationships": relationships}
+
     async def clean_db(self) -> None:
         """Supprime toutes les données des tables du graphe."""
         if not self.conn:
             await self.initialize()
             
-        try:
-            async with self.conn.cursor() as cursor:
-                await cursor.execute("DELETE FROM relationships;")
-                await cursor.execute("DELETE FROM entities;")
-                # Réinitialise la séquence des IDs auto-incrémentés pour une base propre.
-                await cursor.execute("DELETE FROM sqlite_sequence WHERE name IN ('entities');")
-            await self.conn.commit()
-            logger.warning("Graph database has been cleaned (all entities and relationships removed).")
-        except Exception as e:
-            await self.conn.rollback()
-            logger.error(f"Failed to clean graph database: {e}", exc_info=True)
-            raise RepositoryError(f"Failed to clean graph database: {e}")
\ No newline at end of file
+        async with self._writing():
+            try:
+                async with self.conn.cursor() as cursor:
+                    await cursor.execute("DELETE FROM relationships;")
+                    await cursor.execute("DELETE FROM entities;")
+                    # Les fichiers vidés changent de version : les snapshots retirent leurs entités.
+                    # (Sans AUTOINCREMENT, les IDs repartent d'eux-mêmes de 1 : pas de sqlite_sequence.)
+                    await cursor.execute("UPDATE file_versions SET version = (SELECT MAX(version) + 1 FROM file_versions);")
+                await self.conn.commit()
+                logger.warning("Graph database has been cleaned (all entities and relationships removed).")
+            except Exception as e:
+                await self.conn.rollback()
+                logger.error(f"Failed to clean graph database: {e}", exc_info=True)
+                raise RepositoryError(f"Failed to clean graph database: {e}")
\ No newline at end of file
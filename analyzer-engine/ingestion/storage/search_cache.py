@@ -0,0 +1,167 @@
+# FICHIER: analyzer-engine/ingestion/storage/search_cache.py
+"""
+Cache en mémoire des résultats de recherche vectorielle et hybride.
+
+Les clés combinent l'empreinte du vecteur de requête, le texte, la limite et les
+poids. Chaque entrée a une durée de vie (TTL) et le cache est borné en mémoire
+(éviction LRU). Toute écriture dans le repository incrémente un compteur de
+génération qui invalide d'un coup toutes les entrées existantes.
+
+Le cache est local au processus : les écritures faites par un autre processus
+ne sont prises en compte qu'à l'expiration du TTL.
+"""
+import os
+import sys
+import time
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+DEFAULT_TTL_SECONDS = 300.0
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def vector_fingerprint(embedding: Sequence[float]) -> bytes:
+    """Empreinte BLAKE2b (16 octets) d'un vecteur, calculée sur sa représentation float32."""
+    buffer = np.ascontiguousarray(embedding, dtype=np.float32)
+    return hashlib.blake2b(buffer.tobytes(), digest_size=16).digest()
+
+
+def _estimate_size(results: List[Any]) -> int:
+    """Estimation (octets) de la mémoire retenue par une liste de résultats."""
+    size = sys.getsizeof(results)
+    for result in results:
+        content = getattr(result, "content", "")
+        metadata = getattr(result, "metadata", {})
+        # Objet résultat + texte du chunk + métadonnées (approximées par leur nombre de clés).
+        size += 512 + len(content) + 128 * len(metadata)
+    return size
+
+
+@dataclass
+class SearchCacheStats:
+    """Compteurs d'un SearchResultCache."""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hit_rate, 4),
+        }
+
+
+class SearchResultCache:
+    """Cache LRU à TTL et borne mémoire, invalidé par compteur de génération."""
+
+    def __init__(self, ttl_seconds: float = DEFAULT_TTL_SECONDS, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Args:
+            ttl_seconds: Durée de vie d'une entrée.
+            max_bytes: Mémoire maximale (estimée) retenue par les résultats en cache.
+        """
+        self.ttl = ttl_seconds
+        self.max_bytes = max_bytes
+        self.generation = 0
+        self.stats = SearchCacheStats()
+        self.current_bytes = 0
+        # clé -> (génération, expiration, taille, résultats)
+        self._entries: "OrderedDict[Hashable, Tuple[int, float, int, List[Any]]]" = OrderedDict()
+
+    @staticmethod
+    def make_key(kind: str, embedding: Sequence[float], *params: Hashable) -> Tuple[Hashable, ...]:
+        """Construit la clé d'une recherche : type, empreinte du vecteur et paramètres scalaires."""
+        return (kind, vector_fingerprint(embedding), *params)
+
+    def get(self, key: Hashable) -> Optional[List[Any]]:
+        """Retourne une copie de la liste de résultats en cache, ou None."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return None
+        generation, expires_at, size, results = entry
+        if generation != self.generation or expires_at <= time.monotonic():
+            self._remove(key, size)
+            self.stats.expirations += 1
+            self.stats.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return list(results)
+
+    def put(self, key: Hashable, results: List[Any], generation: Optional[int] = None) -> None:
+        """
+        Met en cache une liste de résultats, puis applique la borne mémoire (LRU).
+
+        Args:
+            generation: Génération lue avant d'interroger la base. Si une écriture a eu
+                lieu entre-temps, les résultats sont peut-être périmés et ne sont pas conservés.
+        """
+        if generation is not None and generation != self.generation:
+            return
+        size = _estimate_size(results)
+        if size > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.current_bytes -= previous[2]
+        self._entries[key] = (self.generation, time.monotonic() + self.ttl, size, list(results))
+        self.current_bytes += size
+        while self.current_bytes > self.max_bytes and self._entries:
+            _, (_, _, evicted_size, _) = self._entries.popitem(last=False)
+            self.current_bytes -= evicted_size
+            self.stats.evictions += 1
+
+    def invalidate(self) -> None:
+        """Nouvelle génération : toutes les entrées existantes deviennent invalides."""
+        self.generation += 1
+        self._entries.clear()
+        self.current_bytes = 0
+        self.stats.invalidations += 1
+
+    def _remove(self, key: Hashable, size: int) -> None:
+        del self._entries[key]
+        self.current_bytes -= size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def snapshot(self) -> Dict[str, float]:
+        """Métriques du cache : compteurs, taux de succès, taille et génération courante."""
+        return {
+            **self.stats.as_dict(),
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "generation": self.generation,
+        }
+
+
+def create_search_cache() -> Optional[SearchResultCache]:
+    """
+    Crée le cache configuré par les variables d'environnement SEARCH_CACHE_ENABLED
+    (défaut "true"), SEARCH_CACHE_TTL_SECONDS et SEARCH_CACHE_MAX_MB.
+
+    Returns:
+        Une instance de SearchResultCache, ou None si le cache est désactivé.
+    """
+    if os.getenv("SEARCH_CACHE_ENABLED", "true").lower() in ("0", "false", "no"):
+        return None
+    return SearchResultCache(
+        ttl_seconds=float(os.getenv("SEARCH_CACHE_TTL_SECONDS") or DEFAULT_TTL_SECONDS),
+        max_bytes=int(float(os.getenv("SEARCH_CACHE_MAX_MB") or DEFAULT_MAX_BYTES / (1024 * 1024)) * 1024 * 1024),
+    )
@@ -8,6 +8,7 @@ DROP FUNCTION IF EXISTS get_document_chunks(uuid);
 -- La dimension du vecteur est spécifiée pour une suppression précise.
 DROP FUNCTION IF EXISTS hybrid_search(vector(768), text, integer, double precision);
 DROP FUNCTION IF EXISTS match_chunks(vector(768), integer);
+DROP TABLE IF EXISTS embedding_dead_letters CASCADE;
 DROP TABLE IF EXISTS messages CASCADE;
 DROP TABLE IF EXISTS sessions CASCADE;
 DROP TABLE IF EXISTS chunks CASCADE;
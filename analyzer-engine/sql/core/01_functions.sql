@@ -35,11 +35,15 @@ BEGIN
     WITH vector_results AS (
         SELECT id, 1 - (embedding <=> query_embedding) AS vector_sim
         FROM chunks WHERE embedding IS NOT NULL
-        ORDER BY vector_sim DESC LIMIT match_count * 2
+        -- Trier sur l'opérateur de distance (et non sur l'alias) permet l'usage de l'index ANN.
+        ORDER BY embedding <=> query_embedding LIMIT match_count * 2
     ),
     text_results AS (
         SELECT id, ts_rank_cd(to_tsvector('english', content), plainto_tsquery('english', query_text)) AS text_sim
-        FROM chunks WHERE to_tsvector('english', content) @@ plainto_tsquery('english', query_text)
+        FROM chunks
+        -- Les chunks en attente de ré-embedding restent hors des résultats jusqu'à leur réparation.
+        WHERE embedding IS NOT NULL
+          AND to_tsvector('english', content) @@ plainto_tsquery('english', query_text)
     )
     SELECT c.id, c.document_id, c.content,
            (COALESCE(v.vector_sim, 0) * (1 - text_weight) + COALESCE(t.text_sim, 0) * text_weight),
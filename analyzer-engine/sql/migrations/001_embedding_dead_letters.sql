@@ -0,0 +1,27 @@
+-- FICHIER: sql/migrations/001_embedding_dead_letters.sql
+-- Migration d'une base existante : crée la file des embeddings échoués et y
+-- déplace les chunks stockés avec un vecteur nul par l'ancien repli sur zéros.
+-- Idempotente : peut être rejouée sans effet de bord.
+-- Rejouer ensuite core/01_functions.sql (hybrid_search exclut désormais ces chunks).
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS embedding_dead_letters (
+    chunk_id UUID PRIMARY KEY REFERENCES chunks(id) ON DELETE CASCADE,
+    error TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    last_attempt_at TIMESTAMP WITH TIME ZONE
+);
+CREATE INDEX IF NOT EXISTS idx_embedding_dead_letters_pending ON embedding_dead_letters (attempts, created_at);
+
+INSERT INTO embedding_dead_letters (chunk_id, error)
+SELECT id, COALESCE(metadata->>'embedding_error', 'zero-vector fallback')
+FROM chunks
+WHERE embedding IS NOT NULL AND vector_norm(embedding) = 0
+ON CONFLICT (chunk_id) DO NOTHING;
+
+UPDATE chunks SET embedding = NULL
+WHERE embedding IS NOT NULL AND vector_norm(embedding) = 0;
+
+COMMIT;
@@ -0,0 +1,24 @@
+-- FICHIER: sql/migrations/002_document_upsert.sql
+-- Migration d'une base existante vers les documents idempotents (un document par source).
+-- Compacte les doublons créés par les ré-ingestions : seule la version la plus récente
+-- de chaque source est conservée, les chunks des autres partent en cascade.
+-- Idempotente : peut être rejouée sans effet de bord.
+
+BEGIN;
+
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS content_hash TEXT;
+
+DELETE FROM documents d
+USING (
+    SELECT id, ROW_NUMBER() OVER (PARTITION BY source ORDER BY created_at DESC, id DESC) AS rank
+    FROM documents
+) ranked
+WHERE d.id = ranked.id AND ranked.rank > 1;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_documents_source ON documents (source);
+
+COMMIT;
+
+-- Les documents existants n'ont pas d'empreinte (content_hash NULL) : leur prochaine
+-- ré-ingestion les remplace une fois, puis les suivantes sont sans effet si rien ne change.
+VACUUM ANALYZE chunks;
@@ -0,0 +1,7 @@
+-- FICHIER: sql/migrations/003_hybrid_search_ann_order.sql
+-- Migration d'une base existante : hybrid_search trie désormais ses candidats vectoriels
+-- sur l'opérateur de distance, ce qui lui permet d'utiliser l'index ANN (HNSW / IVFFlat)
+-- et les réglages ef_search / probes par requête. Les fonctions sont recréées à l'identique
+-- du schéma courant (CREATE OR REPLACE).
+
+\ir ../core/01_functions.sql
@@ -0,0 +1,21 @@
+-- FICHIER: sql/migrations/004_document_keyset_pagination.sql
+-- Migration d'une base existante : colonne chunk_count dénormalisée (remplie à partir
+-- des chunks existants) et index de pagination par clé (created_at, id).
+-- Idempotente : peut être rejouée sans effet de bord.
+
+BEGIN;
+
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS chunk_count INTEGER NOT NULL DEFAULT 0;
+
+-- Le remplissage ne doit pas toucher updated_at.
+ALTER TABLE documents DISABLE TRIGGER update_documents_updated_at;
+UPDATE documents d
+SET chunk_count = counts.n
+FROM (SELECT document_id, COUNT(*) AS n FROM chunks GROUP BY document_id) counts
+WHERE d.id = counts.document_id AND d.chunk_count IS DISTINCT FROM counts.n;
+ALTER TABLE documents ENABLE TRIGGER update_documents_updated_at;
+
+CREATE INDEX IF NOT EXISTS idx_documents_created_at_id ON documents (created_at DESC, id DESC);
+DROP INDEX IF EXISTS idx_documents_created_at;
+
+COMMIT;
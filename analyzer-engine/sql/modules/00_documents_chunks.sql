@@ -7,6 +7,10 @@ CREATE TABLE documents (
     source TEXT NOT NULL,
     content TEXT NOT NULL,
     metadata JSONB DEFAULT '{}',
+    -- Empreinte SHA-256 du contenu ingéré : une ré-ingestion à l'identique est sans effet.
+    content_hash TEXT,
+    -- Nombre de chunks, maintenu à l'écriture par le repository (évite un agrégat à la lecture).
+    chunk_count INTEGER NOT NULL DEFAULT 0,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
@@ -23,8 +27,11 @@ CREATE TABLE chunks (
 );
 
 -- Index pour la performance
+-- Un document par source : clé de l'upsert de save_document_with_chunks.
+CREATE UNIQUE INDEX idx_documents_source ON documents (source);
 CREATE INDEX idx_documents_metadata ON documents USING GIN (metadata);
-CREATE INDEX idx_documents_created_at ON documents (created_at DESC);
+-- Pagination par clé (created_at, id) de list_documents_page.
+CREATE INDEX idx_documents_created_at_id ON documents (created_at DESC, id DESC);
 CREATE INDEX idx_chunks_document_id ON chunks (document_id);
 CREATE INDEX idx_chunks_chunk_index ON chunks (document_id, chunk_index);
 CREATE INDEX idx_chunks_content_trgm ON chunks USING GIN (content gin_trgm_ops);
@@ -0,0 +1,15 @@
+-- FICHIER: sql/modules/02_embedding_dead_letters.sql
+-- Responsabilité Unique : File d'attente des chunks dont l'embedding a échoué.
+-- Ces chunks sont stockés avec embedding = NULL (donc exclus des recherches)
+-- jusqu'à leur réparation par la commande `reembed`.
+
+CREATE TABLE embedding_dead_letters (
+    chunk_id UUID PRIMARY KEY REFERENCES chunks(id) ON DELETE CASCADE,
+    error TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    last_attempt_at TIMESTAMP WITH TIME ZONE
+);
+
+-- Index pour la performance
+CREATE INDEX idx_embedding_dead_letters_pending ON embedding_dead_letters (attempts, created_at);
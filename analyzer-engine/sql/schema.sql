@@ -18,6 +18,7 @@
 \echo '==> Creating table modules...'
 \i modules/00_documents_chunks.sql
 \i modules/01_sessions_messages.sql
+\i modules/02_embedding_dead_letters.sql
 
 -- 3. Vues : abstractions pour la lecture des données.
 \echo '==> Creating logical views...'
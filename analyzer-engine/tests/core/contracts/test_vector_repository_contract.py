@@ -0,0 +1,125 @@
+# FICHIER: tests/core/contracts/test_vector_repository_contract.py
+"""
+Tests de contrat d'IVectorRepository, exécutés contre chaque implémentation.
+Le cas PostgreSQL nécessite testcontainers et un schéma appliqué (marqué integration).
+"""
+import numpy as np
+import pytest
+
+from core.exceptions.base_exceptions import RepositoryError
+from ingestion.storage.repositories.numpy_vector_repository import NumpyVectorRepository
+
+DIMENSION = 768
+
+
+@pytest.fixture(params=[
+    "numpy",
+    pytest.param("postgres", marks=pytest.mark.integration),
+])
+async def vector_repo(request):
+    if request.param == "postgres":
+        pytest.importorskip("testcontainers")
+        yield request.getfixturevalue("postgres_repo")
+        return
+    repo = NumpyVectorRepository(path=None, dimension=DIMENSION)
+    await repo.initialize()
+    yield repo
+    await repo.close()
+
+
+def unit_vector(seed: int) -> np.ndarray:
+    vector = np.random.default_rng(seed).standard_normal(DIMENSION).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def make_chunks(seed: int, contents):
+    return [
+        {"content": content, "index": i, "metadata": {"n": i}, "token_count": 3, "embedding": unit_vector(seed + i)}
+        for i, content in enumerate(contents)
+    ]
+
+
+async def test_vector_search_returns_nearest_chunk_first(vector_repo):
+    """La recherche vectorielle classe en tête le chunk dont le vecteur est la requête."""
+    await vector_repo.save_document_with_chunks("a.py", "doc a", make_chunks(0, ["alpha", "beta", "gamma"]), {})
+    await vector_repo.save_document_with_chunks("b.py", "doc b", make_chunks(10, ["delta"]), {})
+
+    results = await vector_repo.vector_search(unit_vector(1), limit=2)
+
+    assert [r.content for r in results][0] == "beta"
+    assert len(results) == 2
+    assert results[0].document_source == "a.py"
+    assert results[0].score == pytest.approx(1.0, abs=1e-4)
+    assert results[0].score >= results[1].score
+
+
+async def test_hybrid_search_favours_text_match(vector_repo):
+    """À vecteurs équidistants, le chunk contenant les termes de la requête l'emporte."""
+    await vector_repo.save_document_with_chunks("a.py", "doc a", make_chunks(0, ["parse config file", "render template"]), {})
+
+    results = await vector_repo.hybrid_search(unit_vector(99), "render template", limit=2, text_weight=0.9)
+
+    assert results[0].content == "render template"
+
+
+async def test_save_is_idempotent_and_replaces_changed_documents(vector_repo):
+    """Contenu inchangé : aucune écriture ; contenu modifié : les chunks sont remplacés."""
+    assert await vector_repo.save_document_with_chunks("a.py", "doc a", make_chunks(0, ["one", "two"]), {}) == 2
+    assert await vector_repo.save_document_with_chunks("a.py", "doc a", make_chunks(0, ["one", "two"]), {}) == 0
+    assert await vector_repo.save_document_with_chunks("a.py", "doc a", make_chunks(5, ["three"]), {}) == 1
+
+    documents = await vector_repo.list_documents(limit=10, offset=0)
+    assert len(documents) == 1 and documents[0].chunk_count == 1
+    chunks = await vector_repo.get_document_chunks(documents[0].id)
+    assert [c["content"] for c in chunks] == ["three"]
+    assert [r.content for r in await vector_repo.vector_search(unit_vector(0), limit=5)] == ["three"]
+
+
+async def test_batch_save_isolates_failing_documents(vector_repo):
+    """Un document invalide n'empêche pas l'écriture des autres."""
+    bad_chunks = [{"content": "broken", "index": 0, "metadata": {}, "embedding": [1.0, 2.0]}]
+    results = await vector_repo.save_documents_with_chunks([
+        {"file_path": "good.py", "document_content": "g", "chunks": make_chunks(0, ["ok"]), "document_metadata": {}},
+        {"file_path": "bad.py", "document_content": "b", "chunks": bad_chunks, "document_metadata": {}},
+    ])
+
+    assert results["good.py"] == {"chunks_saved": 1, "unchanged": False}
+    assert "error" in results["bad.py"]
+    assert [d.source for d in await vector_repo.list_documents(limit=10, offset=0)] == ["good.py"]
+
+
+async def test_documents_page_through_cursor(vector_repo):
+    """La pagination par curseur parcourt tous les documents, sans doublon."""
+    for i in range(5):
+        await vector_repo.save_document_with_chunks(f"f{i}.py", f"doc {i}", make_chunks(i, [f"c{i}"]), {})
+
+    seen, cursor = [], None
+    while True:
+        page = await vector_repo.list_documents_page(limit=2, cursor=cursor)
+        seen.extend(d.source for d in page.documents)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    assert sorted(seen) == [f"f{i}.py" for i in range(5)]
+    with pytest.raises(RepositoryError):
+        await vector_repo.list_documents_page(limit=2, cursor="not-a-cursor")
+
+
+async def test_failed_embeddings_are_queued_then_repaired(vector_repo):
+    """Un chunk sans embedding est exclu de la recherche et réparé via la file des échecs."""
+    chunks = make_chunks(0, ["embedded", "missing"])
+    chunks[1]["embedding"] = None
+    chunks[1]["metadata"]["embedding_error"] = "timeout"
+    await vector_repo.save_document_with_chunks("a.py", "doc a", chunks, {})
+
+    assert [r.content for r in await vector_repo.vector_search(unit_vector(7), limit=5)] == ["embedded"]
+    pending = await vector_repo.get_pending_reembeds(limit=10, max_attempts=3)
+    assert [p["content"] for p in pending] == ["missing"]
+
+    await vector_repo.record_reembed_failures([pending[0]["chunk_id"]], "again")
+    assert (await vector_repo.get_pending_reembeds(limit=10, max_attempts=3))[0]["attempts"] == 1
+
+    assert await vector_repo.update_chunk_embeddings({pending[0]["chunk_id"]: unit_vector(7)}) == 1
+    assert await vector_repo.get_pending_reembeds(limit=10, max_attempts=3) == []
+    assert (await vector_repo.vector_search(unit_vector(7), limit=1))[0].content == "missing"
@@ -0,0 +1,173 @@
+# FICHIER: tests/ingestion/orchestration/test_storage_stage.py
+import asyncio
+import pytest
+from ingestion.orchestration.execution_context import ExecutionContext
+from ingestion.orchestration.stages.storage_stage import StorageStage
+from ingestion.storage.lexical_index import LexicalIndex
+
+
+class RecordingCodeRepo:
+    def __init__(self):
+        self.batches = []
+        self.files = []
+        self.closed = False
+
+    async def add_code_structures(self, files_data):
+        self.batches.append([f["file_path"] for f in files_data])
+        self.files.extend(files_data)
+        return {
+            f["file_path"]: {"entities_added": len(f["entities"]), "relations_added": 0}
+            for f in files_data
+        }
+
+    async def close(self):
+        self.closed = True
+
+
+class RecordingVectorRepo:
+    def __init__(self, failing=()):
+        self.batches = []
+        self.documents = []
+        self.failing = set(failing)
+        self.closed = False
+
+    async def save_documents_with_chunks(self, documents):
+        self.batches.append([d["file_path"] for d in documents])
+        self.documents.extend(documents)
+        return {
+            d["file_path"]: {"chunks_saved": 0, "error": "boom"} if d["file_path"] in self.failing
+            else {"chunks_saved": len(d["chunks"])}
+            for d in documents
+        }
+
+    async def close(self):
+        self.closed = True
+
+
+def make_context(name):
+    return ExecutionContext(
+        file_path=name, source_code=f"def {name}(): pass", language="python",
+        entities=[{"name": name, "type": "FUNCTION"}], chunks=[{"id": f"id-{name}", "content": name, "index": 0, "metadata": {}}]
+    )
+
+
+@pytest.mark.unit
+async def test_writes_are_buffered_and_flushed_by_size():
+    """Plusieurs fichiers partagent une transaction par backend ; le vidage se déclenche à la taille."""
+    code_repo, vector_repo = RecordingCodeRepo(), RecordingVectorRepo()
+    stage = StorageStage(code_repo=code_repo, vector_repo=vector_repo, flush_rows=4, flush_interval=60, lexical_index=LexicalIndex())
+
+    await stage.execute(make_context("a"))
+    assert code_repo.batches == [] and vector_repo.batches == []
+
+    await stage.execute(make_context("b"))
+    assert code_repo.batches == [["a", "b"]]
+    assert vector_repo.batches == [["a", "b"]]
+
+    await stage.execute(make_context("c"))
+    await stage.close()
+    assert vector_repo.batches == [["a", "b"], ["c"]]
+    assert code_repo.closed and vector_repo.closed
+
+
+@pytest.mark.unit
+async def test_buffer_is_flushed_after_interval():
+    code_repo, vector_repo = RecordingCodeRepo(), RecordingVectorRepo()
+    stage = StorageStage(code_repo=code_repo, vector_repo=vector_repo, flush_rows=1000, flush_interval=0.01, lexical_index=LexicalIndex())
+
+    await stage.execute(make_context("a"))
+    await asyncio.sleep(0.05)
+
+    assert vector_repo.batches == [["a"]]
+    assert stage.flush_count == 1
+
+
+@pytest.mark.unit
+async def test_flush_reports_per_file_errors():
+    """Un fichier en échec n'empêche pas l'écriture des autres et reste visible dans le résultat."""
+    stage = StorageStage(code_repo=RecordingCodeRepo(), vector_repo=RecordingVectorRepo(failing={"b"}),
+                         flush_rows=1000, flush_interval=60, lexical_index=LexicalIndex())
+
+    await stage.execute(make_context("a"))
+    await stage.execute(make_context("b"))
+    results = await stage.flush()
+
+    assert results["a"]["vector"] == {"chunks_saved": 1}
+    assert results["b"]["vector"]["error"] == "boom"
+
+
+@pytest.mark.unit
+async def test_lexical_index_follows_successful_writes():
+    """Seuls les documents effectivement écrits sont indexés."""
+    index = LexicalIndex()
+    stage = StorageStage(code_repo=RecordingCodeRepo(), vector_repo=RecordingVectorRepo(failing={"beta"}),
+                         flush_rows=1000, flush_interval=60, lexical_index=index)
+
+    await stage.execute(make_context("alpha"))
+    await stage.execute(make_context("beta"))
+    await stage.close()
+
+    assert [chunk_id for chunk_id, _ in index.search("alpha", limit=5)] == ["id-alpha"]
+    assert index.search("beta", limit=5) == []
+
+
+@pytest.mark.unit
+async def test_file_text_is_stored_with_the_graph():
+    """Le texte du fichier part avec le graphe (store de blobs) ; les chunks gardent leur contenu."""
+    code_repo, vector_repo = RecordingCodeRepo(), RecordingVectorRepo()
+    stage = StorageStage(code_repo=code_repo, vector_repo=vector_repo, flush_rows=1000, flush_interval=60, lexical_index=LexicalIndex())
+    context = make_context("é")
+
+    await stage.execute(context)
+    await stage.close()
+
+    assert code_repo.files[0]["source_code"] == context.source_code
+    document, = vector_repo.documents
+    assert document["chunks"][0] == {"id": "id-é", "content": "é", "index": 0, "metadata": {}}
+
+
+class FailingRepo(RecordingCodeRepo):
+    """Backend dont l'écriture échoue pour tout le lot (connexion perdue, commit refusé...)."""
+
+    async def add_code_structures(self, files_data):
+        raise RuntimeError("database is locked")
+
+    async def save_documents_with_chunks(self, documents):
+        raise RuntimeError("connection reset")
+
+
+@pytest.mark.unit
+async def test_whole_batch_failure_is_reported_per_file_and_spares_the_other_backend():
+    """Un graphe en échec n'empêche pas l'écriture vectorielle, et chaque fichier porte l'erreur."""
+    vector_repo = RecordingVectorRepo()
+    stage = StorageStage(code_repo=FailingRepo(), vector_repo=vector_repo, flush_rows=1000, flush_interval=60,
+                         lexical_index=LexicalIndex())
+
+    await stage.execute(make_context("a"))
+    await stage.execute(make_context("b"))
+    results = await stage.flush()
+
+    assert vector_repo.batches == [["a", "b"]]
+    assert {path: r["graph"] for path, r in results.items()} == {"a": {"error": "database is locked"}, "b": {"error": "database is locked"}}
+    assert results["a"]["vector"] == {"chunks_saved": 1}
+
+    stage = StorageStage(code_repo=RecordingCodeRepo(), vector_repo=FailingRepo(), flush_rows=1000, flush_interval=60,
+                         lexical_index=LexicalIndex())
+    await stage.execute(make_context("a"))
+    assert (await stage.flush())["a"]["vector"] == {"error": "connection reset"}
+
+
+@pytest.mark.unit
+async def test_close_closes_repositories_even_if_the_final_flush_fails():
+    class BrokenIndex(LexicalIndex):
+        def add_document(self, source, chunks):
+            raise RuntimeError("index corrupted")
+
+    code_repo, vector_repo = RecordingCodeRepo(), RecordingVectorRepo()
+    stage = StorageStage(code_repo=code_repo, vector_repo=vector_repo, flush_rows=1000, flush_interval=60,
+                         lexical_index=BrokenIndex())
+    await stage.execute(make_context("a"))
+
+    with pytest.raises(RuntimeError, match="index corrupted"):
+        await stage.close()
+    assert code_repo.closed and vector_repo.closed
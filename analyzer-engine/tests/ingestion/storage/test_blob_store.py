@@ -0,0 +1,47 @@
+# FICHIER: tests/ingestion/storage/test_blob_store.py
+import pytest
+
+from core.exceptions.base_exceptions import RepositoryError
+from ingestion.storage import blob_store
+from ingestion.storage.blob_store import BlobCache, compress, decompress, locate
+
+
+@pytest.mark.unit
+def test_locate_counts_utf8_bytes():
+    """Offset et longueur sont comptés en octets UTF-8, pour découper le blob décompressé."""
+    data = "# café\ndef crème():\n    return 'brûlé'\n".encode("utf-8")
+
+    offset, length = locate(data, "def crème():")
+
+    assert data[offset:offset + length].decode("utf-8") == "def crème():"
+    assert locate(data, "absent") is None
+    assert locate(data, "") is None
+
+
+@pytest.mark.unit
+def test_blobs_round_trip_and_keep_their_codec(monkeypatch):
+    """Un blob se relit avec son propre codec ; un blob zstd sans `zstandard` donne une erreur explicite."""
+    data = b"def f():\n    return 1\n" * 100
+    payload = compress(data, "zlib")
+    assert len(payload) < len(data)
+    assert decompress(payload, "zlib") == data
+
+    monkeypatch.setattr(blob_store, "zstandard", None)
+    monkeypatch.setenv("GRAPH_BLOB_COMPRESSION", "auto")
+    assert blob_store.default_codec() == "zlib"
+    with pytest.raises(RepositoryError, match="zstandard"):
+        decompress(payload, "zstd")
+
+
+@pytest.mark.unit
+def test_blob_cache_evicts_least_recently_used():
+    cache = BlobCache(max_bytes=10)
+    cache.put("a", b"aaaa")
+    cache.put("b", b"bbbb")
+    assert cache.get("a") == b"aaaa"
+
+    cache.put("c", b"cccc")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == b"aaaa" and cache.get("c") == b"cccc"
+    assert cache.stats()["bytes"] == 8
@@ -0,0 +1,84 @@
+# FICHIER: tests/ingestion/storage/test_graph_snapshot.py
+import numpy as np
+import pytest
+
+from core.exceptions.base_exceptions import EntityNotFoundError
+from ingestion.storage.graph_snapshot import GraphSnapshot
+
+
+def file_data(file_path, names, calls, types=None):
+    return {
+        "file_path": file_path,
+        "entities": [{"name": n, "type": (types or {}).get(n, "FUNCTION")} for n in names],
+        "relationships": [{"source": s, "target": t, "type": "CALLS"} for s, t in calls],
+    }
+
+
+async def _add_graph(repo):
+    await repo.add_code_structures([
+        file_data("a.py", ["main", "parse", "helper"], [("main", "parse"), ("parse", "helper"), ("main", "helper")]),
+        file_data("b.py", ["render", "helper"], [("render", "helper")]),
+    ])
+
+
+@pytest.mark.integration
+async def test_snapshot_matches_sql_traversal(sqlite_repo):
+    """Le parcours en mémoire donne le même voisinage que la CTE récursive."""
+    await _add_graph(sqlite_repo)
+    snapshot = await GraphSnapshot.load(sqlite_repo)
+
+    assert (snapshot.num_nodes, snapshot.num_edges) == (5, 4)
+    for direction in ("outgoing", "incoming", "both"):
+        expected = await sqlite_repo.get_neighborhood("parse", max_depth=3, direction=direction)
+        actual = snapshot.neighborhood("parse", max_depth=3, direction=direction)
+        assert [(n["name"], n["file_path"], n["depth"]) for n in actual] == \
+               [(n["name"], n["file_path"], n["depth"]) for n in expected]
+
+    [main] = snapshot.find("main")
+    assert sorted(snapshot.node(i)["name"] for i in snapshot.successors(main)) == ["helper", "parse"]
+    assert snapshot.top_degree(1)[0] == {**snapshot.node(snapshot.find("helper", "a.py")[0]), "degree": 2}
+    with pytest.raises(EntityNotFoundError):
+        snapshot.neighborhood("missing")
+
+
+@pytest.mark.integration
+async def test_refresh_reloads_only_changed_files(sqlite_repo):
+    """Après écriture d'un fichier, le rafraîchissement intègre ses nouvelles entités et relations."""
+    await _add_graph(sqlite_repo)
+    snapshot = await GraphSnapshot.load(sqlite_repo)
+    assert await snapshot.refresh(sqlite_repo) is snapshot
+    assert snapshot.find("draw").size == 0  # construit l'index des noms de l'ancien snapshot
+
+    await sqlite_repo.add_code_structure(file_data("b.py", ["render", "helper", "draw"], [("render", "helper"), ("render", "draw")]))
+    refreshed = await snapshot.refresh(sqlite_repo)
+
+    assert refreshed.version > snapshot.version
+    assert (refreshed.num_nodes, refreshed.num_edges) == (6, 5)
+    assert [n["name"] for n in refreshed.neighborhood("render", max_depth=1, direction="outgoing")] == ["draw", "helper"]
+    # Les relations entre fichiers inchangés sont reprises du snapshot précédent.
+    assert [n["name"] for n in refreshed.neighborhood("main", max_depth=1, direction="outgoing")] == ["helper", "parse"]
+    assert snapshot.num_nodes == 5
+    assert [refreshed.node(i)["file_path"] for i in refreshed.find("draw")] == ["b.py"]
+    assert snapshot.find("draw").size == 0
+
+    full = await GraphSnapshot.load(sqlite_repo)
+    assert np.array_equal(full.out_degree(), refreshed.out_degree())
+    assert np.array_equal(full.entity_ids, refreshed.entity_ids)
+
+
+@pytest.mark.integration
+async def test_saved_snapshot_is_memory_mapped(sqlite_repo, tmp_path):
+    """Un snapshot sauvegardé se rouvre en lecture seule, tableaux mappés en mémoire."""
+    await _add_graph(sqlite_repo)
+    snapshot = await GraphSnapshot.load(sqlite_repo)
+    directory = str(tmp_path / "graph")
+    snapshot.save(directory)
+    snapshot.save(directory)
+
+    opened = GraphSnapshot.open(directory)
+
+    assert isinstance(opened.out_targets, np.memmap) and not opened.out_targets.flags.writeable
+    assert opened.version == snapshot.version
+    assert opened.neighborhood("main", max_depth=2) == snapshot.neighborhood("main", max_depth=2)
+    await sqlite_repo.add_code_structure(file_data("c.py", ["extra"], []))
+    assert (await opened.refresh(sqlite_repo)).num_nodes == 6
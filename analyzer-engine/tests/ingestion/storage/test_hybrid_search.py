@@ -0,0 +1,68 @@
+# FICHIER: tests/ingestion/storage/test_hybrid_search.py
+import numpy as np
+import pytest
+
+from ingestion.storage.hybrid_search import HybridSearcher, rebuild_lexical_index, reciprocal_rank_fusion
+from ingestion.storage.lexical_index import LexicalIndex
+from ingestion.storage.repositories.numpy_vector_repository import NumpyVectorRepository
+
+DIMENSION = 8
+
+
+@pytest.mark.unit
+def test_reciprocal_rank_fusion_rewards_agreement():
+    """Un élément bien classé dans les deux listes passe devant ; le score maximal vaut 1."""
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d"]])
+
+    assert [item for item, _ in fused] == ["b", "a", "d", "c"]
+    assert reciprocal_rank_fusion([["a"], ["a"]]) == [("a", pytest.approx(1.0))]
+
+
+@pytest.mark.integration
+async def test_hybrid_search_surfaces_lexical_only_matches():
+    """Un chunk hors des voisins vectoriels est remonté par BM25 et chargé depuis le repository."""
+    repo = NumpyVectorRepository(path=None, dimension=DIMENSION)
+    await repo.initialize()
+    basis = np.eye(DIMENSION, dtype=np.float32)
+    chunks = [
+        {"id": f"00000000-0000-0000-0000-00000000000{i}", "content": content, "index": i, "metadata": {}, "embedding": basis[i]}
+        for i, content in enumerate(["def close_connection(): pass", "def open_file(): pass", "def getUserById(uid): pass"])
+    ]
+    await repo.save_document_with_chunks("a.py", "doc", chunks, {})
+
+    index = LexicalIndex()
+    assert await rebuild_lexical_index(repo, index, page_size=1) == 3
+
+    searcher = HybridSearcher(repo, index, candidates=1)
+    results = await searcher.search(basis[0], "user id", limit=2, text_weight=0.5)
+
+    assert {r.content for r in results} == {"def close_connection(): pass", "def getUserById(uid): pass"}
+    assert all(0 < r.score <= 1 for r in results)
+    assert results[0].document_source == "a.py"
+    await repo.close()
+
+
+@pytest.mark.integration
+async def test_hybrid_search_fills_limit_past_stale_lexical_entries():
+    """Les chunks de l'index lexical absents du repository sont sautés sans réduire le nombre de résultats."""
+    repo = NumpyVectorRepository(path=None, dimension=DIMENSION)
+    await repo.initialize()
+    basis = np.eye(DIMENSION, dtype=np.float32)
+    chunks = [
+        {"id": f"00000000-0000-0000-0000-00000000000{i}", "content": f"def user_{i}(): pass", "index": i, "metadata": {}, "embedding": basis[i]}
+        for i in range(3)
+    ]
+    await repo.save_document_with_chunks("a.py", "doc", chunks, {})
+
+    index = LexicalIndex()
+    await rebuild_lexical_index(repo, index)
+    index.add_document("deleted.py", [
+        {"id": f"00000000-0000-0000-0000-0000000000a{i}", "content": "user user user"} for i in range(3)
+    ])
+
+    searcher = HybridSearcher(repo, index, candidates=1)
+    results = await searcher.search(basis[0], "user", limit=2, text_weight=0.9)
+
+    assert len(results) == 2
+    assert all(r.document_source == "a.py" for r in results)
+    await repo.close()
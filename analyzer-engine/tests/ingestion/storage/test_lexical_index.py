@@ -0,0 +1,60 @@
+# FICHIER: tests/ingestion/storage/test_lexical_index.py
+import pytest
+
+from ingestion.storage.lexical_index import LexicalIndex
+
+
+def chunk(chunk_id, content):
+    return {"id": chunk_id, "content": content}
+
+
+@pytest.mark.unit
+def test_identifiers_are_found_by_their_sub_words():
+    """`getUserById` est retrouvé par "user" ; le chunk le plus spécifique passe en tête."""
+    index = LexicalIndex()
+    index.add_document("a.py", [
+        chunk("c1", "def getUserById(user_id): return db.get(user_id)"),
+        chunk("c2", "def render_template(name): return name"),
+    ])
+    index.add_document("b.py", [chunk("c3", "class UserRepository: pass")])
+
+    results = index.search("user by id", limit=10)
+
+    assert [chunk_id for chunk_id, _ in results] == ["c1", "c3"]
+    assert results[0][1] > results[1][1] > 0
+    assert index.search("render_template", limit=10)[0][0] == "c2"
+    assert index.search("unknown", limit=10) == []
+
+
+@pytest.mark.unit
+def test_replacing_a_document_drops_its_old_chunks():
+    """Ré-indexer une source remplace ses chunks ; la majorité supprimée déclenche le compactage."""
+    index = LexicalIndex()
+    index.add_document("a.py", [chunk("old", "def parse_config(): pass")])
+    index.add_document("b.py", [chunk("other", "def parse_args(): pass")])
+
+    index.add_document("a.py", [chunk("new", "def load_settings(): pass")])
+    assert [c for c, _ in index.search("parse", limit=10)] == ["other"]
+    assert index.stats()["deleted_chunks"] == 1
+
+    index.remove_document("b.py")
+    assert index.stats() == {"terms": 5, "chunks": 1, "deleted_chunks": 0, "postings": 5}
+    assert index.search("parse", limit=10) == []
+    assert [c for c, _ in index.search("settings", limit=10)] == ["new"]
+
+
+@pytest.mark.integration
+def test_index_round_trips_through_its_file(tmp_path):
+    """L'index sauvegardé puis rechargé donne les mêmes résultats."""
+    path = str(tmp_path / "lexical.npz")
+    index = LexicalIndex(path=path)
+    index.add_document("a.py", [chunk(f"c{i}", f"def handler_{i}(request): return request.user") for i in range(20)])
+    index.add_document("b.py", [chunk("x", "class HttpRequestHandler: pass")])
+    index.add_document("a.py", [chunk("c0", "def handler_0(request): return request.user")])
+    expected = index.search("request handler", limit=5)
+    index.save()
+
+    reloaded = LexicalIndex(path=path)
+    assert not reloaded.dirty
+    assert len(reloaded) == 2
+    assert reloaded.search("request handler", limit=5) == pytest.approx(expected)
@@ -0,0 +1,139 @@
+# FICHIER: tests/ingestion/storage/test_numpy_vector_repository.py
+import numpy as np
+import pytest
+
+from core.exceptions.base_exceptions import RepositoryError
+from ingestion.storage.repositories.numpy_vector_repository import NumpyVectorRepository, _top_k
+
+DIMENSION = 16
+
+
+def make_chunks(vectors):
+    return [
+        {"content": f"chunk {i}", "index": i, "metadata": {}, "embedding": vector}
+        for i, vector in enumerate(vectors)
+    ]
+
+
+def clustered_vectors(n, seed=0):
+    """Vecteurs groupés autour de 8 centres, pour que l'index IVF ait une structure à exploiter."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((8, DIMENSION))
+    return (centers[rng.integers(8, size=n)] + 0.1 * rng.standard_normal((n, DIMENSION))).astype(np.float32)
+
+
+@pytest.mark.unit
+def test_top_k_returns_best_scores_in_order():
+    """argpartition + tri : les k meilleurs scores, du plus élevé au plus faible."""
+    scores = np.array([0.1, 0.9, 0.5, 0.7, 0.3], dtype=np.float32)
+    assert _top_k(scores, 3).tolist() == [1, 3, 2]
+    assert _top_k(scores, 10).tolist() == [1, 3, 2, 4, 0]
+
+
+@pytest.mark.integration
+async def test_store_persists_vectors_and_reuses_freed_rows(tmp_path):
+    """
+    Après réouverture, les vecteurs sont retrouvés. Les lignes d'un document remplacé ne sont
+    libérées qu'après validation, puis réutilisées par les écritures suivantes.
+    """
+    vectors = clustered_vectors(3)
+    repo = NumpyVectorRepository(path=str(tmp_path), dimension=DIMENSION)
+    await repo.initialize()
+    await repo.save_document_with_chunks("a.py", "v1", make_chunks(vectors), {})
+    await repo.save_document_with_chunks("a.py", "v2", make_chunks(vectors[:2]), {})
+    assert repo._n_rows == 5 and sorted(repo._free_rows) == [0, 1, 2]
+    await repo.save_document_with_chunks("b.py", "b", make_chunks(vectors[2:]), {})
+    await repo.close()
+
+    reopened = NumpyVectorRepository(path=str(tmp_path), dimension=DIMENSION)
+    await reopened.initialize()
+    try:
+        results = await reopened.vector_search(vectors[1], limit=5)
+        assert [r.content for r in results][0] == "chunk 1"
+        assert len(results) == 3
+        assert reopened._n_rows == 5
+        assert len(reopened._free_rows) == 2
+    finally:
+        await reopened.close()
+
+    with pytest.raises(RepositoryError):
+        await NumpyVectorRepository(path=str(tmp_path), dimension=DIMENSION * 2).initialize()
+
+
+@pytest.mark.integration
+async def test_matrix_grows_beyond_initial_capacity():
+    """La matrice double de taille quand les lignes dépassent sa capacité."""
+    repo = NumpyVectorRepository(path=None, dimension=DIMENSION)
+    await repo.initialize()
+    vectors = clustered_vectors(1500)
+    await repo.save_document_with_chunks("big.py", "big", make_chunks(vectors), {})
+
+    assert repo._matrix.shape[0] == 2048
+    assert (await repo.vector_search(vectors[1400], limit=1))[0].content == "chunk 1400"
+    await repo.close()
+
+
+@pytest.mark.integration
+async def test_ivf_index_keeps_recall_and_scans_new_rows(tmp_path):
+    """Avec l'index IVF, les voisins exacts restent trouvés, y compris pour les vecteurs ajoutés après construction."""
+    vectors = clustered_vectors(2000)
+    repo = NumpyVectorRepository(path=str(tmp_path), dimension=DIMENSION, default_probes=4)
+    await repo.initialize()
+    await repo.save_document_with_chunks("a.py", "a", make_chunks(vectors), {})
+
+    info = repo.build_index(n_lists=16, seed=1)
+    assert info["method"] == "ivf" and info["indexed_rows"] == 2000
+
+    hits = [
+        (await repo.vector_search(vectors[i], limit=1))[0].content == f"chunk {i}"
+        for i in range(0, 2000, 50)
+    ]
+    assert np.mean(hits) >= 0.95
+
+    late = clustered_vectors(1, seed=5)
+    await repo.save_document_with_chunks("b.py", "b", [{"content": "late", "index": 0, "metadata": {}, "embedding": late[0]}], {})
+    assert repo.index_info()["unindexed_rows"] == 1
+    assert (await repo.vector_search(late[0], limit=1))[0].content == "late"
+    await repo.close()
+
+    reopened = NumpyVectorRepository(path=str(tmp_path), dimension=DIMENSION)
+    await reopened.initialize()
+    assert reopened.index_info()["unindexed_rows"] == 1
+    reopened.drop_index()
+    assert reopened.index_info()["method"] == "exact"
+    await reopened.close()
+
+
+@pytest.mark.integration
+async def test_rewritten_rows_stay_unindexed_after_restart(tmp_path):
+    """Une ligne réutilisée depuis la construction de l'index reste parcourue après réouverture."""
+    vectors = clustered_vectors(400)
+    repo = NumpyVectorRepository(path=str(tmp_path), dimension=DIMENSION, default_probes=1)
+    await repo.initialize()
+    await repo.save_document_with_chunks("a.py", "a", make_chunks(vectors[:200]), {})
+    await repo.save_document_with_chunks("b.py", "b", make_chunks(vectors[200:]), {})
+    repo.build_index(n_lists=8, seed=1)
+
+    # b.py est remplacé, puis c.py réutilise ses lignes, encore rangées dans les listes de b.py.
+    await repo.save_document_with_chunks("b.py", "b2", make_chunks(vectors[200:201]), {})
+    await repo.save_document_with_chunks("c.py", "c", make_chunks(-vectors[:200]), {})
+    assert repo._n_rows == 401
+    await repo.close()
+
+    reopened = NumpyVectorRepository(path=str(tmp_path), dimension=DIMENSION, default_probes=1)
+    await reopened.initialize()
+    try:
+        assert reopened.index_info()["unindexed_rows"] == 201
+        hits = [
+            (await reopened.vector_search(-vectors[i], limit=1))[0].document_source == "c.py"
+            for i in range(0, 200, 10)
+        ]
+        assert all(hits)
+        reopened.build_index(n_lists=8, seed=1)
+    finally:
+        await reopened.close()
+
+    rebuilt = NumpyVectorRepository(path=str(tmp_path), dimension=DIMENSION)
+    await rebuilt.initialize()
+    assert rebuilt.index_info()["unindexed_rows"] == 0
+    await rebuilt.close()
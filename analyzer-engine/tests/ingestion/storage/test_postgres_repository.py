@@ -0,0 +1,293 @@
+# FICHIER: tests/ingestion/storage/test_postgres_repository.py
+import struct
+from contextlib import asynccontextmanager
+
+import asyncpg
+import numpy as np
+import pytest
+
+from core.exceptions.base_exceptions import RepositoryError
+
+from ingestion.storage.repositories.postgres_repository import (
+    CHUNK_COLUMNS, PostgresRepository, _decode_jsonb, _decode_vector, _encode_jsonb, _encode_vector,
+    _register_vector_codec
+)
+
+
+class FakeConnection:
+    """Connexion asyncpg minimale : le COPY échoue, les INSERT sont enregistrés."""
+
+    def __init__(self, copy_error=None, upsert_row=None, rows=()):
+        self.copy_error = copy_error
+        self.upsert_row = upsert_row
+        self.rows = list(rows)
+        self.copied = []
+        self.executed = []
+        self.transactions = []
+
+    async def fetchrow(self, query, *args):
+        return self.upsert_row
+
+    async def fetch(self, query, *args):
+        self.executed.append((query, args))
+        return self.rows[:args[-1]] if "FROM documents" in query else []
+
+    @asynccontextmanager
+    async def transaction(self):
+        start = len(self.executed)
+        yield
+        self.transactions.append([query for query, _ in self.executed[start:]])
+
+    async def copy_records_to_table(self, table_name, *, records, columns):
+        if self.copy_error:
+            raise self.copy_error
+        self.copied.append((table_name, list(records), columns))
+
+    async def execute(self, query, *args):
+        self.executed.append((query, args))
+
+
+def make_records(n):
+    return [
+        (f"id-{i}", "doc", f"content {i}", np.ones(3, dtype=np.float32), i, "{}", 2)
+        for i in range(n)
+    ]
+
+
+@pytest.mark.unit
+def test_vector_codec_uses_pgvector_binary_layout():
+    """Format vector_send : dimension et champ réservé en int16, puis float4 big-endian."""
+    embedding = np.array([0.5, -1.0, 2.25], dtype=np.float32)
+
+    data = _encode_vector(embedding)
+
+    assert data[:4] == struct.pack('>HH', 3, 0)
+    assert len(data) == 4 + 3 * 4
+    decoded = _decode_vector(data)
+    assert decoded.dtype == np.float32
+    np.testing.assert_array_equal(decoded, embedding)
+
+
+@pytest.mark.unit
+def test_jsonb_codec_uses_binary_version_prefix():
+    metadata = {"file_path": "a.py", "tags": ["x"], "score": 0.5}
+
+    data = _encode_jsonb(metadata)
+
+    assert data[:1] == b'\x01'
+    assert _decode_jsonb(data) == metadata
+
+
+@pytest.mark.unit
+async def test_insert_chunks_uses_binary_copy(monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", "postgresql://unused")
+    conn = FakeConnection()
+
+    await PostgresRepository()._insert_chunks(conn, make_records(3))
+
+    [(table_name, records, columns)] = conn.copied
+    assert (table_name, len(records), columns) == ("chunks", 3, CHUNK_COLUMNS)
+    assert conn.executed == []
+
+
+@pytest.mark.unit
+async def test_insert_chunks_falls_back_to_batched_multirow_insert(monkeypatch):
+    """Si le COPY échoue, les lignes partent en INSERT multi-lignes, par lots."""
+    monkeypatch.setenv("DATABASE_URL", "postgresql://unused")
+    monkeypatch.setattr("ingestion.storage.repositories.postgres_repository._MULTIROW_INSERT_BATCH", 2)
+    conn = FakeConnection(copy_error=asyncpg.InterfaceError("no binary codec"))
+
+    await PostgresRepository()._insert_chunks(conn, make_records(3))
+
+    assert [len(args) for _, args in conn.executed] == [14, 7]
+    first_query = conn.executed[0][0]
+    assert "($1, $2, $3, $4, $5, $6, $7), ($8, $9, $10, $11, $12, $13, $14)" in first_query
+
+
+@pytest.mark.unit
+async def test_vector_codec_is_registered_in_the_extension_schema():
+    """pgvector installé hors de `public` (schéma `extensions` des hébergeurs managés)."""
+    class CatalogConnection:
+        def __init__(self, schema):
+            self.schema = schema
+            self.codecs = []
+
+        async def fetchval(self, query):
+            return self.schema
+
+        async def set_type_codec(self, name, *, schema, **kwargs):
+            self.codecs.append((name, schema))
+
+    conn = CatalogConnection("extensions")
+    assert await _register_vector_codec(conn) is True
+    assert conn.codecs == [("vector", "extensions")]
+
+    missing = CatalogConnection(None)
+    assert await _register_vector_codec(missing) is False
+    assert missing.codecs == []
+
+
+@pytest.mark.unit
+async def test_vectors_are_sent_as_text_literals_without_the_binary_codec(monkeypatch):
+    """Sans codec pgvector : pas de COPY binaire, et chaque vecteur part en littéral texte casté."""
+    monkeypatch.setattr(PostgresRepository, "_vector_codec", False)
+    conn = FakeConnection()
+    repo = make_repository(monkeypatch, conn)
+
+    await repo._insert_chunks(conn, make_records(2))
+    await repo.vector_search([0.5, 0.25], 5)
+
+    assert conn.copied == []
+    insert, insert_args = conn.executed[0]
+    assert "($1, $2, $3, $4::text::vector, $5, $6, $7), ($8, $9, $10, $11::text::vector" in insert
+    assert insert_args[3] == "[1.0,1.0,1.0]"
+    search, search_args = conn.executed[1]
+    assert "match_chunks($1::text::vector, $2)" in search and search_args[0] == "[0.5,0.25]"
+
+
+def make_repository(monkeypatch, conn):
+    monkeypatch.setenv("DATABASE_URL", "postgresql://unused")
+    repo = PostgresRepository()
+
+    @asynccontextmanager
+    async def get_connection():
+        yield conn
+
+    monkeypatch.setattr(repo, "_get_connection", get_connection)
+    return repo
+
+
+CHUNKS = [{"content": "def f(): pass", "index": 0, "metadata": {}, "embedding": np.ones(3, dtype=np.float32)}]
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("upsert_row, saved, replaced", [
+    ({"id": "doc", "inserted": True}, 1, False),   # nouvelle source
+    ({"id": "doc", "inserted": False}, 1, True),   # contenu modifié : chunks remplacés
+    (None, 0, False),                              # contenu inchangé : aucun effet
+])
+async def test_save_document_is_idempotent_per_source(monkeypatch, upsert_row, saved, replaced):
+    conn = FakeConnection(upsert_row=upsert_row)
+    repo = make_repository(monkeypatch, conn)
+
+    result = await repo.save_document_with_chunks("a.py", "container", CHUNKS, {}, content_hash="h")
+
+    assert result == saved
+    assert len(conn.copied) == saved
+    assert any("DELETE FROM chunks" in query for query, _ in conn.executed) == replaced
+
+
+@pytest.mark.unit
+async def test_search_sends_embedding_as_binary_vector_parameter(monkeypatch):
+    """Le vecteur de requête part tel quel (codec binaire), sans littéral texte ni cast."""
+    conn = FakeConnection()
+    repo = make_repository(monkeypatch, conn)
+
+    await repo.vector_search([0.1, 0.2, 0.3], 5)
+    await repo.hybrid_search([0.1, 0.2, 0.3], "query", 5, 0.3)
+
+    for query, args in conn.executed:
+        assert "::vector" not in query
+        assert isinstance(args[0], np.ndarray) and args[0].dtype == np.float32
+
+
+@pytest.mark.unit
+async def test_repeated_searches_are_served_from_cache_until_a_write(monkeypatch):
+    conn = FakeConnection(upsert_row={"id": "doc", "inserted": True})
+    repo = make_repository(monkeypatch, conn)
+
+    await repo.vector_search([0.1, 0.2, 0.3], 5)
+    await repo.vector_search([0.1, 0.2, 0.3], 5)
+    assert len(conn.executed) == 1
+
+    await repo.save_document_with_chunks("a.py", "container", CHUNKS, {}, content_hash="h")
+    await repo.vector_search([0.1, 0.2, 0.3], 5)
+
+    searches = [query for query, _ in conn.executed if "match_chunks" in query]
+    assert len(searches) == 2
+    assert repo.search_cache_stats()["hits"] == 1
+
+
+@pytest.mark.unit
+async def test_search_applies_per_query_index_knobs(monkeypatch):
+    """ef_search / probes sont appliqués en SET LOCAL (set_config transactionnel) avant la recherche."""
+    conn = FakeConnection()
+    repo = make_repository(monkeypatch, conn)
+
+    await repo.vector_search([0.1, 0.2, 0.3], 5, ef_search=200, probes=10)
+
+    assert conn.executed[0] == ("SELECT set_config('hnsw.ef_search', $1, true)", ("200",))
+    assert conn.executed[1] == ("SELECT set_config('ivfflat.probes', $1, true)", ("10",))
+    assert "match_chunks" in conn.executed[2][0]
+
+
+@pytest.mark.unit
+async def test_create_vector_index_validates_parameters(monkeypatch):
+    repo = make_repository(monkeypatch, FakeConnection())
+
+    with pytest.raises(RepositoryError):
+        await repo.create_vector_index(method="lsh")
+    with pytest.raises(RepositoryError):
+        await repo.create_vector_index(method="hnsw", m="16; DROP TABLE chunks")
+
+
+@pytest.mark.unit
+async def test_create_vector_index_never_leaves_the_table_without_index(monkeypatch):
+    """Sans CONCURRENTLY, DROP et CREATE forment une transaction ; sinon le nouvel index est construit à part puis échangé."""
+    conn = FakeConnection()
+    repo = make_repository(monkeypatch, conn)
+
+    await repo.create_vector_index(method="ivfflat", lists=10)
+    assert conn.transactions == [[
+        "DROP INDEX IF EXISTS idx_chunks_embedding",
+        "CREATE INDEX idx_chunks_embedding ON chunks USING ivfflat (embedding vector_cosine_ops) WITH (lists = 10)",
+    ]]
+
+    conn.executed.clear()
+    conn.transactions.clear()
+    await repo.create_vector_index(method="ivfflat", lists=10, concurrently=True)
+    assert [query for query, _ in conn.executed[:2]] == [
+        "DROP INDEX CONCURRENTLY IF EXISTS idx_chunks_embedding_new",
+        "CREATE INDEX CONCURRENTLY idx_chunks_embedding_new ON chunks USING ivfflat (embedding vector_cosine_ops) WITH (lists = 10)",
+    ]
+    assert conn.transactions == [[
+        "DROP INDEX IF EXISTS idx_chunks_embedding",
+        "ALTER INDEX idx_chunks_embedding_new RENAME TO idx_chunks_embedding",
+    ]]
+
+
+def make_document_rows(n):
+    from datetime import datetime, timedelta, timezone
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [
+        {"id": f"00000000-0000-0000-0000-{i:012d}", "title": f"t{i}", "source": f"s{i}", "metadata": {},
+         "created_at": start - timedelta(minutes=i), "updated_at": start, "chunk_count": i}
+        for i in range(n)
+    ]
+
+
+@pytest.mark.unit
+async def test_list_documents_page_returns_opaque_keyset_cursor(monkeypatch):
+    """Le curseur encode (created_at, id) du dernier document ; la page suivante filtre par clé, sans OFFSET."""
+    conn = FakeConnection(rows=make_document_rows(3))
+    repo = make_repository(monkeypatch, conn)
+
+    page = await repo.list_documents_page(limit=2)
+    assert [d.source for d in page.documents] == ["s0", "s1"]
+    assert page.next_cursor is not None
+
+    await repo.list_documents_page(limit=2, cursor=page.next_cursor)
+    query, args = conn.executed[-1]
+    assert "(created_at, id) < ($1, $2::uuid)" in query and "OFFSET" not in query
+    assert args[:2] == (page.documents[-1].created_at, page.documents[-1].id)
+
+    last_page = await repo.list_documents_page(limit=5)
+    assert last_page.next_cursor is None
+
+
+@pytest.mark.unit
+async def test_list_documents_page_rejects_invalid_cursor(monkeypatch):
+    repo = make_repository(monkeypatch, FakeConnection())
+
+    with pytest.raises(RepositoryError):
+        await repo.list_documents_page(limit=2, cursor="not-a-cursor")
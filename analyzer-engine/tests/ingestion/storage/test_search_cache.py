@@ -0,0 +1,63 @@
+# FICHIER: tests/ingestion/storage/test_search_cache.py
+import numpy as np
+import pytest
+
+from ingestion.storage.search_cache import SearchResultCache
+
+
+class Result:
+    def __init__(self, content):
+        self.content = content
+        self.metadata = {}
+
+
+@pytest.mark.unit
+def test_hits_misses_and_ttl(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr("ingestion.storage.search_cache.time.monotonic", lambda: clock[0])
+    cache = SearchResultCache(ttl_seconds=10)
+    key = cache.make_key("vector", np.ones(4), 5)
+
+    assert cache.get(key) is None
+    cache.put(key, [Result("a")])
+    assert [r.content for r in cache.get(key)] == ["a"]
+
+    clock[0] += 11
+    assert cache.get(key) is None
+    assert cache.snapshot()["hit_rate"] == pytest.approx(1 / 3, abs=1e-4)
+
+
+@pytest.mark.unit
+def test_key_depends_on_vector_and_parameters():
+    key = SearchResultCache.make_key("hybrid", [0.1, 0.2], "q", 5, 0.3)
+
+    assert key == SearchResultCache.make_key("hybrid", np.array([0.1, 0.2], dtype=np.float32), "q", 5, 0.3)
+    assert key != SearchResultCache.make_key("hybrid", [0.1, 0.2], "q", 5, 0.5)
+    assert key != SearchResultCache.make_key("hybrid", [0.1, 0.3], "q", 5, 0.3)
+
+
+@pytest.mark.unit
+def test_memory_cap_evicts_least_recently_used():
+    cache = SearchResultCache(max_bytes=3000)
+    for name in ("a", "b", "c"):
+        cache.put(name, [Result("x" * 500)])
+        cache.get("a")
+
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert cache.current_bytes <= 3000
+    assert cache.stats.evictions >= 1
+
+
+@pytest.mark.unit
+def test_generation_bump_invalidates_and_drops_stale_puts():
+    """Une écriture invalide tout ; un résultat lu avant l'écriture n'est pas mis en cache."""
+    cache = SearchResultCache()
+    cache.put("k", [Result("a")])
+    generation_before_write = cache.generation
+
+    cache.invalidate()
+    cache.put("k", [Result("stale")], generation_before_write)
+
+    assert cache.get("k") is None
+    assert cache.snapshot()["generation"] == 1
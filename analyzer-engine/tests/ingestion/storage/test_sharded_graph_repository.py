@@ -0,0 +1,113 @@
+# FICHIER: tests/ingestion/storage/test_sharded_graph_repository.py
+import os
+
+import pytest
+
+from core.exceptions.base_exceptions import EntityNotFoundError
+from ingestion.storage.repositories import sharded_graph_repository
+from ingestion.storage.repositories.sharded_graph_repository import ShardedGraphRepository, repository_shard_key
+
+
+def file_data(file_path, names, calls):
+    return {
+        "file_path": file_path,
+        "entities": [{"name": n, "type": "FUNCTION"} for n in names],
+        "relationships": [{"source": s, "target": t, "type": "CALLS"} for s, t in calls],
+    }
+
+
+# La clé de shard est le premier segment du chemin : un "dépôt" par répertoire.
+FILES = [
+    file_data("api/app.py", ["main", "parse", "helper"], [("main", "parse"), ("parse", "helper")]),
+    file_data("web/view.py", ["render", "helper"], [("render", "helper")]),
+    file_data("cli/run.py", ["main", "helper"], [("main", "helper")]),
+]
+
+
+@pytest.fixture
+async def sharded_repo(tmp_path):
+    repo = ShardedGraphRepository(shards_dir=str(tmp_path / "shards"), shard_key=lambda path: path.split("/")[0])
+    await repo.initialize()
+    yield repo
+    await repo.close()
+
+
+@pytest.mark.integration
+async def test_writes_go_to_one_database_per_shard(sharded_repo):
+    """Chaque dépôt a son fichier SQLite ; les résultats d'écriture sont rendus par fichier."""
+    results = await sharded_repo.add_code_structures(FILES)
+
+    assert sharded_repo.shard_keys() == ["api", "cli", "web"]
+    assert {path: r["entities_added"] for path, r in results.items()} == {"api/app.py": 3, "web/view.py": 2, "cli/run.py": 2}
+    api = await sharded_repo.shard("api")
+    async with api.conn.execute("SELECT COUNT(*) FROM entities") as cursor:
+        assert (await cursor.fetchone())[0] == 3
+
+
+@pytest.mark.integration
+async def test_federated_queries_span_all_shards(sharded_repo):
+    """Les lectures attachent tous les shards : faits fusionnés, parcours réunis et triés."""
+    await sharded_repo.add_code_structures(FILES)
+
+    facts = await sharded_repo.find_entity_relationships("helper")
+    # `main -> helper` existe dans deux shards : un seul fait.
+    assert facts == [
+        {"source": "main (FUNCTION)", "relationship": "CALLS", "target": "helper (FUNCTION)"},
+        {"source": "parse (FUNCTION)", "relationship": "CALLS", "target": "helper (FUNCTION)"},
+        {"source": "render (FUNCTION)", "relationship": "CALLS", "target": "helper (FUNCTION)"},
+    ]
+    assert await sharded_repo.find_entity_relationships("helper", limit=1, offset=2) == facts[2:]
+
+    neighborhood = await sharded_repo.get_neighborhood("main", max_depth=2, direction="outgoing")
+    assert [(n["name"], n["file_path"], n["depth"]) for n in neighborhood] == [
+        ("helper", "cli/run.py", 1), ("parse", "api/app.py", 1), ("helper", "api/app.py", 2)
+    ]
+    assert [step["target"] for step in await sharded_repo.find_shortest_path("main", "helper")] == ["helper (FUNCTION)"]
+    trees = await sharded_repo.get_call_tree("main")
+    assert sorted((t["file_path"], [c["name"] for c in t["children"]]) for t in trees) == [
+        ("api/app.py", ["parse"]), ("cli/run.py", ["helper"])
+    ]
+    with pytest.raises(EntityNotFoundError):
+        await sharded_repo.get_neighborhood("missing")
+
+
+@pytest.mark.integration
+async def test_entity_source_read_does_not_create_a_shard(sharded_repo):
+    """Lire le code d'un fichier sans shard rend None sans créer de base vide."""
+    await sharded_repo.add_code_structures(FILES[:1])
+
+    assert await sharded_repo.get_entity_source("main", "docs/readme.py") is None
+    assert sharded_repo.shard_keys() == ["api"]
+    with pytest.raises(EntityNotFoundError):
+        await sharded_repo.get_entity_source("missing", "api/app.py")
+
+
+@pytest.mark.integration
+async def test_shards_beyond_the_attach_limit_are_queried_in_groups(sharded_repo, monkeypatch):
+    """Au-delà de la limite d'ATTACH, les groupes de shards donnent les mêmes résultats qu'un seul groupe."""
+    await sharded_repo.add_code_structures(FILES)
+    expected_facts = await sharded_repo.find_entity_relationships("helper")
+    expected_trees = await sharded_repo.get_call_tree("main")
+
+    monkeypatch.setattr(sharded_graph_repository, "_MAX_ATTACHED", 1)
+    assert await sharded_repo.find_entity_relationships("helper") == expected_facts
+    assert await sharded_repo.get_call_tree("main") == expected_trees
+
+    scoped = ShardedGraphRepository(shards_dir=sharded_repo.shards_dir, query_shards=["web"])
+    try:
+        assert [f["source"] for f in await scoped.find_entity_relationships("helper")] == ["render (FUNCTION)"]
+    finally:
+        await scoped.close()
+
+
+@pytest.mark.unit
+def test_default_shard_key_is_the_git_repository(tmp_path):
+    """Les fichiers d'un même dépôt git partagent une clé ; hors dépôt, le shard "default"."""
+    repo_dir = tmp_path / "project"
+    os.makedirs(repo_dir / ".git")
+    os.makedirs(repo_dir / "src" / "pkg")
+
+    key = repository_shard_key(str(repo_dir / "src" / "pkg" / "mod.py"))
+    assert key.startswith("project-")
+    assert repository_shard_key(str(repo_dir / "setup.py")) == key
+    assert repository_shard_key(str(tmp_path / "loose.py")) == "default"
@@ -0,0 +1,390 @@
+# FICHIER: tests/ingestion/storage/test_sqlite_graph_repository.py
+import asyncio
+import sqlite3
+
+import pytest
+from core.exceptions.base_exceptions import EntityNotFoundError, RepositoryError, TraversalLimitError
+from ingestion.storage.blob_store import blob_hash
+from ingestion.storage.repositories.sqlite_graph_repository import SQLiteGraphRepository
+
+
+@pytest.mark.integration
+async def test_add_code_structures_isolates_failing_files(sqlite_repo):
+    """Tous les fichiers partagent une transaction ; un fichier invalide n'annule que ses écritures."""
+    files = [
+        {"file_path": "a.py", "entities": [{"name": "f", "type": "FUNCTION"}, {"name": "g", "type": "FUNCTION"}],
+         "relationships": [{"source": "f", "target": "g", "type": "CALLS"}]},
+        # Entité sans nom : l'écriture du fichier échoue, aucune de ses entités ne doit rester.
+        {"file_path": "b.py", "entities": [{"name": "h", "type": "FUNCTION"}, {"type": "FUNCTION"}],
+         "relationships": []},
+        {"file_path": "c.py", "entities": [{"name": "k", "type": "CLASS"}], "relationships": []},
+    ]
+
+    results = await sqlite_repo.add_code_structures(files)
+
+    assert results["a.py"]["entities_added"] == 2 and results["a.py"]["relations_added"] == 1
+    assert "error" in results["b.py"]
+    assert results["c.py"]["entities_added"] == 1 and results["c.py"]["relations_added"] == 0
+    async with sqlite_repo.conn.execute("SELECT file_path, COUNT(*) FROM entities GROUP BY file_path") as cursor:
+        counts = {row[0]: row[1] for row in await cursor.fetchall()}
+    assert counts == {"a.py": 2, "c.py": 1}
+
+
+@pytest.mark.integration
+async def test_bulk_write_counts_only_new_rows(sqlite_repo):
+    """Les compteurs ignorent les doublons et les relations sans extrémités connues."""
+    file_data = {
+        "file_path": "a.py",
+        "entities": [{"name": f"f{i}", "type": "FUNCTION"} for i in range(50)] + [{"name": "f0", "type": "CLASS"}],
+        "relationships": [{"source": f"f{i}", "target": f"f{i + 1}", "type": "CALLS"} for i in range(49)]
+                         + [{"source": "f0", "target": "missing", "type": "CALLS"}],
+    }
+
+    first = await sqlite_repo.add_code_structure(file_data)
+    assert (first["entities_added"], first["relations_added"]) == (50, 49)
+    file_data["entities"].append({"name": "extra", "type": "CLASS"})
+    second = await sqlite_repo.add_code_structure(file_data)
+    assert (second["entities_added"], second["relations_added"]) == (1, 0)
+
+
+@pytest.mark.integration
+async def test_reingest_applies_only_the_diff(sqlite_repo):
+    """Réingérer un fichier supprime les entités et relations disparues et ne touche pas au reste."""
+    await sqlite_repo.add_code_structures([
+        {"file_path": "a.py",
+         "entities": [{"name": "old", "type": "FUNCTION"}, {"name": "keep", "type": "FUNCTION", "source_code": "v1"},
+                      {"name": "other", "type": "FUNCTION"}],
+         "relationships": [{"source": "keep", "target": "old", "type": "CALLS"},
+                           {"source": "keep", "target": "other", "type": "CALLS"}]},
+        {"file_path": "b.py", "entities": [{"name": "old", "type": "FUNCTION"}], "relationships": []},
+    ])
+    async with sqlite_repo.conn.execute("SELECT id FROM entities WHERE name = 'keep'") as cursor:
+        keep_id = (await cursor.fetchone())[0]
+    version = await sqlite_repo.get_graph_version()
+
+    # `old` est renommé en `new`, `keep` change de corps, l'appel vers `other` disparaît.
+    renamed = {
+        "file_path": "a.py",
+        "entities": [{"name": "new", "type": "FUNCTION"}, {"name": "keep", "type": "FUNCTION", "source_code": "v2"},
+                     {"name": "other", "type": "FUNCTION"}],
+        "relationships": [{"source": "keep", "target": "new", "type": "CALLS"}],
+    }
+    result = await sqlite_repo.add_code_structure(renamed)
+
+    assert result == {"entities_added": 1, "entities_updated": 1, "entities_removed": 1,
+                      "relations_added": 1, "relations_removed": 1}
+    async with sqlite_repo.conn.execute("SELECT id, source_code FROM entities WHERE name = 'keep'") as cursor:
+        assert tuple(await cursor.fetchone()) == (keep_id, "v2")
+    assert await sqlite_repo.find_entity_relationships("keep") == [
+        {"source": "keep (FUNCTION)", "relationship": "CALLS", "target": "new (FUNCTION)"}
+    ]
+    # L'entité homonyme d'un autre fichier est conservée ; l'index des noms suit les suppressions.
+    assert await sqlite_repo.find_entity_relationships("old") == []
+    async with sqlite_repo.conn.execute("SELECT file_path FROM entities WHERE name = 'old'") as cursor:
+        assert [row[0] for row in await cursor.fetchall()] == ["b.py"]
+    assert await sqlite_repo.get_graph_version() > version
+
+    # Une réingestion à l'identique n'écrit rien et ne change pas la version du graphe.
+    version = await sqlite_repo.get_graph_version()
+    assert set((await sqlite_repo.add_code_structure(renamed)).values()) == {0}
+    assert await sqlite_repo.get_graph_version() == version
+
+    # Un fichier vidé de toutes ses entités perd son graphe stocké (relations supprimées en cascade).
+    emptied = await sqlite_repo.add_code_structures([{"file_path": "a.py", "entities": [], "relationships": []}])
+    assert emptied["a.py"] == {"entities_added": 0, "entities_updated": 0, "entities_removed": 3,
+                               "relations_added": 0, "relations_removed": 0}
+    assert await sqlite_repo.find_entity_relationships("keep") == []
+    async with sqlite_repo.conn.execute("SELECT DISTINCT file_path FROM entities") as cursor:
+        assert [row[0] for row in await cursor.fetchall()] == ["b.py"]
+    assert await sqlite_repo.get_graph_version() > version
+
+
+@pytest.mark.integration
+async def test_concurrent_batches_share_the_connection(sqlite_repo):
+    """Des lots écrits en concurrence sur la même connexion sont sérialisés, pas imbriqués."""
+    batches = [
+        [{"file_path": f"{b}/{i}.py", "entities": [{"name": "f", "type": "FUNCTION"}], "relationships": []} for i in range(20)]
+        for b in range(4)
+    ]
+
+    results = await asyncio.gather(*(sqlite_repo.add_code_structures(batch) for batch in batches))
+
+    assert all("error" not in r for batch_results in results for r in batch_results.values())
+    async with sqlite_repo.conn.execute("SELECT COUNT(*) FROM entities") as cursor:
+        assert (await cursor.fetchone())[0] == 80
+
+
+@pytest.mark.integration
+async def test_reader_pool_reads_during_a_write_transaction(tmp_path):
+    """En WAL, les lecteurs en lecture seule répondent pendant une transaction d'écriture, sans voir ses lignes."""
+    repo = SQLiteGraphRepository(db_path=str(tmp_path / "graph.sqlite"), read_pool_size=2)
+    await repo.initialize()
+    try:
+        await repo.add_code_structure({"file_path": "a.py", "entities": [{"name": "f", "type": "FUNCTION"},
+                                       {"name": "g", "type": "FUNCTION"}],
+                                       "relationships": [{"source": "f", "target": "g", "type": "CALLS"}]})
+        async with repo._writing():
+            await repo.conn.execute("BEGIN IMMEDIATE")
+            await repo.conn.execute("DELETE FROM entities")
+            facts, neighbours = await asyncio.wait_for(asyncio.gather(
+                repo.find_entity_relationships("f"), repo.get_neighborhood("f", max_depth=1)
+            ), timeout=5)
+            await repo.conn.rollback()
+        with pytest.raises(sqlite3.OperationalError, match="readonly"):
+            async with repo._reading() as reader:
+                await reader.execute("DELETE FROM entities")
+        stats = repo.stats()
+    finally:
+        await repo.close()
+
+    assert facts == [{"source": "f (FUNCTION)", "relationship": "CALLS", "target": "g (FUNCTION)"}]
+    assert [n["name"] for n in neighbours] == ["g"]
+    assert stats["read_pool_size"] == 2
+    assert stats["read_wait"]["count"] == 3 and stats["write_wait"]["count"] == 2
+
+
+@pytest.mark.integration
+async def test_file_database_uses_tuned_pragmas(tmp_path):
+    """Une base sur disque est ouverte en WAL, synchronous=NORMAL, avec cache et mmap configurés."""
+    repo = SQLiteGraphRepository(db_path=str(tmp_path / "graph.sqlite"), cache_size_mb=32, mmap_size_mb=16)
+    await repo.initialize()
+    try:
+        pragmas = {}
+        for name in ("journal_mode", "synchronous", "cache_size", "mmap_size"):
+            async with repo.conn.execute(f"PRAGMA {name}") as cursor:
+                pragmas[name] = (await cursor.fetchone())[0]
+    finally:
+        await repo.close()
+
+    assert pragmas == {"journal_mode": "wal", "synchronous": 1, "cache_size": -32 * 1024, "mmap_size": 16 * 1024 * 1024}
+
+
+async def _add_call_graph(repo):
+    await repo.add_code_structures([
+        {"file_path": "a.py",
+         "entities": [{"name": n, "type": "FUNCTION"} for n in ("get_user", "get_user_by_id", "fetch_get_user", "main")],
+         "relationships": [{"source": "main", "target": n, "type": "CALLS"} for n in ("get_user", "get_user_by_id", "fetch_get_user")]},
+        # Même fait ("main" appelle "get_user") dans un autre fichier : dédoublonné.
+        {"file_path": "b.py",
+         "entities": [{"name": "get_user", "type": "FUNCTION"}, {"name": "main", "type": "FUNCTION"}],
+         "relationships": [{"source": "main", "target": "get_user", "type": "CALLS"}]},
+    ])
+
+
+@pytest.mark.integration
+async def test_entity_search_ranks_exact_then_prefix_then_substring(sqlite_repo):
+    """Recherche par trigrammes : exact, puis préfixe, puis sous-chaîne ; faits identiques fusionnés."""
+    await _add_call_graph(sqlite_repo)
+
+    results = await sqlite_repo.find_entity_relationships("GET_USER")
+
+    assert [r["target"] for r in results] == [
+        "get_user (FUNCTION)", "get_user_by_id (FUNCTION)", "fetch_get_user (FUNCTION)"
+    ]
+    page = await sqlite_repo.find_entity_relationships("get_user", limit=1, offset=1)
+    assert [r["target"] for r in page] == ["get_user_by_id (FUNCTION)"]
+
+
+@pytest.mark.integration
+async def test_short_queries_and_renames_stay_in_sync(sqlite_repo):
+    """Moins de 3 caractères : repli sur LIKE ; l'index suit les renommages et suppressions."""
+    await _add_call_graph(sqlite_repo)
+
+    assert len(await sqlite_repo.find_entity_relationships("ma")) == 3
+    assert await sqlite_repo.find_entity_relationships("%") == []
+
+    await sqlite_repo.conn.execute("UPDATE entities SET name = 'load_account' WHERE name = 'fetch_get_user'")
+    await sqlite_repo.conn.execute("DELETE FROM entities WHERE name = 'get_user_by_id'")
+    assert [r["target"] for r in await sqlite_repo.find_entity_relationships("get_user")] == ["get_user (FUNCTION)"]
+    assert [r["target"] for r in await sqlite_repo.find_entity_relationships("account")] == ["load_account (FUNCTION)"]
+
+
+async def _add_chain(repo):
+    """main -> parse -> tokenize -> read ; main -> render ; render USES_TYPE Template ; tokenize -> tokenize."""
+    entities = [{"name": n, "type": "FUNCTION"} for n in ("main", "parse", "tokenize", "read", "render")]
+    entities.append({"name": "Template", "type": "CLASS"})
+    calls = [("main", "parse"), ("parse", "tokenize"), ("tokenize", "read"), ("main", "render"), ("tokenize", "tokenize")]
+    await repo.add_code_structure({
+        "file_path": "app.py",
+        "entities": entities,
+        "relationships": [{"source": s, "target": t, "type": "CALLS"} for s, t in calls]
+                         + [{"source": "render", "target": "Template", "type": "USES_TYPE"}],
+    })
+
+
+@pytest.mark.integration
+async def test_neighborhood_respects_depth_direction_and_types(sqlite_repo):
+    """Voisinage à k sauts : distance minimale, sens de parcours et filtre de types."""
+    await _add_chain(sqlite_repo)
+
+    around = await sqlite_repo.get_neighborhood("main", max_depth=2, direction="outgoing")
+    assert [(n["name"], n["depth"]) for n in around] == [("parse", 1), ("render", 1), ("Template", 2), ("tokenize", 2)]
+
+    calls_only = await sqlite_repo.get_neighborhood("main", max_depth=3, direction="outgoing", relationship_types=["CALLS"])
+    assert {n["name"] for n in calls_only} == {"parse", "render", "tokenize", "read"}
+
+    assert [n["name"] for n in await sqlite_repo.get_neighborhood("read", max_depth=1, direction="incoming")] == ["tokenize"]
+    # "main" et "tokenize" ont 2 relations sortantes : au-delà de max_fan_out=1, ils sont retournés
+    # sans être développés ("render" et "read" ne sont pas atteints).
+    assert [n["name"] for n in await sqlite_repo.get_neighborhood("parse", max_depth=2, max_fan_out=1)] == ["main", "tokenize"]
+
+    with pytest.raises(EntityNotFoundError):
+        await sqlite_repo.get_neighborhood("missing")
+    with pytest.raises(RepositoryError):
+        await sqlite_repo.get_neighborhood("main", direction="sideways")
+
+
+@pytest.mark.integration
+async def test_shortest_path_is_a_breadth_first_search_on_dense_graphs(sqlite_repo):
+    """
+    4 couches de 6 nœuds entièrement reliées : 6^4 chemins, mais seulement 26 couples (nœud,
+    profondeur). Le chemin est trouvé avec une petite borne, et une borne trop basse est signalée.
+    """
+    layers = [["start"]] + [[f"n{layer}_{i}" for i in range(6)] for layer in range(1, 5)] + [["goal"]]
+    calls = [(a, b) for upper, lower in zip(layers, layers[1:]) for a in upper for b in lower]
+    await sqlite_repo.add_code_structure({
+        "file_path": "dense.py",
+        "entities": [{"name": name, "type": "FUNCTION"} for layer in layers for name in layer],
+        "relationships": [{"source": a, "target": b, "type": "CALLS"} for a, b in calls],
+    })
+
+    path = await sqlite_repo.find_shortest_path("start", "goal", max_visited=40)
+    assert [step["source"] for step in path] == ["start (FUNCTION)", "n1_0 (FUNCTION)", "n2_0 (FUNCTION)", "n3_0 (FUNCTION)", "n4_0 (FUNCTION)"]
+    assert path[-1]["target"] == "goal (FUNCTION)"
+    assert [step["target"] for step in path[:-1]] == [step["source"] for step in path[1:]]
+
+    with pytest.raises(TraversalLimitError):
+        await sqlite_repo.find_shortest_path("start", "goal", max_visited=10)
+    # Parcours complet sans chemin : pas d'erreur, une liste vide.
+    assert await sqlite_repo.find_shortest_path("goal", "start") == []
+
+
+@pytest.mark.integration
+async def test_shortest_path_and_call_trees(sqlite_repo):
+    """Plus court chemin orienté ou non, et arbres des appelés / appelants."""
+    await _add_chain(sqlite_repo)
+
+    path = await sqlite_repo.find_shortest_path("main", "read")
+    assert [(p["source"], p["target"]) for p in path] == [
+        ("main (FUNCTION)", "parse (FUNCTION)"), ("parse (FUNCTION)", "tokenize (FUNCTION)"), ("tokenize (FUNCTION)", "read (FUNCTION)")
+    ]
+    assert await sqlite_repo.find_shortest_path("read", "main") == []
+    reverse = await sqlite_repo.find_shortest_path("read", "render", directed=False)
+    assert [p["relationship"] for p in reverse] == ["CALLS"] * 4
+    assert reverse[0] == {"source": "tokenize (FUNCTION)", "relationship": "CALLS", "target": "read (FUNCTION)"}
+    assert await sqlite_repo.find_shortest_path("main", "read", max_depth=2) == []
+
+    [tree] = await sqlite_repo.get_call_tree("main", max_depth=3)
+    assert [c["name"] for c in tree["children"]] == ["parse", "render"]
+    tokenize = tree["children"][0]["children"][0]
+    assert sorted(c["name"] for c in tokenize["children"]) == ["read", "tokenize"]
+
+    [callers] = await sqlite_repo.get_call_tree("read", direction="callers", max_depth=2)
+    assert [c["name"] for c in callers["children"]] == ["tokenize"]
+    assert sorted(c["name"] for c in callers["children"][0]["children"]) == ["parse", "tokenize"]
+
+
+SOURCE = "class Parser:\n    pass\n\n\ndef parse(text):\n    return Parser()\n"
+
+
+def _file_with_source(source, entities):
+    return {
+        "file_path": "parser.py",
+        "source_code": source,
+        "entities": [{"name": name, "type": type_, "source_code": code} for name, type_, code in entities],
+        "relationships": [],
+    }
+
+
+@pytest.mark.integration
+async def test_source_text_is_stored_once_per_content_hash(sqlite_repo):
+    """Les entités extraites du fichier référencent son blob ; les autres gardent leur texte."""
+    results = await sqlite_repo.add_code_structures([_file_with_source(SOURCE, [
+        ("parser.py", "FILE", SOURCE),
+        ("parse", "FUNCTION", "def parse(text):\n    return Parser()"),
+        ("generated", "FUNCTION", "def generated(): pass"),
+    ])])
+    assert results["parser.py"]["blob_hash"] == blob_hash(SOURCE.encode("utf-8"))
+
+    async with sqlite_repo.conn.execute("SELECT COUNT(*), SUM(size) FROM blobs") as cursor:
+        assert tuple(await cursor.fetchone()) == (1, len(SOURCE))
+    async with sqlite_repo.conn.execute("SELECT name, source_code FROM entities WHERE blob_hash IS NULL") as cursor:
+        assert [tuple(row) for row in await cursor.fetchall()] == [("generated", "def generated(): pass")]
+
+    assert await sqlite_repo.get_entity_source("parser.py", "parser.py") == SOURCE
+    assert await sqlite_repo.get_entity_source("parse", "parser.py") == "def parse(text):\n    return Parser()"
+    assert await sqlite_repo.get_entity_source("generated", "parser.py") == "def generated(): pass"
+    assert sqlite_repo.stats()["blob_cache"]["hits"] == 1
+    with pytest.raises(EntityNotFoundError):
+        await sqlite_repo.get_entity_source("missing", "parser.py")
+
+    # Aucune entité extraite du texte : le blob n'est pas conservé, et le résultat ne l'annonce pas.
+    other = {**_file_with_source("x = 1\n", [("other", "FUNCTION", "def other(): pass")]), "file_path": "other.py"}
+    assert "blob_hash" not in await sqlite_repo.add_code_structure(other)
+    async with sqlite_repo.conn.execute("SELECT COUNT(*) FROM blobs") as cursor:
+        assert (await cursor.fetchone())[0] == 1
+
+
+@pytest.mark.integration
+async def test_blobs_of_previous_versions_are_dropped(sqlite_repo):
+    """Texte inchangé : aucune écriture. Texte modifié : l'ancien blob disparaît avec ses références."""
+    entities = [("parser.py", "FILE", SOURCE), ("parse", "FUNCTION", "def parse(text):")]
+    await sqlite_repo.add_code_structures([_file_with_source(SOURCE, entities)])
+    assert await sqlite_repo.add_code_structures([_file_with_source(SOURCE, entities)]) == {
+        "parser.py": {"entities_added": 0, "entities_updated": 0, "entities_removed": 0, "relations_added": 0, "relations_removed": 0,
+                      "blob_hash": blob_hash(SOURCE.encode("utf-8"))}
+    }
+
+    edited = "# v2\n" + SOURCE
+    await sqlite_repo.add_code_structures([_file_with_source(edited, [("parser.py", "FILE", edited), entities[1]])])
+    async with sqlite_repo.conn.execute("SELECT size FROM blobs") as cursor:
+        assert [row[0] for row in await cursor.fetchall()] == [len(edited)]
+    assert await sqlite_repo.get_entity_source("parse", "parser.py") == "def parse(text):"
+
+    await sqlite_repo.clean_db()
+    assert await sqlite_repo.gc_blobs() == 1
+    assert await sqlite_repo.gc_blobs() == 0
+
+
+@pytest.mark.integration
+async def test_entity_source_survives_a_concurrent_reingest(sqlite_repo, monkeypatch):
+    """Une réingestion entre la lecture de la référence et celle du blob ne casse pas la lecture."""
+    entities = [("parser.py", "FILE", SOURCE), ("parse", "FUNCTION", "def parse(text):")]
+    await sqlite_repo.add_code_structures([_file_with_source(SOURCE, entities)])
+    edited = "# v2\n" + SOURCE
+    read_row = SQLiteGraphRepository._entity_source_row
+
+    async def reingest_after_first_read(conn, blob_columns, entity_name, file_path):
+        row = await read_row(conn, blob_columns, entity_name, file_path)
+        if not blob_columns:
+            # L'ancien blob est retiré par cette écriture.
+            await sqlite_repo.add_code_structures([_file_with_source(edited, [("parser.py", "FILE", edited), entities[1]])])
+        return row
+
+    monkeypatch.setattr(sqlite_repo, "_entity_source_row", reingest_after_first_read)
+    assert await sqlite_repo.get_entity_source("parser.py", "parser.py") == edited
+
+
+@pytest.mark.integration
+async def test_initialize_adds_blob_columns_to_an_existing_database(tmp_path):
+    """Une base créée avant le stockage des blobs est migrée à l'ouverture, ses données intactes."""
+    db_path = str(tmp_path / "old.sqlite")
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            "CREATE TABLE entities (id INTEGER PRIMARY KEY, name TEXT NOT NULL, file_path TEXT NOT NULL, "
+            "type TEXT NOT NULL, source_code TEXT, UNIQUE(name, file_path))"
+        )
+        conn.execute("INSERT INTO entities (name, file_path, type, source_code) VALUES ('f', 'a.py', 'FUNCTION', 'def f(): pass')")
+
+    repo = SQLiteGraphRepository(db_path=db_path, read_pool_size=0)
+    await repo.initialize()
+    try:
+        assert await repo.get_entity_source("f", "a.py") == "def f(): pass"
+        await repo.add_code_structures([{
+            "file_path": "a.py", "source_code": "def f(): pass\n",
+            "entities": [{"name": "f", "type": "FUNCTION", "source_code": "def f(): pass"}], "relationships": [],
+        }])
+        async with repo.conn.execute("SELECT source_code, blob_offset, blob_length FROM entities") as cursor:
+            assert tuple(await cursor.fetchone()) == (None, 0, 13)
+    finally:
+        await repo.close()
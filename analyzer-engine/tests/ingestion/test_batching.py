@@ -0,0 +1,29 @@
+# FICHIER: tests/ingestion/test_batching.py
+import pytest
+from ingestion.batching import BatchLimits, pack_batches, truncate_to_token_limit
+
+
+@pytest.mark.unit
+def test_pack_batches_respects_token_and_count_limits():
+    """Les lots ne dépassent jamais le budget de jetons ni le nombre d'entrées."""
+    limits = BatchLimits(max_batch_size=3, max_tokens_per_request=100, max_tokens_per_input=80)
+    batches = pack_batches([60, 30, 20, 5, 5, 5, 5], limits)
+
+    assert batches == [[0, 1], [2, 3, 4], [5, 6]]
+
+
+@pytest.mark.unit
+def test_pack_batches_counts_oversized_inputs_at_the_input_limit():
+    """Une entrée trop grosse occupe un lot seule, comptée à la taille tronquée."""
+    limits = BatchLimits(max_batch_size=10, max_tokens_per_request=100, max_tokens_per_input=50)
+    assert pack_batches([500, 40, 10], limits) == [[0, 1, 2]]
+
+
+@pytest.mark.unit
+def test_truncate_to_token_limit_cuts_on_line_boundary():
+    text = "\n".join(["x" * 9] * 10)  # 99 caractères
+    truncated = truncate_to_token_limit(text, max_tokens=10)  # 40 caractères max
+
+    assert len(truncated) <= 40
+    assert truncated.endswith("x")
+    assert truncate_to_token_limit("short", max_tokens=10) == "short"
@@ -0,0 +1,21 @@
+# FICHIER: tests/ingestion/test_code_tokenizer.py
+import pytest
+from ingestion.code_tokenizer import split_identifier, tokenize_code
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("identifier, expected", [
+    ("getUserById", ["get", "user", "by", "id"]),
+    ("snake_case_names", ["snake", "case", "names"]),
+    ("HTTPServerError", ["http", "server", "error"]),
+    ("parse_HTTPResponse2", ["parse", "http", "response", "2"]),
+])
+def test_split_identifier(identifier, expected):
+    assert split_identifier(identifier) == expected
+
+
+@pytest.mark.unit
+def test_tokenize_code_keeps_full_identifier_and_subwords():
+    tokens = tokenize_code("def getUserById(user_id): return db[user_id]")
+    assert tokens[:6] == ["def", "getuserbyid", "get", "user", "by", "id"]
+    assert "user_id" in tokens
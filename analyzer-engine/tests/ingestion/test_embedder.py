@@ -0,0 +1,157 @@
+# FICHIER: tests/ingestion/test_embedder.py
+import pytest
+from ingestion.chunker import DocumentChunk
+from ingestion.embedder import EmbeddingGenerator
+from ingestion.embedding_cache import EmbeddingCache
+
+
+class StubProvider:
+    """Fournisseur minimal qui compte les textes réellement envoyés."""
+
+    def __init__(self, dimension: int = 4):
+        self.dimension = dimension
+        self.sent_texts = []
+
+    async def generate_embedding(self, text):
+        self.sent_texts.append(text)
+        return [float(len(text))] * self.dimension
+
+    async def generate_embeddings_batch(self, texts):
+        self.sent_texts.extend(texts)
+        return [[float(len(t))] * self.dimension for t in texts]
+
+    def get_embedding_dimension(self):
+        return self.dimension
+
+
+def make_chunks(*contents):
+    return [DocumentChunk(content=c, index=i, start_char=0, end_char=len(c), metadata={}) for i, c in enumerate(contents)]
+
+
+@pytest.mark.unit
+async def test_embed_chunks_only_sends_cache_misses():
+    """Au second passage, seuls les nouveaux contenus partent chez le fournisseur."""
+    provider = StubProvider()
+    cache = EmbeddingCache(provider="StubProvider", model="m", dimension=4, path=":memory:")
+    generator = EmbeddingGenerator(provider=provider, cache=cache)
+
+    await generator.embed_chunks(make_chunks("alpha", "beta"))
+    chunks = await generator.embed_chunks(make_chunks("alpha", "beta", "gamma!"))
+
+    assert provider.sent_texts == ["alpha", "beta", "gamma!"]
+    assert [c.embedding[0] for c in chunks] == [5.0, 4.0, 6.0]
+    assert chunks[0].metadata["embedding_cached"] is True
+    assert cache.stats.hits == 2
+
+
+@pytest.mark.unit
+async def test_embed_query_uses_cache():
+    """Une requête répétée n'appelle le fournisseur qu'une seule fois."""
+    provider = StubProvider()
+    cache = EmbeddingCache(provider="StubProvider", model="m", dimension=4, path=":memory:")
+    generator = EmbeddingGenerator(provider=provider, cache=cache)
+
+    first = await generator.embed_query("find user")
+    second = await generator.embed_query("find user")
+
+    assert provider.sent_texts == ["find user"]
+    assert list(first) == list(second)
+
+
+@pytest.mark.unit
+async def test_embed_chunks_dispatches_batches_concurrently_in_order():
+    """Plusieurs lots sont en vol simultanément et l'ordre de sortie est conservé."""
+    from ingestion.providers_fake import FakeEmbeddingProvider
+    provider = FakeEmbeddingProvider(dimension=4, latency=0.02, jitter=0.02)
+    generator = EmbeddingGenerator(provider=provider, use_cache=False, batch_size=2, max_concurrency=4)
+
+    contents = [f"chunk {i}" for i in range(16)]
+    chunks = await generator.embed_chunks(make_chunks(*contents))
+
+    assert provider.peak_in_flight > 1
+    assert [c.content for c in chunks] == contents
+    assert all(list(c.embedding) == list(provider._vector(c.content)) for c in chunks)
+
+
+@pytest.mark.unit
+async def test_embed_chunks_backs_off_on_rate_limit():
+    """Sur des 429, la concurrence diminue et tous les lots finissent par aboutir."""
+    from ingestion.providers_fake import FakeEmbeddingProvider
+    provider = FakeEmbeddingProvider(dimension=4, latency=0.01, max_concurrent_requests=1)
+    generator = EmbeddingGenerator(
+        provider=provider, use_cache=False, batch_size=1, max_concurrency=4,
+        max_retries=6, retry_delay=0.001
+    )
+
+    chunks = await generator.embed_chunks(make_chunks(*[f"c{i}" for i in range(6)]))
+
+    assert provider.rate_limited_count > 0
+    assert generator.concurrency.limit < 4
+    assert all("embedding_error" not in c.metadata for c in chunks)
+
+
+@pytest.mark.unit
+async def test_embed_chunks_packs_batches_by_tokens_and_reports_fill():
+    """Les petits chunks sont regroupés ; les chunks géants sont tronqués et signalés."""
+    from ingestion.batching import BatchLimits
+    from ingestion.providers_fake import FakeEmbeddingProvider
+    limits = BatchLimits(max_batch_size=50, max_tokens_per_request=100, max_tokens_per_input=60)
+    provider = FakeEmbeddingProvider(dimension=4, batch_limits=limits)
+    generator = EmbeddingGenerator(provider=provider, use_cache=False)
+
+    chunks = make_chunks("a" * 400, *["b" * 40] * 10)  # 100 jetons, puis 10 x 10 jetons
+    await generator.embed_chunks(chunks)
+
+    assert sorted(provider.batch_sizes) == [5, 6]
+    assert chunks[0].metadata["embedding_truncated"] is True
+    report = generator.last_packing_report
+    assert report.truncated_items == 1
+    assert report.fill_efficiency == pytest.approx(160 / 200)
+
+
+@pytest.mark.unit
+async def test_embeddings_are_compact_float32_and_not_copied_to_context():
+    """Les embeddings restent des buffers float32 (4 octets/dim) jusqu'au contexte."""
+    from ingestion.providers_fake import FakeEmbeddingProvider
+    generator = EmbeddingGenerator(provider=FakeEmbeddingProvider(dimension=16), use_cache=False)
+
+    chunks = await generator.embed_chunks(make_chunks("alpha", "beta"))
+    as_dicts = [c.to_dict() for c in chunks]
+
+    assert chunks[0].embedding.dtype == "float32"
+    assert chunks[0].embedding.nbytes == 16 * 4
+    assert as_dicts[0]["embedding"] is chunks[0].embedding
+    assert as_dicts[0]["metadata"] is chunks[0].metadata
+
+
+@pytest.mark.unit
+async def test_failed_batches_leave_chunks_without_embedding():
+    """Un échec définitif ne produit plus de vecteurs nuls : embedding=None et erreur en métadonnées."""
+    class BrokenProvider(StubProvider):
+        async def generate_embeddings_batch(self, texts):
+            raise RuntimeError("boom")
+
+    generator = EmbeddingGenerator(provider=BrokenProvider(), use_cache=False, max_retries=2, retry_delay=0.001)
+
+    chunks = await generator.embed_chunks(make_chunks("alpha", "beta"))
+
+    assert all(c.embedding is None for c in chunks)
+    assert all(c.metadata["embedding_error"] == "boom" for c in chunks)
+
+
+@pytest.mark.unit
+def test_close_releases_provider_and_cache():
+    """close() ferme le fournisseur s'il expose close() (pool de threads Google) et le cache."""
+    class ClosableProvider(StubProvider):
+        closed = False
+
+        def close(self):
+            self.closed = True
+
+    provider = ClosableProvider()
+    cache = EmbeddingCache(provider="StubProvider", model="m", dimension=4, path=":memory:")
+    generator = EmbeddingGenerator(provider=provider, cache=cache)
+    generator.close()
+
+    assert provider.closed and cache._conn is None
+    EmbeddingGenerator(provider=StubProvider(), use_cache=False).close()
@@ -0,0 +1,84 @@
+# FICHIER: tests/ingestion/test_embedding_cache.py
+import sqlite3
+
+import pytest
+import numpy as np
+from ingestion import embedding_cache
+from ingestion.embedding_cache import EmbeddingCache, content_hash
+
+
+@pytest.mark.unit
+def test_cache_roundtrip_and_counters():
+    """Un vecteur stocké est relu à l'identique (float32) et les compteurs suivent."""
+    cache = EmbeddingCache(provider="stub", model="m", dimension=3, path=":memory:")
+    digest = content_hash("def f(): pass")
+
+    assert cache.get_many([digest]) == {}
+    cache.put_many({digest: [0.5, -1.0, 2.0]})
+
+    found = cache.get_many([digest])
+    assert np.allclose(found[digest], [0.5, -1.0, 2.0])
+    assert cache.stats.hits == 1
+    assert cache.stats.misses == 1
+    assert cache.stats.hit_rate == 0.5
+
+
+@pytest.mark.unit
+def test_cache_key_includes_model_and_dimension(tmp_path):
+    """Deux modèles différents ne partagent jamais leurs vecteurs."""
+    path = str(tmp_path / "cache.sqlite")
+    digest = content_hash("same text")
+    EmbeddingCache(provider="stub", model="a", dimension=2, path=path).put_many({digest: [1.0, 2.0]})
+
+    assert EmbeddingCache(provider="stub", model="b", dimension=2, path=path).get_many([digest]) == {}
+    assert EmbeddingCache(provider="stub", model="a", dimension=3, path=path).get_many([digest]) == {}
+    assert digest in EmbeddingCache(provider="stub", model="a", dimension=2, path=path).get_many([digest])
+
+
+@pytest.mark.unit
+def test_cache_evicts_least_recently_used():
+    """Au-delà de max_entries, les entrées les moins récemment lues sont évincées."""
+    cache = EmbeddingCache(provider="stub", model="m", dimension=1, path=":memory:", max_entries=2)
+    cache.put_many({"a": [1.0]})
+    cache.put_many({"b": [2.0]})
+    cache.get_many(["a"])  # 'a' devient plus récent que 'b'
+    cache.put_many({"c": [3.0]})
+
+    assert len(cache) == 2
+    assert set(cache.get_many(["a", "b", "c"])) == {"a", "c"}
+    assert cache.stats.evictions == 1
+
+
+@pytest.mark.unit
+def test_cache_hits_do_not_write(tmp_path, monkeypatch):
+    """Une lecture ne fait aucune écriture : l'heure d'accès est écrite au prochain put_many ou à close()."""
+    path = str(tmp_path / "cache.sqlite")
+    cache = EmbeddingCache(provider="stub", model="m", dimension=1, path=path)
+    monkeypatch.setattr(embedding_cache.time, "time", lambda: 1.0)
+    cache.put_many({"a": [1.0]})
+    conn = cache._connection()
+    changes = conn.total_changes
+
+    monkeypatch.setattr(embedding_cache.time, "time", lambda: 2.0)
+    assert "a" in cache.get_many(["a"])
+    assert conn.total_changes == changes
+
+    cache.close()
+    with sqlite3.connect(path) as reader:
+        assert reader.execute("SELECT last_access FROM embeddings").fetchone() == (2.0,)
+
+
+@pytest.mark.unit
+def test_size_cap_uses_the_tracked_row_count(tmp_path):
+    """Le nombre de lignes est lu à l'ouverture puis suivi : un remplacement ne compte pas comme un ajout."""
+    path = str(tmp_path / "cache.sqlite")
+    cache = EmbeddingCache(provider="stub", model="m", dimension=1, path=path, max_entries=3)
+    cache.put_many({"a": [1.0], "b": [2.0]})
+    cache.put_many({"a": [1.5]})
+    assert cache._row_count == len(cache) == 2
+    cache.close()
+
+    reopened = EmbeddingCache(provider="stub", model="m", dimension=1, path=path, max_entries=3)
+    reopened.put_many({"c": [3.0], "d": [4.0]})
+    assert reopened._row_count == len(reopened) == 3
+    assert reopened.stats.evictions == 1
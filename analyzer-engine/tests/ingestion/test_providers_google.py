@@ -0,0 +1,55 @@
+# FICHIER: tests/ingestion/test_providers_google.py
+import threading
+import time
+import pytest
+import numpy as np
+from ingestion.providers_google import GoogleAIEmbedder, EMBEDDING_DIMENSION
+
+
+class FakeEmbedContent:
+    """Remplaçant local de `genai.embed_content` : bloquant, comme le vrai SDK."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = []
+        self.threads = set()
+
+    def __call__(self, model, content, task_type):
+        self.calls.append(content)
+        self.threads.add(threading.current_thread().name)
+        time.sleep(self.latency)
+        if isinstance(content, str):
+            return {"embedding": [float(len(content))] * EMBEDDING_DIMENSION}
+        return {"embedding": [[float(len(text))] * EMBEDDING_DIMENSION for text in content]}
+
+
+@pytest.mark.unit
+async def test_large_batches_are_split_and_sent_in_parallel():
+    """250 textes -> 3 sous-requêtes (<= 100) exécutées en parallèle sur le pool dédié."""
+    fake = FakeEmbedContent(latency=0.1)
+    embedder = GoogleAIEmbedder(api_key="test", max_workers=4, embed_fn=fake)
+    texts = [f"text {i}" for i in range(250)]
+
+    started = time.perf_counter()
+    vectors = await embedder.generate_embeddings_batch(texts)
+    elapsed = time.perf_counter() - started
+    embedder.close()
+
+    assert sorted(len(call) for call in fake.calls) == [50, 100, 100]
+    assert elapsed < 0.25  # séquentiel : >= 0.3 s
+    assert vectors.shape == (250, EMBEDDING_DIMENSION) and vectors.dtype == np.float32
+    assert vectors[249][0] == len("text 249")
+    assert all(name.startswith("google-embed") for name in fake.threads)
+    assert embedder.stats()["count"] == 3
+
+
+@pytest.mark.unit
+async def test_single_embedding_uses_dedicated_executor():
+    fake = FakeEmbedContent()
+    embedder = GoogleAIEmbedder(api_key="test", max_workers=1, embed_fn=fake)
+
+    vector = await embedder.generate_embedding("abc")
+    embedder.close()
+
+    assert vector[0] == 3.0
+    assert fake.threads == {"google-embed_0"}
@@ -0,0 +1,40 @@
+# FICHIER: tests/ingestion/test_providers_local.py
+import pytest
+import numpy as np
+from ingestion.providers_local import LocalHashingEmbedder
+
+
+@pytest.mark.unit
+async def test_local_embedder_is_deterministic_and_normalized():
+    embedder = LocalHashingEmbedder(dimension=256)
+    batch = await embedder.generate_embeddings_batch(["def get_user(): pass", ""])
+    single = await embedder.generate_embedding("def get_user(): pass")
+
+    assert len(batch) == 2 and len(batch[0]) == 256
+    assert np.allclose(batch[0], single)
+    assert np.linalg.norm(batch[0]) == pytest.approx(1.0, rel=1e-5)
+    assert not any(batch[1])  # texte vide -> vecteur nul
+
+
+@pytest.mark.unit
+def test_local_embedder_ranks_lexically_close_code_higher():
+    """getUserById doit être plus proche de 'get user by id' que d'un code sans rapport."""
+    embedder = LocalHashingEmbedder(dimension=512)
+    query, related, unrelated = embedder.embed([
+        "get user by id",
+        "def getUserById(user_id): return users[user_id]",
+        "class HttpServer: def listen(self, port): ...",
+    ])
+    assert query @ related > query @ unrelated
+
+
+@pytest.mark.unit
+def test_get_embedder_selects_local_provider_without_api_key(monkeypatch):
+    from ingestion.providers import get_embedder
+    monkeypatch.setenv("EMBEDDING_PROVIDER", "local")
+    monkeypatch.delenv("EMBEDDING_API_KEY", raising=False)
+    monkeypatch.setenv("VECTOR_DIMENSION", "128")
+
+    embedder = get_embedder()
+    assert isinstance(embedder, LocalHashingEmbedder)
+    assert embedder.get_embedding_dimension() == 128
@@ -0,0 +1,44 @@
+# FICHIER: tests/ingestion/test_providers_openai.py
+import base64
+from types import SimpleNamespace
+
+import pytest
+import numpy as np
+from core.exceptions.base_exceptions import EmbeddingProviderError
+from ingestion.providers import OpenAIEmbedderWrapper
+
+
+class FakeEmbeddings:
+    """Endpoint /embeddings qui rend des vecteurs déjà encodés (base64 ou listes de floats)."""
+
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+
+    async def create(self, model, input, encoding_format):
+        return SimpleNamespace(data=[SimpleNamespace(embedding=e) for e in self.embeddings])
+
+
+def make_wrapper(embeddings):
+    wrapper = OpenAIEmbedderWrapper(model_name="m", api_key="unused", base_url="http://localhost")
+    wrapper.client = SimpleNamespace(embeddings=FakeEmbeddings(embeddings))
+    return wrapper
+
+
+@pytest.mark.unit
+async def test_decodes_base64_and_float_list_responses():
+    """Les serveurs compatibles qui ignorent encoding_format renvoient des listes : les deux formes sont lues."""
+    vector = np.array([0.5, -1.0, 2.0], dtype=np.float32)
+    encoded = base64.b64encode(vector.tobytes()).decode()
+
+    batch = await make_wrapper([encoded, [0.5, -1.0, 2.0]]).generate_embeddings_batch(["a", "b"])
+
+    assert batch.dtype == np.float32 and batch.shape == (2, 3)
+    np.testing.assert_array_equal(batch[0], batch[1])
+    np.testing.assert_array_equal(await make_wrapper([[0.5, -1.0, 2.0]]).generate_embedding("a"), vector)
+
+
+@pytest.mark.unit
+async def test_batch_checks_the_number_of_embeddings():
+    assert (await make_wrapper([]).generate_embeddings_batch([])).shape == (0, 1536)
+    with pytest.raises(EmbeddingProviderError, match="Expected 2 embeddings, got 0"):
+        await make_wrapper([]).generate_embeddings_batch(["a", "b"])
@@ -0,0 +1,42 @@
+# FICHIER: tests/ingestion/test_query_coalescer.py
+import asyncio
+import pytest
+import numpy as np
+from ingestion.providers_fake import FakeEmbeddingProvider
+from ingestion.query_coalescer import QueryCoalescer
+
+
+@pytest.mark.unit
+async def test_concurrent_queries_share_one_batch_request():
+    """Des requêtes simultanées partent en un seul appel et chacun reçoit son vecteur."""
+    provider = FakeEmbeddingProvider(dimension=8, latency=0.005)
+    coalescer = QueryCoalescer(provider, window_ms=20, max_batch_size=64)
+
+    queries = [f"query {i}" for i in range(10)] + ["query 0"]
+    vectors = await asyncio.gather(*(coalescer.embed(q) for q in queries))
+
+    assert provider.request_count == 1
+    assert provider.batch_sizes == [10]  # la requête dupliquée n'est envoyée qu'une fois
+    for query, vector in zip(queries, vectors):
+        assert np.array_equal(vector, provider._vector(query))
+    assert coalescer.stats()["count"] == 11
+
+
+@pytest.mark.unit
+async def test_batch_is_dispatched_when_full():
+    provider = FakeEmbeddingProvider(dimension=4)
+    coalescer = QueryCoalescer(provider, window_ms=10_000, max_batch_size=3)
+
+    await asyncio.wait_for(asyncio.gather(*(coalescer.embed(f"q{i}") for i in range(6))), timeout=1)
+
+    assert provider.batch_sizes == [3, 3]
+
+
+@pytest.mark.unit
+async def test_provider_error_is_propagated_to_every_caller():
+    provider = FakeEmbeddingProvider(dimension=4, fail_first_n_requests=1)
+    coalescer = QueryCoalescer(provider, window_ms=5)
+
+    results = await asyncio.gather(coalescer.embed("a"), coalescer.embed("b"), return_exceptions=True)
+
+    assert all(isinstance(r, Exception) for r in results)
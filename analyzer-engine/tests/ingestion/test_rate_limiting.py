@@ -0,0 +1,41 @@
+# FICHIER: tests/ingestion/test_rate_limiting.py
+import time
+import pytest
+from ingestion.rate_limiting import AdaptiveConcurrencyLimiter, TokenBucket, is_rate_limit_error
+from core.exceptions.base_exceptions import RateLimitExceededError
+
+
+@pytest.mark.unit
+async def test_token_bucket_waits_when_budget_exhausted():
+    """Une fois la capacité consommée, l'acquisition suivante attend la recharge."""
+    bucket = TokenBucket(rate_per_minute=600)  # 10 jetons par seconde
+    assert await bucket.acquire(600) == 0.0
+
+    started = time.monotonic()
+    await bucket.acquire(1)
+    assert time.monotonic() - started >= 0.09
+
+
+@pytest.mark.unit
+def test_adaptive_limiter_aimd():
+    """Croissance additive quand tout va bien, division par deux sur un 429."""
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, max_limit=8)
+    for _ in range(4):
+        limiter.record_success(0.1)
+    assert limiter.limit == 5
+
+    limiter.record_throttle()
+    assert limiter.limit == 2
+
+    limiter.record_success(10.0)  # pic de latence
+    assert limiter.limit == 1
+
+
+@pytest.mark.unit
+def test_is_rate_limit_error_detects_http_429():
+    class HTTPError(Exception):
+        status_code = 429
+
+    assert is_rate_limit_error(RateLimitExceededError())
+    assert is_rate_limit_error(HTTPError())
+    assert not is_rate_limit_error(ValueError("boom"))
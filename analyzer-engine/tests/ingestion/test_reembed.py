@@ -0,0 +1,78 @@
+# FICHIER: tests/ingestion/test_reembed.py
+import pytest
+from ingestion.embedder import EmbeddingGenerator
+from ingestion.reembed import ReembeddingWorker
+
+
+class StubRepository:
+    """Repository en mémoire limité à la file des embeddings échoués."""
+
+    def __init__(self, contents):
+        self.dead_letters = {f"id-{i}": {"content": c, "attempts": 0} for i, c in enumerate(contents)}
+        self.embeddings = {}
+
+    async def get_pending_reembeds(self, limit, max_attempts):
+        pending = [
+            {"chunk_id": chunk_id, "content": row["content"], "token_count": None, "attempts": row["attempts"]}
+            for chunk_id, row in self.dead_letters.items() if row["attempts"] < max_attempts
+        ]
+        return pending[:limit]
+
+    async def update_chunk_embeddings(self, embeddings):
+        for chunk_id, embedding in embeddings.items():
+            self.embeddings[chunk_id] = embedding
+            self.dead_letters.pop(chunk_id)
+        return len(embeddings)
+
+    async def record_reembed_failures(self, chunk_ids, error):
+        for chunk_id in chunk_ids:
+            self.dead_letters[chunk_id]["attempts"] += 1
+            self.dead_letters[chunk_id]["error"] = error
+
+
+class SelectiveProvider:
+    """Fournisseur qui échoue sur les lots contenant le texte 'poison'."""
+    dimension = 4
+
+    async def generate_embeddings_batch(self, texts):
+        if "poison" in texts:
+            raise RuntimeError("poisoned batch")
+        return [[1.0] * self.dimension for _ in texts]
+
+    async def generate_embedding(self, text):
+        return (await self.generate_embeddings_batch([text]))[0]
+
+    def get_embedding_dimension(self):
+        return self.dimension
+
+
+def make_worker(repository, **kwargs):
+    embedder = EmbeddingGenerator(provider=SelectiveProvider(), use_cache=False, batch_size=1, max_retries=1)
+    return ReembeddingWorker(repository, embedder, **kwargs)
+
+
+@pytest.mark.unit
+async def test_run_repairs_dead_letters_in_place():
+    """Les chunks en échec sont ré-embeddés par lots puis retirés de la file."""
+    repository = StubRepository(["alpha", "beta", "gamma"])
+
+    report = await make_worker(repository, batch_size=2).run()
+
+    assert report.as_dict() == {"processed": 3, "repaired": 3, "failed": 0}
+    assert repository.dead_letters == {}
+    assert set(repository.embeddings) == {"id-0", "id-1", "id-2"}
+
+
+@pytest.mark.unit
+async def test_persistent_failures_stop_after_max_attempts():
+    """Un chunk qui échoue toujours est compté à chaque passe puis abandonné après max_attempts."""
+    repository = StubRepository(["alpha", "poison"])
+    worker = make_worker(repository, max_attempts=3)
+
+    report = await worker.run()
+    while (await worker.run_once()).processed:
+        pass
+
+    assert report.repaired == 1
+    assert repository.dead_letters["id-1"]["attempts"] == 3
+    assert repository.dead_letters["id-1"]["error"] == "poisoned batch"